@@ -0,0 +1,46 @@
+"""
+Compare two benchmark result files: python benchmarks/compare.py base.json head.json
+"""
+import argparse
+import json
+
+
+def flatten(data: dict, prefix: str = "") -> dict:
+    values = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            values.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[path] = value
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two benchmark result files.")
+    parser.add_argument("base")
+    parser.add_argument("head")
+    args = parser.parse_args()
+
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    print(f"base: {base['meta'].get('commit')}  head: {head['meta'].get('commit')}")
+    if base["meta"].get("args") != head["meta"].get("args"):
+        print("warning: the runs used different arguments")
+
+    base_values = flatten(base["results"])
+    head_values = flatten(head["results"])
+    for path in sorted(base_values.keys() | head_values.keys()):
+        old, new = base_values.get(path), head_values.get(path)
+        if old is None or new is None:
+            print(f"{path:55} {old!s:>14} {new!s:>14}")
+            continue
+        change = f"{(new - old) / old * 100:+.1f}%" if old else ""
+        print(f"{path:55} {old:14.3f} {new:14.3f} {change:>9}")
+
+
+if __name__ == "__main__":
+    main()
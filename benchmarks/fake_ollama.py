@@ -0,0 +1,170 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from functools import lru_cache
+import numpy as np
+import threading
+import hashlib
+import json
+import time
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    """
+    Local stand-in for Ollama speaking /api/embeddings, /api/embed and /api/chat.
+    Embeddings are deterministic bags of hashed words, so texts sharing words score higher.
+    Like the real server, /api/embed returns them L2-normalized and the legacy /api/embeddings raw.
+    Latencies are simulated with sleeps, one thread per connection.
+    """
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, embedding_size: int = 384,
+                 embed_latency_ms: float = 5.0, embed_item_latency_ms: float = 0.5,
+                 chat_latency_ms: float = 50.0, token_latency_ms: float = 2.0, answer_tokens: int = 32):
+        super().__init__((host, port), FakeOllamaHandler)
+        self.embedding_size = embedding_size
+        self.embed_latency = embed_latency_ms / 1000
+        self.embed_item_latency = embed_item_latency_ms / 1000
+        self.chat_latency = chat_latency_ms / 1000
+        self.token_latency = token_latency_ms / 1000
+        self.answer_tokens = answer_tokens
+        self.thread = None
+        self.word_vector = lru_cache(maxsize=100_000)(self._word_vector)
+
+        self.requests_lock = threading.Lock()
+        self.requests = {"/api/embeddings": 0, "/api/embed": 0, "/api/chat": 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="fake-ollama", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def count_request(self, path: str):
+        with self.requests_lock:
+            self.requests[path] += 1
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        seed = int.from_bytes(hashlib.md5(word.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(self.embedding_size).astype(np.float32)
+
+    def embed(self, text: str, normalize: bool = True) -> list:
+        vector = np.zeros(self.embedding_size, dtype=np.float32)
+        for word in TOKEN_PATTERN.findall(text.lower()):
+            vector += self.word_vector(word)
+
+        norm = np.linalg.norm(vector)
+        if normalize and norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def count_tokens(self, texts: list) -> int:
+        return sum(len(TOKEN_PATTERN.findall(text)) for text in texts)
+
+    def answer(self, messages: list) -> list:
+        prompt = messages[-1]["content"] if messages else ""
+        words = TOKEN_PATTERN.findall(prompt)[-self.answer_tokens:] or ["ok"]
+        return [word + " " for word in words]
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    # keep-alive, like the real server, so pooled clients reuse their connections
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, payload: dict):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+
+        if self.path not in server.requests:
+            self.send_json({"error": f"unknown path {self.path}"}, status=404)
+            return
+        server.count_request(self.path)
+
+        if self.path == "/api/embeddings":
+            time.sleep(server.embed_latency + server.embed_item_latency)
+            self.send_json({"embedding": server.embed(request.get("prompt", ""), normalize=False)})
+
+        elif self.path == "/api/embed":
+            inputs = request.get("input", [])
+            inputs = [inputs] if isinstance(inputs, str) else inputs
+            time.sleep(server.embed_latency + server.embed_item_latency * len(inputs))
+            self.send_json({
+                "model": request.get("model"),
+                "embeddings": [server.embed(text) for text in inputs],
+                "prompt_eval_count": server.count_tokens(inputs)
+            })
+
+        elif self.path == "/api/chat":
+            time.sleep(server.chat_latency)
+            tokens = server.answer(request.get("messages", []))
+            usage = {
+                "prompt_eval_count": server.count_tokens([message["content"] for message in request.get("messages", [])]),
+                "eval_count": len(tokens)
+            }
+
+            if not request.get("stream", True):
+                time.sleep(server.token_latency * len(tokens))
+                self.send_json({
+                    "model": request.get("model"),
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "done": True,
+                    **usage
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                time.sleep(server.token_latency)
+                self.send_chunk({"model": request.get("model"), "message": {"role": "assistant", "content": token}, "done": False})
+            self.send_chunk({"model": request.get("model"), "message": {"role": "assistant", "content": ""}, "done": True, **usage})
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama API for local runs.")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--embedding-size", type=int, default=384)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0)
+    parser.add_argument("--chat-latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(
+        port=args.port,
+        embedding_size=args.embedding_size,
+        embed_latency_ms=args.embed_latency_ms,
+        chat_latency_ms=args.chat_latency_ms
+    )
+    print(f"Fake Ollama listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,274 @@
+from bson.objectid import ObjectId
+from pymongo import InsertOne, UpdateOne, DeleteOne, DeleteMany
+from pymongo.errors import DuplicateKeyError
+from pymongo.results import InsertOneResult, UpdateResult, DeleteResult, BulkWriteResult
+import copy
+
+MISSING = object()
+
+
+def get_path(doc: dict, path: str):
+    value = doc
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return MISSING
+        value = value[key]
+    return value
+
+
+def match_condition(value, condition) -> bool:
+    if not (isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)):
+        return value is not MISSING and value == condition
+
+    for operator, operand in condition.items():
+        if operator == "$eq" and not (value is not MISSING and value == operand):
+            return False
+        if operator == "$ne" and value is not MISSING and value == operand:
+            return False
+        if operator == "$in" and (value is MISSING or value not in operand):
+            return False
+        if operator == "$nin" and value is not MISSING and value in operand:
+            return False
+        if operator == "$exists" and (value is not MISSING) != bool(operand):
+            return False
+        if operator in ("$gt", "$gte", "$lt", "$lte"):
+            if value is MISSING:
+                return False
+            if operator == "$gt" and not value > operand:
+                return False
+            if operator == "$gte" and not value >= operand:
+                return False
+            if operator == "$lt" and not value < operand:
+                return False
+            if operator == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+def match(doc: dict, query: dict) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$and":
+            if not all(match(doc, sub_query) for sub_query in condition):
+                return False
+        elif key == "$or":
+            if not any(match(doc, sub_query) for sub_query in condition):
+                return False
+        elif not match_condition(get_path(doc, key), condition):
+            return False
+    return True
+
+
+def set_path(doc: dict, path: str, value):
+    *parents, last = path.split(".")
+    for key in parents:
+        doc = doc.setdefault(key, {})
+    doc[last] = value
+
+
+def apply_update(doc: dict, update: dict):
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            if operator == "$set":
+                set_path(doc, path, value)
+            elif operator == "$unset":
+                *parents, last = path.split(".")
+                parent = get_path(doc, ".".join(parents)) if parents else doc
+                if isinstance(parent, dict):
+                    parent.pop(last, None)
+            elif operator == "$inc":
+                current = get_path(doc, path)
+                set_path(doc, path, (0 if current is MISSING else current) + value)
+            else:
+                raise NotImplementedError(f"Update operator {operator} is not supported")
+
+
+class MemoryCursor:
+    def __init__(self, docs: list):
+        self.docs = docs
+        self.skip_count = 0
+        self.limit_count = 0
+
+    def skip(self, count: int):
+        self.skip_count = count
+        return self
+
+    def limit(self, count: int):
+        self.limit_count = count
+        return self
+
+    def sort(self, key, direction: int = 1):
+        self.docs.sort(key=lambda doc: get_path(doc, key), reverse=direction < 0)
+        return self
+
+    def results(self) -> list:
+        docs = self.docs[self.skip_count:]
+        if self.limit_count:
+            docs = docs[:self.limit_count]
+        return [copy.deepcopy(doc) for doc in docs]
+
+    async def to_list(self, length: int = None):
+        docs = self.results()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for doc in self.results():
+            yield doc
+
+
+class MemoryCollection:
+    """
+    The subset of Motor's AsyncIOMotorCollection used by the models, kept in a dict.
+    Documents are deep-copied in and out, like a BSON round trip would.
+    """
+
+    def __init__(self, database: "MemoryDatabase", name: str):
+        self.database = database
+        self.name = name
+        self.docs = {}
+        self.indexes = []
+
+    def check_unique(self, doc: dict, ignore_id=None):
+        for index in self.indexes:
+            if not index["unique"]:
+                continue
+            key = tuple(get_path(doc, field) for field, _ in index["key"])
+            for other_id, other in self.docs.items():
+                if other_id != ignore_id and tuple(get_path(other, field) for field, _ in index["key"]) == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key error index: {index['name']}")
+
+    async def create_index(self, keys, name: str = None, unique: bool = False, **kwargs):
+        keys = [(keys, 1)] if isinstance(keys, str) else list(keys)
+        name = name or "_".join(f"{field}_{direction}" for field, direction in keys)
+        self.indexes.append({"key": keys, "name": name, "unique": unique})
+        self.database.created.add(self.name)
+        return name
+
+    def list_indexes(self):
+        return MemoryCursor([{"v": 2, "key": {"_id": 1}, "name": "_id_"}] + [
+            {"v": 2, "key": dict(index["key"]), "name": index["name"], "unique": index["unique"]}
+            for index in self.indexes
+        ])
+
+    def insert(self, doc: dict):
+        doc = copy.deepcopy(doc)
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self.docs:
+            raise DuplicateKeyError("E11000 duplicate key error index: _id_")
+        self.check_unique(doc)
+        self.docs[doc["_id"]] = doc
+        self.database.created.add(self.name)
+        return doc["_id"]
+
+    def find_ids(self, query: dict, first_only: bool = False) -> list:
+        if query and set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            return [query["_id"]] if query["_id"] in self.docs else []
+
+        ids = []
+        for doc_id, doc in self.docs.items():
+            if match(doc, query):
+                ids.append(doc_id)
+                if first_only:
+                    break
+        return ids
+
+    def update(self, query: dict, update: dict, many: bool = False, upsert: bool = False) -> dict:
+        ids = self.find_ids(query, first_only=not many)
+        for doc_id in ids:
+            doc = copy.deepcopy(self.docs[doc_id])
+            apply_update(doc, update)
+            self.check_unique(doc, ignore_id=doc_id)
+            self.docs[doc_id] = doc
+
+        if not ids and upsert:
+            doc = {key: value for key, value in query.items() if not key.startswith("$")}
+            apply_update(doc, update)
+            return {"n": 1, "nModified": 0, "upserted": self.insert(doc)}
+        return {"n": len(ids), "nModified": len(ids)}
+
+    def delete(self, query: dict, many: bool = False) -> int:
+        ids = self.find_ids(query, first_only=not many)
+        for doc_id in ids:
+            del self.docs[doc_id]
+        return len(ids)
+
+    async def insert_one(self, document: dict):
+        return InsertOneResult(self.insert(document), acknowledged=True)
+
+    async def insert_many(self, documents: list, ordered: bool = True):
+        return [self.insert(document) for document in documents]
+
+    async def find_one(self, filter: dict = None, *args, **kwargs):
+        ids = self.find_ids(filter or {}, first_only=True)
+        return copy.deepcopy(self.docs[ids[0]]) if ids else None
+
+    def find(self, filter: dict = None, *args, **kwargs):
+        return MemoryCursor([self.docs[doc_id] for doc_id in self.find_ids(filter or {})])
+
+    async def count_documents(self, filter: dict = None, **kwargs):
+        return len(self.find_ids(filter or {}))
+
+    async def update_one(self, filter: dict, update: dict, upsert: bool = False, **kwargs):
+        return UpdateResult(self.update(filter, update, upsert=upsert), acknowledged=True)
+
+    async def update_many(self, filter: dict, update: dict, upsert: bool = False, **kwargs):
+        return UpdateResult(self.update(filter, update, many=True, upsert=upsert), acknowledged=True)
+
+    async def delete_one(self, filter: dict, **kwargs):
+        return DeleteResult({"n": self.delete(filter)}, acknowledged=True)
+
+    async def delete_many(self, filter: dict, **kwargs):
+        return DeleteResult({"n": self.delete(filter, many=True)}, acknowledged=True)
+
+    async def bulk_write(self, requests: list, ordered: bool = True, **kwargs):
+        result = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0, "nUpserted": 0, "upserted": [], "writeErrors": [], "writeConcernErrors": []}
+
+        for request in requests:
+            if isinstance(request, InsertOne):
+                self.insert(request._doc)
+                result["nInserted"] += 1
+            elif isinstance(request, UpdateOne):
+                update_result = self.update(request._filter, request._doc, upsert=request._upsert)
+                result["nMatched"] += update_result["n"] - ("upserted" in update_result)
+                result["nModified"] += update_result["nModified"]
+                result["nUpserted"] += "upserted" in update_result
+            elif isinstance(request, (DeleteOne, DeleteMany)):
+                result["nRemoved"] += self.delete(request._filter, many=isinstance(request, DeleteMany))
+            else:
+                raise NotImplementedError(f"Bulk operation {type(request).__name__} is not supported")
+
+        return BulkWriteResult(result, acknowledged=True)
+
+
+class MemoryDatabase:
+    def __init__(self, name: str):
+        self.name = name
+        self.collections = {}
+        self.created = set()
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        if name not in self.collections:
+            self.collections[name] = MemoryCollection(self, name)
+        return self.collections[name]
+
+    async def list_collection_names(self):
+        return sorted(self.created)
+
+
+class MemoryMongoClient:
+    """
+    Drop-in for AsyncIOMotorClient within the benchmarks: client[db][collection].
+    """
+
+    def __init__(self):
+        self.databases = {}
+
+    def __getitem__(self, name: str) -> MemoryDatabase:
+        if name not in self.databases:
+            self.databases[name] = MemoryDatabase(name)
+        return self.databases[name]
+
+    def close(self):
+        pass
@@ -0,0 +1,454 @@
+"""
+Offline benchmark of the ingestion and query paths.
+
+Runs the real controllers, models and providers against local stand-ins:
+a fake Ollama HTTP server, an in-memory Mongo and an in-memory (or LOCAL mmap) vector DB.
+Results are written as JSON, compare two runs with benchmarks/compare.py.
+"""
+from fake_ollama import FakeOllamaServer
+from memory_mongo import MemoryMongoClient
+from synthetic import SyntheticCorpus
+import numpy as np
+import subprocess
+import platform
+import resource
+import argparse
+import datetime
+import tempfile
+import asyncio
+import shutil
+import glob
+import json
+import time
+import sys
+import os
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+SRC_DIR = os.path.join(REPO_DIR, "src")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Offline ingestion and query benchmark.")
+    parser.add_argument("--output", help="result file, defaults to benchmarks/results/<commit>.json")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--vector-db", choices=["memory", "local"], default="memory",
+                        help="memory: Qdrant client in :memory: mode, local: the LOCAL mmap provider in a temp dir")
+
+    parser.add_argument("--text-files", type=int, default=4)
+    parser.add_argument("--text-words", type=int, default=20000)
+    parser.add_argument("--pdf-files", type=int, default=2)
+    parser.add_argument("--pdf-pages", type=int, default=60)
+    parser.add_argument("--pdf-boilerplate-words", type=int, default=0, help="repeat a disclaimer of this many words on every PDF page")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50)
+
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--modes", default="dense,lexical,hybrid")
+    parser.add_argument("--answers", type=int, default=50, help="number of answer_with_rag calls, 0 to skip")
+    parser.add_argument("--mmr", action="store_true", help="re-select search results with maximal marginal relevance")
+    parser.add_argument("--max-per-source", type=int, default=None, help="cap search results per source file")
+
+    parser.add_argument("--embedding-size", type=int, default=384)
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0)
+    parser.add_argument("--embed-item-latency-ms", type=float, default=0.5)
+    parser.add_argument("--chat-latency-ms", type=float, default=50.0)
+    parser.add_argument("--token-latency-ms", type=float, default=2.0)
+    parser.add_argument("--embedding-cache", action="store_true", help="enable the in-process embedding cache")
+    parser.add_argument("--answer-cache", action="store_true", help="enable the semantic answer cache")
+    parser.add_argument("--embedding-microbatch", action="store_true", help="micro-batch concurrent embedding calls, as the API does")
+    return parser.parse_args()
+
+
+def configure_environment(args, ollama_url: str, vector_db_path: str):
+    """
+    Point the app settings at the stand-ins. Values that decide what is benchmarked are forced,
+    the remaining required settings only get defaults.
+    """
+    os.environ.update({
+        "LLM_PROVIDER": "OLLAMA",
+        "OLLAMA_BASE_URL": ollama_url,
+        "EMBEDDING_SIZE": str(args.embedding_size),
+        "VECTOR_DB_PROVIDER": "LOCAL" if args.vector_db == "local" else "QDRANT",
+        "VECTOR_DB_PATH": vector_db_path,
+        "VECTOR_DB_LAYOUT": "per_project",
+        "EMBEDDING_CACHE_ENABLED": "true" if args.embedding_cache else "false",
+        "ANSWER_CACHE_ENABLED": "true" if args.answer_cache else "false",
+        "EMBEDDING_MICROBATCH_ENABLED": "true" if args.embedding_microbatch else "false",
+        "SEARCH_MMR_ENABLED": "true" if args.mmr else "false",
+        "MONGODB_NAME": "minirag_benchmark",
+    })
+    os.environ.pop("CACHE_REDIS_URL", None)
+    os.environ.pop("SEARCH_MIN_SCORE", None)
+    if args.max_per_source:
+        os.environ["SEARCH_MAX_PER_SOURCE"] = str(args.max_per_source)
+    else:
+        os.environ.pop("SEARCH_MAX_PER_SOURCE", None)
+
+    defaults = {
+        "APPLICATION_NAME": "mini-rag-benchmark",
+        "APPLICATION_VERSION": "0",
+        "ALLOWED_FILE_TYPES": '["text/plain", "application/pdf"]',
+        "MAX_FILE_SIZE_MB": "100",
+        "FILE_DEFAULT_CHUNK_SIZE": "512000",
+        "FILE_DEFAULT_OVERLAP_SIZE": "20",
+        "MONGO_URL": "mongodb://localhost:27017",
+        "OPENAI_API_KEY": "unused",
+        "OPENAI_API_URL": "http://127.0.0.1:9",
+        "GENERATION_MODEL_ID": "fake-generation",
+        "EMBEDDING_MODEL_ID": "fake-embedding",
+        "CELERY_BROKER_URL": "memory://",
+        "CELERY_RESULT_BACKEND": "cache+memory://",
+        "CELERY_TASK_SERIALIZER": "json",
+        "CELERY_TASK_TIME_LIMIT": "600",
+        "CELERY_TASK_ACKS_LATE": "false",
+        "CELERY_WORKER_CONCURRENCY": "1",
+        "CELERY_FLOWER_PASSWORD": "unused",
+        "QDRANT_HOST": "localhost",
+        "QDRANT_PORT": "6333",
+    }
+    for key, value in defaults.items():
+        os.environ.setdefault(key, value)
+
+    sys.path.insert(0, SRC_DIR)
+
+
+def peak_rss() -> dict:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children_bytes": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def latency_summary(latencies: list, wall_time: float) -> dict:
+    latencies = np.asarray(latencies) * 1000
+    return {
+        "count": int(latencies.size),
+        "throughput_per_s": latencies.size / wall_time if wall_time > 0 else None,
+        "mean_ms": float(latencies.mean()),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "max_ms": float(latencies.max()),
+    }
+
+
+def git_revision() -> dict:
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=REPO_DIR, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+async def create_resources(args, vector_db_path: str):
+    """
+    Same wiring as celery_app.get_setup, with Mongo and Qdrant replaced by in-process stores.
+    The embedding micro-batcher is API-only, it is added when enabled.
+    """
+    from helpers.config import get_settings
+    from stores.llms.LLMFactory import LLMFactory
+    from stores.llms.providers.CachedEmbeddingProvider import CachedEmbeddingProvider
+    from stores.llms.providers.BatchingEmbeddingProvider import BatchingEmbeddingProvider
+    from stores.cache.EmbeddingCache import EmbeddingCache
+    from stores.VectorDB.VectorDBFactory import VectorDBFactory
+    from models.ProjectModel import ProjectModel
+    from models.DataChunkModel import DataChunkModel
+    from qdrant_client import QdrantClient
+
+    settings = get_settings()
+    mongodb_client = MemoryMongoClient()
+    await ProjectModel.create_instance(db_client=mongodb_client)
+    await DataChunkModel.create_instance(db_client=mongodb_client)
+
+    llm_factory = LLMFactory(config=settings)
+    generation_llm = llm_factory.create(settings.LLM_PROVIDER)
+    embedding_llm = llm_factory.create(settings.LLM_PROVIDER)
+    if settings.EMBEDDING_MICROBATCH_ENABLED:
+        embedding_llm = BatchingEmbeddingProvider(
+            provider=embedding_llm,
+            max_wait_ms=settings.EMBEDDING_MICROBATCH_MAX_WAIT_MS,
+            max_items=settings.EMBEDDING_MICROBATCH_MAX_ITEMS
+        )
+    if settings.EMBEDDING_CACHE_ENABLED:
+        embedding_llm = CachedEmbeddingProvider(
+            provider=embedding_llm,
+            cache=EmbeddingCache.from_settings(settings),
+            provider_name=settings.LLM_PROVIDER
+        )
+    generation_llm.set_generation_model(model_id=settings.GENERATION_MODEL_ID)
+    embedding_llm.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID, embedding_size=settings.EMBEDDING_SIZE)
+
+    vector_db_client = VectorDBFactory(settings).create(settings.VECTOR_DB_PROVIDER)
+    if args.vector_db == "memory":
+        vector_db_client.client = QdrantClient(location=":memory:")
+    else:
+        vector_db_client.init_connection(vector_db_path)
+
+    return (
+        mongodb_client,
+        mongodb_client[settings.MONGODB_NAME],
+        generation_llm,
+        embedding_llm,
+        vector_db_client
+    )
+
+
+async def ingest_file(resources, project_id: str, file_name: str, args, timings: dict, document_name: str = None) -> dict:
+    """
+    The tasks.file_processing.chunk_file pipeline, with the embed_chunks task body
+    awaited inline instead of being queued. Returns new, duplicate, unchanged and removed chunk counts.
+    """
+    from controllers.ProcessFileController import ProcessFileController
+    from controllers.LexicalIndexController import LexicalIndexController
+    from controllers.VectorStoreController import VectorStoreController
+    from models.ProjectModel import ProjectModel
+    from models.DataChunkModel import DataChunkModel
+    from helpers.config import get_settings
+    from tasks.file_processing import _embed_chunks, ingest_chunk_batches, remove_stale_chunks
+
+    mongodb_client = resources[0]
+    project_model = await ProjectModel.create_instance(db_client=mongodb_client)
+    await project_model.find_project_or_create_one(project_id=project_id)
+    data_chunk_model = await DataChunkModel.create_instance(db_client=mongodb_client)
+    lexical_index = LexicalIndexController()
+    await lexical_index.ensure_index(project_id, mongodb_client)
+    file_processor = ProcessFileController(project_id=project_id)
+
+    def timed_batches():
+        batches = file_processor.iter_chunk_batches(
+            project_id, file_name, args.chunk_size, args.overlap,
+            batch_size=get_settings().INGEST_BATCH_SIZE
+        )
+        while True:
+            started = time.perf_counter()
+            chunks_batch = next(batches, None)
+            timings["parse_split_s"] += time.perf_counter() - started
+            if chunks_batch is None:
+                return
+            yield chunks_batch
+
+    async def embed_inline(chunk_ids):
+        started = time.perf_counter()
+        result = await _embed_chunks(None, project_id, chunk_ids)
+        timings["embed_index_s"] += time.perf_counter() - started
+        if "error" in result:
+            raise RuntimeError(f"Embedding failed: {result['error']}")
+
+    # whatever the loop spends outside parsing and embedding is storing (hashing, dedup, Mongo, BM25)
+    started = time.perf_counter()
+    parse_split_s, embed_index_s = timings["parse_split_s"], timings["embed_index_s"]
+    ingested = await ingest_chunk_batches(
+        project_id, document_name or file_name, timed_batches(),
+        data_chunk_model, lexical_index, embed_inline
+    )
+    num_removed = await remove_stale_chunks(
+        project_id, ingested["stale_chunks"], data_chunk_model, lexical_index,
+        VectorStoreController(resources[3], resources[2], resources[4], mongodb_client)
+    )
+    timings["store_s"] += (time.perf_counter() - started
+                           - (timings["parse_split_s"] - parse_split_s)
+                           - (timings["embed_index_s"] - embed_index_s))
+
+    return {
+        "new": ingested["inserted_chunks"],
+        "duplicates": ingested["duplicate_chunks"],
+        "unchanged": ingested["unchanged_chunks"],
+        "removed": num_removed
+    }
+
+
+async def run_ingestion(resources, files: list, args) -> dict:
+    from controllers.ProjectController import ProjectController
+
+    timings = {"parse_split_s": 0.0, "store_s": 0.0, "embed_index_s": 0.0}
+    num_chunks = 0
+    num_duplicates = 0
+    num_bytes = 0
+
+    started = time.perf_counter()
+    for project_id, source_path in files:
+        file_name = os.path.basename(source_path)
+        shutil.copy(source_path, os.path.join(ProjectController().get_project_path(project_id), file_name))
+        num_bytes += os.path.getsize(source_path)
+        counts = await ingest_file(resources, project_id, file_name, args, timings)
+        num_chunks += counts["new"]
+        num_duplicates += counts["duplicates"]
+    wall_time = time.perf_counter() - started
+
+    return {
+        "files": len(files),
+        "bytes": num_bytes,
+        "chunks": num_chunks,
+        "duplicate_chunks": num_duplicates,
+        "wall_s": wall_time,
+        "chunks_per_s": num_chunks / wall_time,
+        "phases": timings,
+        "peak_rss": peak_rss(),
+    }
+
+
+async def run_reingestion(resources, project_id: str, source_path: str, corpus: SyntheticCorpus, args) -> dict:
+    """
+    Upload a revision of a text document with its first paragraph rewritten, only the chunks
+    of that paragraph should be embedded again.
+    """
+    from controllers.ProjectController import ProjectController
+
+    with open(source_path, encoding="utf-8") as f:
+        paragraphs = f.read().split("\n\n")
+    paragraphs[0] = corpus.paragraph(len(paragraphs[0].split()))
+
+    file_name = "revision_" + os.path.basename(source_path)
+    with open(os.path.join(ProjectController().get_project_path(project_id), file_name), "w", encoding="utf-8") as f:
+        f.write("\n\n".join(paragraphs))
+
+    timings = {"parse_split_s": 0.0, "store_s": 0.0, "embed_index_s": 0.0}
+    started = time.perf_counter()
+    counts = await ingest_file(resources, project_id, file_name, args, timings, document_name=os.path.basename(source_path))
+    return {**counts, "wall_s": time.perf_counter() - started, "phases": timings}
+
+
+async def run_queries(call, requests: list, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def timed(request):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(*request)
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[timed(request) for request in requests])
+    wall_time = time.perf_counter() - started
+
+    return {**latency_summary(latencies, wall_time), "errors": errors, "concurrency": concurrency, "wall_s": wall_time}
+
+
+async def benchmark(args, corpus: SyntheticCorpus, work_dir: str) -> dict:
+    from controllers.VectorStoreController import VectorStoreController
+    import celery_app
+
+    resources = await create_resources(args, os.path.join(work_dir, "vector_db"))
+    # the task bodies pick these up through get_worker_resources
+    celery_app.worker_resources = resources
+    mongodb_client, _, generation_llm, embedding_llm, vector_db_client = resources
+    controller = VectorStoreController(embedding_llm, generation_llm, vector_db_client, mongodb_client)
+
+    run_id = f"{os.getpid()}{int(time.time())}"
+    files = []
+    for i in range(args.text_files):
+        files.append((f"bench{run_id}t{i}", corpus.write_text(os.path.join(work_dir, f"doc{i}.txt"), args.text_words)))
+    for i in range(args.pdf_files):
+        files.append((f"bench{run_id}p{i}", corpus.write_pdf(os.path.join(work_dir, f"doc{i}.pdf"), args.pdf_pages, boilerplate_words=args.pdf_boilerplate_words)))
+    project_ids = [project_id for project_id, _ in files]
+
+    try:
+        results = {"ingestion": await run_ingestion(resources, files, args), "queries": {}}
+        if args.text_files:
+            results["reingestion"] = await run_reingestion(resources, files[0][0], files[0][1], corpus, args)
+
+        queries = corpus.queries(args.queries)
+        requests = [(project_ids[i % len(project_ids)], query) for i, query in enumerate(queries)]
+        for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+            results["queries"][mode] = await run_queries(
+                lambda project_id, query, mode=mode: controller.search_similar_vectors(project_id, query, top_k=args.top_k, mode=mode),
+                requests,
+                args.concurrency
+            )
+
+        if args.answers:
+            results["answers"] = await run_queries(
+                lambda project_id, query: controller.answer_with_rag(query, project_id, top_k=args.top_k),
+                requests[:args.answers],
+                args.concurrency
+            )
+
+        results["peak_rss"] = peak_rss()
+        return results
+
+    finally:
+        await cleanup(resources, project_ids)
+        celery_app.worker_resources = None
+
+
+async def cleanup(resources, project_ids: list):
+    from controllers.ProjectController import ProjectController
+    from controllers.LexicalIndexController import LexicalIndexController
+    from controllers.DedupController import DedupController
+    from celery_app import close_setup
+
+    await close_setup(resources)
+
+    index_controllers = [LexicalIndexController(), DedupController()]
+    for project_id in project_ids:
+        shutil.rmtree(os.path.join(ProjectController().files_dir, project_id), ignore_errors=True)
+        for controller in index_controllers:
+            for suffix in ["", ".lock", ".tmp"]:
+                index_path = controller.get_index_path(project_id) + suffix
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+            controller.loaded_indexes.pop(project_id, None)
+        for log_path in glob.glob(os.path.join(index_controllers[0].lexical_index_dir, f"{project_id}.*.log")):
+            os.remove(log_path)
+
+
+def main():
+    args = parse_args()
+    server = FakeOllamaServer(
+        embedding_size=args.embedding_size,
+        embed_latency_ms=args.embed_latency_ms,
+        embed_item_latency_ms=args.embed_item_latency_ms,
+        chat_latency_ms=args.chat_latency_ms,
+        token_latency_ms=args.token_latency_ms
+    ).start()
+
+    work_dir = tempfile.mkdtemp(prefix="minirag-bench-")
+    try:
+        configure_environment(args, server.base_url, os.path.join(work_dir, "vector_db"))
+        results = asyncio.run(benchmark(args, SyntheticCorpus(seed=args.seed), work_dir))
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            **revision,
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+            "fake_ollama_requests": server.requests,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(BENCHMARKS_DIR, "results", f"{(revision['commit'] or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    ingestion = results["ingestion"]
+    print(f"ingestion: {ingestion['chunks']} chunks ({ingestion['duplicate_chunks']} near-duplicates dropped) in {ingestion['wall_s']:.2f}s ({ingestion['chunks_per_s']:.1f} chunks/s)")
+    if "reingestion" in results:
+        reingestion = results["reingestion"]
+        print(f"reingestion: {reingestion['new']} new, {reingestion['unchanged']} unchanged, {reingestion['removed']} removed chunks in {reingestion['wall_s']:.2f}s")
+    for name, summary in {**results["queries"], **({"answer": results["answers"]} if "answers" in results else {})}.items():
+        print(f"{name}: p50 {summary['p50_ms']:.1f}ms  p95 {summary['p95_ms']:.1f}ms  p99 {summary['p99_ms']:.1f}ms  errors {summary['errors']}")
+    print(f"peak rss: {results['peak_rss']['self_bytes'] / 2**20:.1f} MiB")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import pymupdf
+import random
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "sa", "tor", "vel", "qui", "dan", "pe", "xo", "lu", "ber", "gin", "ta", "son"]
+
+
+class SyntheticCorpus:
+    """
+    Deterministic pseudo-text with a Zipf-like word distribution, so repeated runs
+    (and runs on different commits) work on the exact same documents and queries.
+    """
+
+    def __init__(self, seed: int = 42, vocabulary_size: int = 5000):
+        self.random = random.Random(seed)
+        self.vocabulary = sorted({
+            "".join(self.random.choice(SYLLABLES) for _ in range(self.random.randint(1, 4)))
+            for _ in range(vocabulary_size * 2)
+        })[:vocabulary_size]
+        self.random.shuffle(self.vocabulary)
+        self.weights = [1 / (rank + 1) for rank in range(len(self.vocabulary))]
+
+    def words(self, count: int) -> list:
+        return self.random.choices(self.vocabulary, weights=self.weights, k=count)
+
+    def sentence(self, min_words: int = 6, max_words: int = 18) -> str:
+        words = self.words(self.random.randint(min_words, max_words))
+        return " ".join(words).capitalize() + "."
+
+    def paragraph(self, num_words: int) -> str:
+        sentences = []
+        while num_words > 0:
+            sentence = self.sentence()
+            sentences.append(sentence)
+            num_words -= sentence.count(" ") + 1
+        return " ".join(sentences)
+
+    def write_text(self, path: str, num_words: int, words_per_paragraph: int = 120) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            while num_words > 0:
+                f.write(self.paragraph(min(words_per_paragraph, num_words)) + "\n\n")
+                num_words -= words_per_paragraph
+        return path
+
+    def write_pdf(self, path: str, num_pages: int, words_per_page: int = 300, boilerplate_words: int = 0) -> str:
+        """
+        boilerplate_words adds the same disclaimer paragraph to the top of every page.
+        """
+        boilerplate = self.paragraph(boilerplate_words) + "\n\n" if boilerplate_words else ""
+        with pymupdf.open() as pdf:
+            for _ in range(num_pages):
+                page = pdf.new_page()
+                page.insert_textbox(page.rect + (36, 36, -36, -36), boilerplate + self.paragraph(words_per_page), fontsize=8)
+            pdf.save(path)
+        return path
+
+    def queries(self, count: int, min_words: int = 3, max_words: int = 8) -> list:
+        return [" ".join(self.words(self.random.randint(min_words, max_words))) for _ in range(count)]
@@ -1,24 +1,52 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, before_task_publish, task_prerun, task_postrun
+from billiard.process import current_process
+from prometheus_client import start_http_server
 from helpers.config import get_settings
 from motor.motor_asyncio import AsyncIOMotorClient
 from stores.llms.LLMFactory import LLMFactory
+from stores.llms.providers.CachedEmbeddingProvider import CachedEmbeddingProvider
+from stores.cache.EmbeddingCache import EmbeddingCache
 from stores.VectorDB.VectorDBFactory import VectorDBFactory
+from helpers.async_utils import maybe_await
+from helpers.metrics import CELERY_TASK_DURATION, CELERY_QUEUE_WAIT
+from models.ProjectModel import ProjectModel
+from models.DataChunkModel import DataChunkModel
+import asyncio
+import logging
+import time
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# worker-lifetime state, one copy per worker process
+worker_loop = None
+worker_resources = None
+metrics_server_port = None
+tasks_started_at = {}
 
 async def get_setup():
     mongodb_client = AsyncIOMotorClient(settings.MONGO_URL)
     mongodb_connection = mongodb_client[settings.MONGODB_NAME]
     
+    await ProjectModel.create_instance(db_client=mongodb_client)
+    await DataChunkModel.create_instance(db_client=mongodb_client)
+    
     LLM_factory = LLMFactory(config=settings)
     generation_llm = LLM_factory.create(settings.LLM_PROVIDER)
     embedding_llm = LLM_factory.create(settings.LLM_PROVIDER)
+    if settings.EMBEDDING_CACHE_ENABLED:
+        embedding_llm = CachedEmbeddingProvider(
+            provider=embedding_llm,
+            cache=EmbeddingCache.from_settings(settings),
+            provider_name=settings.LLM_PROVIDER
+        )
 
     generation_llm.set_generation_model(model_id=settings.GENERATION_MODEL_ID)
     embedding_llm.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID, embedding_size=settings.EMBEDDING_SIZE)
     
     vectordb_factory = VectorDBFactory(settings)
-    vector_db_client = vectordb_factory.create("QDRANT")
+    vector_db_client = vectordb_factory.create(settings.VECTOR_DB_PROVIDER)
     vector_db_client.init_connection()
     
     return (
@@ -29,15 +57,113 @@ async def get_setup():
         vector_db_client
     )
 
+async def close_setup(resources):
+    (
+        mongodb_client,
+        mongodb_connection,
+        generation_llm,
+        embedding_llm,
+        vector_db_client
+    ) = resources
+    
+    mongodb_client.close()
+    await maybe_await(vector_db_client.disconnect())
+    await generation_llm.aclose()
+    await embedding_llm.aclose()
+
+def get_worker_loop():
+    """
+    Return the event loop owned by this worker process, creating it if needed.
+    """
+    global worker_loop
+    if worker_loop is None or worker_loop.is_closed():
+        worker_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(worker_loop)
+    return worker_loop
+
+def run_in_worker_loop(coro):
+    """
+    Run a coroutine on the worker's event loop instead of a fresh asyncio.run loop,
+    so clients bound to the loop (Motor) stay usable across tasks.
+    """
+    return get_worker_loop().run_until_complete(coro)
+
+async def get_worker_resources():
+    """
+    Return the clients shared by all tasks of this worker process.
+    Pools that don't fire worker_process_init (solo, threads) set them up lazily here.
+    """
+    global worker_resources
+    if worker_resources is None:
+        start_worker_metrics_server()
+        worker_resources = await get_setup()
+    return worker_resources
+
+def start_worker_metrics_server():
+    """
+    Serve this process's metrics over HTTP. Every pool child has its own registry,
+    so each one listens on CELERY_METRICS_PORT + its pool index.
+    """
+    global metrics_server_port
+    if metrics_server_port is not None or not settings.METRICS_ENABLED:
+        return
+    
+    port = settings.CELERY_METRICS_PORT + getattr(current_process(), "index", 0)
+    try:
+        start_http_server(port)
+        metrics_server_port = port
+        logger.info(f"Worker metrics served on port {port}")
+    except OSError as e:
+        logger.error(f"Could not start the worker metrics server on port {port}: {e}")
+
+@worker_process_init.connect
+def init_worker_resources(**kwargs):
+    start_worker_metrics_server()
+    run_in_worker_loop(get_worker_resources())
+    logger.info("Worker resources initialized")
+
+@before_task_publish.connect
+def stamp_task_published_at(headers=None, **kwargs):
+    # travels with the message, the worker turns it into the queue wait time
+    if headers is not None:
+        headers["published_at"] = time.time()
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    tasks_started_at[task_id] = time.perf_counter()
+    
+    published_at = getattr(task.request, "published_at", None)
+    if published_at is not None:
+        queue = (task.request.delivery_info or {}).get("routing_key") or ""
+        CELERY_QUEUE_WAIT.labels(task=task.name, queue=queue).observe(max(time.time() - published_at, 0))
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    started_at = tasks_started_at.pop(task_id, None)
+    if started_at is not None:
+        CELERY_TASK_DURATION.labels(task=task.name, state=state or "").observe(time.perf_counter() - started_at)
+
+@worker_process_shutdown.connect
+def close_worker_resources(**kwargs):
+    global worker_loop, worker_resources
+    if worker_resources is not None:
+        run_in_worker_loop(close_setup(worker_resources))
+        worker_resources = None
+    
+    if worker_loop is not None and not worker_loop.is_closed():
+        worker_loop.close()
+    worker_loop = None
+    logger.info("Worker resources closed")
+
 celery_app = Celery(
     "minirag",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
      include=[
          "tasks.file_processing",
+         "tasks.maintenance",
     #     "tasks.data_indexing",
     #     "tasks.process_workflow",
-    #     "tasks.maintenance",
      ]
 )
 
@@ -66,6 +192,8 @@ celery_app.conf.update(
      task_routes={
          "tasks.file_processing.chunk_file": {"queue": "file_processing"},
          "tasks.file_processing.embed_chunks": {"queue": "file_processing"},
+         "tasks.maintenance.apply_collection_profile": {"queue": "default"},
+         "tasks.maintenance.migrate_vector_layout": {"queue": "default"},
     #     "tasks.data_indexing.index_data_content": {"queue": "data_indexing"},
     #     "tasks.process_workflow.process_and_push_workflow": {"queue": "file_processing"},
     #     "tasks.maintenance.clean_celery_executions_table": {"queue": "default"},
@@ -0,0 +1,125 @@
+from .BaseController import BaseController
+from stores.Dedup.MinHashLSH import MinHasher, MinHashLSHIndex
+from models.db_schemes.DataChunk import DataChunk
+from helpers.metrics import INGEST_DEDUP_CHUNKS
+from bson.objectid import ObjectId
+from contextlib import contextmanager
+from typing import List, Optional, Set
+import fcntl
+import os
+
+class DedupController(BaseController):
+    """
+    Drops near-duplicate chunks (repeated headers, footers, disclaimers) before they are stored.
+    Keeps a MinHash LSH index per project under assets/dedup_index. An ingestion holds the
+    index lock throughout and saves the index once when it ends.
+    """
+
+    # project_id -> (file version, index), shared by every controller in the process
+    loaded_indexes = {}
+    # (num_perm, shingle_size) -> MinHasher
+    hashers = {}
+
+    def __init__(self):
+        super().__init__()
+
+        self.dedup_index_dir = os.path.join(
+            self.base_dir,
+            "assets/dedup_index"
+        )
+        os.makedirs(self.dedup_index_dir, exist_ok=True)
+
+    def get_index_path(self, project_id: str) -> str:
+        return os.path.join(self.dedup_index_dir, f"{project_id}.npz")
+
+    def get_file_version(self, file_path: str):
+        file_stat = os.stat(file_path)
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def get_index(self, project_id: str) -> MinHashLSHIndex:
+        index_path = self.get_index_path(project_id)
+        if not os.path.exists(index_path):
+            return MinHashLSHIndex(
+                num_perm=self.app_settings.CHUNK_DEDUP_NUM_PERM,
+                threshold=self.app_settings.CHUNK_DEDUP_THRESHOLD,
+                shingle_size=self.app_settings.CHUNK_DEDUP_SHINGLE_SIZE
+            )
+
+        version = self.get_file_version(index_path)
+        cached = self.loaded_indexes.get(project_id)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        index = MinHashLSHIndex.load(index_path, threshold=self.app_settings.CHUNK_DEDUP_THRESHOLD)
+        self.loaded_indexes[project_id] = (version, index)
+        return index
+
+    def get_hasher(self, index: MinHashLSHIndex) -> MinHasher:
+        # an existing index keeps the parameters it was built with
+        key = (index.num_perm, index.shingle_size)
+        if key not in self.hashers:
+            self.hashers[key] = MinHasher(num_perm=index.num_perm, shingle_size=index.shingle_size)
+        return self.hashers[key]
+
+    @contextmanager
+    def open_index(self, project_id: str):
+        """
+        Lock the project index for a whole ingestion and save it once at the end, not per batch.
+        Yields None when deduplication is disabled.
+        """
+        if not self.app_settings.CHUNK_DEDUP_ENABLED:
+            yield None
+            return
+
+        index_path = self.get_index_path(project_id)
+
+        with open(index_path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                index = self.get_index(project_id)
+                yield index
+
+                # write aside and swap, so readers never see a partial file
+                tmp_path = index_path + ".tmp"
+                index.save(tmp_path)
+                os.replace(tmp_path, index_path)
+
+                self.loaded_indexes[project_id] = (self.get_file_version(index_path), index)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def filter_chunks(self, index: Optional[MinHashLSHIndex], chunks: List[DataChunk],
+                      replaceable_ids: Set[str] = None) -> List[DataChunk]:
+        """
+        Return the chunks that are not near-duplicates of a chunk already kept for the project
+        (or earlier in the list), and add the kept ones to index (from open_index). Kept chunks get
+        their ids assigned here. Chunks in replaceable_ids may be deleted by the running re-upload,
+        matching them doesn't count.
+        """
+        if index is None or not chunks:
+            return chunks
+
+        hasher = self.get_hasher(index)
+        kept = []
+        for chunk in chunks:
+            signature = hasher.signature(chunk.chunk_text)
+            if index.query(signature, exclude_ids=replaceable_ids) is not None:
+                continue
+
+            if chunk.id is None:
+                chunk.id = ObjectId()
+            index.add(str(chunk.id), signature)
+            kept.append(chunk)
+
+        INGEST_DEDUP_CHUNKS.labels(result="kept").inc(len(kept))
+        INGEST_DEDUP_CHUNKS.labels(result="dropped").inc(len(chunks) - len(kept))
+        return kept
+
+    def remove_chunks(self, project_id: str, chunk_ids: List[str]):
+        """
+        Forget deleted chunks, so their near-duplicates can be stored again.
+        """
+        if not os.path.exists(self.get_index_path(project_id)):
+            return 0
+        with self.open_index(project_id) as index:
+            return index.remove(chunk_ids) if index is not None else 0
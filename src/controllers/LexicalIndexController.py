@@ -0,0 +1,209 @@
+from .BaseController import BaseController
+from stores.LexicalIndex.BM25Index import BM25Index
+from models.DataChunkModel import DataChunkModel
+from helpers.single_flight import SingleFlight
+from typing import List, Tuple
+import asyncio
+import fcntl
+import json
+import os
+import threading
+
+class LexicalIndexController(BaseController):
+    """
+    Per-project BM25 indexes persisted under assets/lexical_index as a snapshot plus an append-only
+    log of the changes made since. Writers (the ingestion tasks) append to the log under a lock and
+    fold it into a new snapshot once it outgrows the old one; readers replay only the log entries
+    they haven't seen.
+    """
+
+    # the log is folded into the snapshot once it is this large and larger than the snapshot
+    COMPACT_MIN_LOG_BYTES = 4 * 1024 * 1024
+
+    # project_id -> {"version", "generation", "offset", "index"}, shared by every controller in the process
+    loaded_indexes = {}
+    # cached indexes are updated in place, searches and log replays must not interleave
+    index_lock = threading.Lock()
+    # first-use builds from Mongo, one per project at a time
+    index_builds = SingleFlight()
+
+    def __init__(self):
+        super().__init__()
+
+        self.lexical_index_dir = os.path.join(
+            self.base_dir,
+            "assets/lexical_index"
+        )
+        os.makedirs(self.lexical_index_dir, exist_ok=True)
+
+    def get_index_path(self, project_id: str) -> str:
+        return os.path.join(self.lexical_index_dir, f"{project_id}.json.gz")
+
+    def get_log_path(self, project_id: str, generation: int) -> str:
+        # every snapshot starts a new log, a reader never applies a log to the wrong snapshot
+        return os.path.join(self.lexical_index_dir, f"{project_id}.{generation}.log")
+
+    def index_exists(self, project_id: str) -> bool:
+        return os.path.exists(self.get_index_path(project_id))
+
+    def get_file_version(self, file_path: str):
+        file_stat = os.stat(file_path)
+        return (file_stat.st_mtime_ns, file_stat.st_size)
+
+    def apply_log(self, project_id: str, cached: dict):
+        """
+        Apply the complete log lines written after cached["offset"] to cached["index"].
+        """
+        try:
+            with open(self.get_log_path(project_id, cached["generation"]), "rb") as f:
+                f.seek(cached["offset"])
+                data = f.read()
+        except FileNotFoundError:
+            # no changes yet, or compacted away: the next refresh sees the new snapshot
+            return
+
+        # a line still being written has no newline yet
+        data = data[:data.rfind(b"\n") + 1]
+        for line in data.splitlines():
+            operation, payload = json.loads(line)
+            if operation == "add":
+                cached["index"].add_documents(payload)
+            elif operation == "remove":
+                cached["index"].remove_documents(payload)
+        cached["offset"] += len(data)
+
+    def refresh_index(self, project_id: str) -> dict:
+        # callers hold index_lock
+        index_path = self.get_index_path(project_id)
+        version = self.get_file_version(index_path) if os.path.exists(index_path) else None
+
+        cached = self.loaded_indexes.get(project_id)
+        if cached is None or cached["version"] != version:
+            index = BM25Index.load(index_path) if version is not None else BM25Index()
+            cached = {
+                "version": version,
+                "generation": index.metadata.get("log_generation", 0),
+                "offset": 0,
+                "index": index
+            }
+            self.loaded_indexes[project_id] = cached
+
+        self.apply_log(project_id, cached)
+        return cached
+
+    def get_index(self, project_id: str) -> BM25Index:
+        with self.index_lock:
+            return self.refresh_index(project_id)["index"]
+
+    def add_chunks(self, project_id: str, chunks: List[Tuple[str, str]]):
+        """
+        Add (chunk_id, chunk_text) pairs to the project index and persist them.
+        """
+        self.update_index(project_id, ["add", [list(chunk) for chunk in chunks]])
+        return len(chunks)
+
+    def remove_chunks(self, project_id: str, chunk_ids: List[str]):
+        """
+        Remove chunks from the project index and persist it.
+        """
+        if not self.index_exists(project_id):
+            return 0
+        self.update_index(project_id, ["remove", list(chunk_ids)])
+        return len(chunk_ids)
+
+    def update_index(self, project_id: str, operation: list):
+        index_path = self.get_index_path(project_id)
+
+        with open(index_path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                with self.index_lock:
+                    # catch up first, so the cached offset ends where this entry starts
+                    cached = self.refresh_index(project_id)
+
+                    log_path = self.get_log_path(project_id, cached["generation"])
+                    with open(log_path, "ab") as f:
+                        f.write(json.dumps(operation, separators=(",", ":")).encode("utf-8") + b"\n")
+                    self.apply_log(project_id, cached)
+
+                    log_size = os.path.getsize(log_path)
+                    if log_size >= self.COMPACT_MIN_LOG_BYTES and (cached["version"] is None or log_size > cached["version"][1]):
+                        self.write_snapshot(project_id, cached["index"], cached["generation"])
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write_snapshot(self, project_id: str, index: BM25Index, generation: int):
+        """
+        Save index as the snapshot of a new log generation and drop the old log.
+        Callers hold the file lock and index_lock.
+        """
+        index_path = self.get_index_path(project_id)
+
+        # write aside and swap, so readers never see a partial file
+        tmp_path = index_path + ".tmp"
+        index.save(tmp_path, metadata={"log_generation": generation + 1})
+        os.replace(tmp_path, index_path)
+
+        old_log_path = self.get_log_path(project_id, generation)
+        if os.path.exists(old_log_path):
+            os.remove(old_log_path)
+
+        self.loaded_indexes[project_id] = {
+            "version": self.get_file_version(index_path),
+            "generation": generation + 1,
+            "offset": 0,
+            "index": index
+        }
+
+    def save_built_index(self, project_id: str, index: BM25Index):
+        index_path = self.get_index_path(project_id)
+
+        with open(index_path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # another process may have built it meanwhile
+                if self.index_exists(project_id):
+                    return
+
+                with self.index_lock:
+                    # chunks ingested while Mongo was read are in the log (adds are idempotent)
+                    cached = {"version": None, "generation": 0, "offset": 0, "index": index}
+                    self.apply_log(project_id, cached)
+                    self.write_snapshot(project_id, index, 0)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    async def build_from_chunks(self, project_id: str, db_client: object, batch_size: int = 1000):
+        """
+        Build the project index from the chunks already stored in Mongo, unless it exists.
+        Indexing and file I/O run off the event loop.
+        """
+        data_chunk_model = await DataChunkModel.create_instance(db_client=db_client)
+        index = BM25Index()
+
+        batch = []
+        async for chunk in data_chunk_model.iter_chunks_by_project_id(project_id):
+            batch.append((str(chunk.id), chunk.chunk_text))
+            if len(batch) >= batch_size:
+                await asyncio.to_thread(index.add_documents, batch)
+                batch = []
+        if batch:
+            await asyncio.to_thread(index.add_documents, batch)
+
+        await asyncio.to_thread(self.save_built_index, project_id, index)
+
+    async def ensure_index(self, project_id: str, db_client: object):
+        """
+        Make sure the project index exists, backfilling it from Mongo the first time.
+        Concurrent callers in the process share one build.
+        """
+        if self.index_exists(project_id):
+            return
+        await self.index_builds.run(
+            "lexical_index_build", project_id,
+            lambda: self.build_from_chunks(project_id, db_client)
+        )
+
+    def search(self, project_id: str, query_text: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        with self.index_lock:
+            return self.refresh_index(project_id)["index"].search(query_text, top_k=top_k)
@@ -1,11 +1,42 @@
 from .BaseController import BaseController
 from .ProjectController import ProjectController
 from helpers.config import get_settings, Settings
+from helpers.metrics import track_ingest_stage
 from langchain_community.document_loaders import PyMuPDFLoader
 from langchain_community.document_loaders import TextLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from typing import Iterator, List
+import multiprocessing
+import logging
+import pymupdf
 import os
 
+logger = logging.getLogger(__name__)
+
+def extract_pdf_page_range(file_path: str, start_page: int, end_page: int) -> List[Document]:
+    """
+    Extract the text of pages [start_page, end_page) of a PDF.
+    Runs inside pool workers, so it lives at module level to be picklable.
+    """
+    pages = []
+    with pymupdf.open(file_path) as pdf:
+        total_pages = pdf.page_count
+        for page_number in range(start_page, min(end_page, total_pages)):
+            pages.append(Document(
+                page_content=pdf[page_number].get_text(),
+                metadata={
+                    "source": file_path,
+                    "file_path": file_path,
+                    "page": page_number,
+                    "total_pages": total_pages,
+                }
+            ))
+    return pages
+
 class ProcessFileController(BaseController):
     """
     Controller for processing files.
@@ -44,7 +75,116 @@ class ProcessFileController(BaseController):
         """
         Get the content of the file.
         """
-        return self.get_file_loader(file_name).load() if self.get_file_loader(file_name) else None
+        file_loader = self.get_file_loader(file_name)
+        return file_loader.load() if file_loader else None
+    
+    def get_pdf_page_count(self, file_path: str) -> int:
+        with pymupdf.open(file_path) as pdf:
+            return pdf.page_count
+    
+    def get_pdf_parallel_workers(self) -> int:
+        # every Celery child runs its own pool, together they should not oversubscribe the cores
+        return self.app_settings.PDF_PARALLEL_WORKERS or max(
+            1, (os.cpu_count() or 1) // max(1, self.app_settings.CELERY_WORKER_CONCURRENCY)
+        )
+    
+    def iter_pdf_pages_parallel(self, file_path: str, page_count: int) -> Iterator[Document]:
+        """
+        Fan page ranges out to a process pool and yield the pages back in page order.
+        Only a bounded window of ranges is in flight, so memory stays bounded as well.
+        """
+        pages_per_task = self.app_settings.PDF_PARALLEL_PAGES_PER_TASK
+        max_workers = self.get_pdf_parallel_workers()
+        page_ranges = deque(
+            (start, start + pages_per_task) for start in range(0, page_count, pages_per_task)
+        )
+        
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            in_flight = deque()
+            while page_ranges or in_flight:
+                while page_ranges and len(in_flight) < max_workers * 2:
+                    start, end = page_ranges.popleft()
+                    in_flight.append(executor.submit(extract_pdf_page_range, file_path, start, end))
+                
+                yield from in_flight.popleft().result()
+    
+    def iter_file_pages(self, file_name: str) -> Iterator[Document]:
+        """
+        Lazily yield the file pages, without loading the whole document in memory.
+        Large PDFs are extracted in parallel when PDF_PARALLEL_MIN_PAGES is reached.
+        """
+        file_path = os.path.join(self.project_path, file_name)
+        
+        if self.get_file_extension(file_name) == '.pdf' and self.app_settings.PDF_PARALLEL_MIN_PAGES > 0:
+            page_count = self.get_pdf_page_count(file_path)
+            
+            if page_count >= self.app_settings.PDF_PARALLEL_MIN_PAGES:
+                next_page = 0
+                try:
+                    for page in self.iter_pdf_pages_parallel(file_path, page_count):
+                        yield page
+                        next_page = page.metadata["page"] + 1
+                    return
+                except (AssertionError, BrokenProcessPool) as e:
+                    # e.g. a daemonic worker process that is not allowed to have children,
+                    # or a pool process that died; pages already yielded are not extracted again
+                    logger.warning(f"Parallel PDF extraction failed at page {next_page}, continuing sequentially: {e}")
+                
+                pages_per_task = self.app_settings.PDF_PARALLEL_PAGES_PER_TASK
+                for start in range(next_page, page_count, pages_per_task):
+                    yield from extract_pdf_page_range(file_path, start, start + pages_per_task)
+                return
+        
+        file_loader = self.get_file_loader(file_name)
+        if file_loader is None:
+            return
+        
+        yield from file_loader.lazy_load()
+    
+    def iter_file_chunks(self, project_id: str, file_name: str, chunk_size: int = 100, chunk_overlap: int = 20) -> Iterator[Document]:
+        """
+        Split the file page by page, yielding chunks as soon as their page is parsed.
+        """
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap
+        )
+        chunk_order = 0
+        pages = self.iter_file_pages(file_name)
+        
+        while True:
+            with track_ingest_stage("parse"):
+                page = next(pages, None)
+            if page is None:
+                return
+            
+            if page.page_content.strip() == '':
+                continue
+            
+            with track_ingest_stage("split"):
+                texts = text_splitter.split_text(page.page_content)
+            
+            for text in texts:
+                chunk_order += 1
+                yield Document(
+                    page_content=text,
+                    metadata={"src": page.metadata, "project_id": project_id, "chunk_order": chunk_order}
+                )
+    
+    def iter_chunk_batches(self, project_id: str, file_name: str, chunk_size: int = 100, chunk_overlap: int = 20,
+                           batch_size: int = 256) -> Iterator[List[Document]]:
+        """
+        Group the streamed chunks into lists of at most batch_size, so memory is bounded by the batch.
+        """
+        batch = []
+        for chunk in self.iter_file_chunks(project_id, file_name, chunk_size, chunk_overlap):
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
 
     def process_file_into_chunks(self, project_id: str, file_content: list, chunk_size: int = 100, chunk_overlap: int = 20):
         """
@@ -4,19 +4,35 @@ from qdrant_client.models import Distance, VectorParams
 from helpers.config import get_settings, Settings
 from stores.VectorDB.providers.QdrantProvider import VectorDBProviderInterface
 from stores.llms.providers.LLMProviderInterface import LLMInterface
+from helpers.async_utils import maybe_await
+from helpers.rank_fusion import reciprocal_rank_fusion
+from helpers.metrics import track_ingest_stage, track_query_stage, ANSWER_CACHE_LOOKUPS, RAG_CONTEXT_TOKENS, RAG_CONTEXT_CHUNKS
+from .LexicalIndexController import LexicalIndexController
+from models.DataChunkModel import DataChunkModel
+from models.ProjectModel import ProjectModel
+from stores.VectorDB.CollectionProfiles import CollectionProfile, get_collection_profile
+from stores.cache.AnswerCache import get_answer_cache
+from helpers.chunk_hashing import chunk_point_id
+from helpers.context_builder import get_token_counter, build_context
+from helpers.result_refinement import SearchRefinement, refine_results
 
+import asyncio
 import os
 from typing import List
 
 class VectorStoreController(BaseController):
 
-    def __init__(self, embedding_model: LLMInterface, generation_llm: LLMInterface, vector_db_client: VectorDBProviderInterface):
+    def __init__(self, embedding_model: LLMInterface, generation_llm: LLMInterface, vector_db_client: VectorDBProviderInterface,
+                 db_client: object = None):
         super().__init__()
         
         self.embedding_client = embedding_model
         self.vector_db_client = vector_db_client
         self.generation_llm = generation_llm
+        self.db_client = db_client
+        self.lexical_index = LexicalIndexController()
         self.settings = get_settings()
+        self.answer_cache = get_answer_cache() if self.settings.ANSWER_CACHE_ENABLED else None
         
         
     def embed_chunk(self, text: str, metadata: dict):
@@ -49,55 +65,497 @@ class VectorStoreController(BaseController):
         return embeddings
     
     
-    def search_similar_vectors(self, project_id: str, query_text: str, top_k: int=5):
-
-        if not self.vector_db_client.collection_exist(project_id):
-            raise ValueError(f"Collection for project_id {project_id} does not exist.")
+    async def get_collection_profile(self, project_id: str) -> CollectionProfile:
+        """
+        The project's own vector_profile when set, otherwise QDRANT_COLLECTION_PROFILE.
+        """
+        profile_name = None
+        if self.db_client is not None:
+            project_model = await ProjectModel.create_instance(db_client=self.db_client)
+            project = await project_model.get_project(project_id)
+            profile_name = project.vector_profile if project else None
+        
+        return get_collection_profile(profile_name or self.settings.QDRANT_COLLECTION_PROFILE, self.settings)
+    
+    
+    async def ensure_collection(self, project_id: str):
+        if not await maybe_await(self.vector_db_client.collection_exist(project_id)):
+            profile = await self.get_collection_profile(project_id)
+            await maybe_await(self.vector_db_client.create_collection(
+                collection_name=project_id,
+                vectors_config=profile.vectors_config(
+                    size=self.settings.EMBEDDING_SIZE, 
+                    distance=Distance.DOT
+                ),
+                profile=profile
+            ))
+    
+    
+    async def apply_collection_profile(self, project_id: str, profile_name: str):
+        """
+        Store profile_name on the project and migrate its existing collection to it.
+        """
+        profile = get_collection_profile(profile_name, self.settings)
+        
+        project_model = await ProjectModel.create_instance(db_client=self.db_client)
+        await project_model.update_vector_profile(project_id, profile_name)
+        
+        return await maybe_await(self.vector_db_client.apply_collection_profile(project_id, profile))
+    
+    
+    async def embed_and_index_chunks(self, chunks: List[dict], batch_size: int = None, wait: bool = None):
+        """
+        Embed chunks in batches and bulk upsert them into their project collections.
+        """
+        batch_size = batch_size or self.settings.EMBEDDING_BATCH_SIZE
+        wait = self.settings.VECTOR_DB_UPSERT_WAIT if wait is None else wait
+        chunks = [chunk for chunk in chunks if len(chunk['chunk_text']) > 0]
+        num_indexed = 0
+        indexed_projects = set()
+        
+        # the last upsert of each project waits, a write barrier for that project's earlier ones
+        last_batch_starts = {
+            chunk['chunk_metadata']['project_id']: i - i % batch_size
+            for i, chunk in enumerate(chunks)
+        }
+        
+        for i in range(0, len(chunks), batch_size):
+            batch = chunks[i:i+batch_size]
+            
+            with track_ingest_stage("embed"):
+                embeddings = await self.embedding_client.generate_embeddings_async(
+                    texts=[chunk['chunk_text'] for chunk in batch],
+                    document_type="document",
+                    batch_size=batch_size
+                )
+            
+            if not embeddings:
+                raise ValueError(f"Failed to generate embeddings for chunks batch starting at {i}")
+            
+            # a batch normally belongs to one project, but don't assume it
+            project_batches = {}
+            for chunk, embedding in zip(batch, embeddings):
+                project_batches.setdefault(chunk['chunk_metadata']['project_id'], []).append((chunk, embedding))
+            
+            for project_id, project_batch in project_batches.items():
+                await self.ensure_collection(project_id)
+                
+                with track_ingest_stage("vector_index"):
+                    operation_info = await maybe_await(self.vector_db_client.insert_many_vectors(
+                        collection_name=project_id,
+                        vectors=[embedding for _, embedding in project_batch],
+                        texts=[chunk['chunk_text'] for chunk, _ in project_batch],
+                        metadatas=[{**chunk['chunk_metadata'], "chunk_id": chunk.get('chunk_id')} for chunk, _ in project_batch],
+                        batch_size=self.settings.VECTOR_DB_UPSERT_BATCH_SIZE,
+                        wait=wait or last_batch_starts[project_id] == i,
+                        record_ids=[
+                            chunk_point_id(chunk['chunk_hash']) if chunk.get('chunk_hash') else None
+                            for chunk, _ in project_batch
+                        ]
+                    ))
+                
+                if operation_info is None:
+                    raise ValueError(f"Failed to index chunks for project_id {project_id}")
+                
+                num_indexed += len(project_batch)
+                indexed_projects.add(project_id)
+        
+        # answers cached before these chunks were searchable may now be incomplete
+        for project_id in indexed_projects:
+            await self.invalidate_answers(project_id)
+        
+        return num_indexed
+    
+    
+    async def delete_chunk_vectors(self, project_id: str, chunk_hashes: List[str]):
+        """
+        Delete the points of hashed chunks, their ids are derived from the hashes.
+        """
+        if not chunk_hashes or not await maybe_await(self.vector_db_client.collection_exist(project_id)):
+            return False
+        
+        deleted = await maybe_await(self.vector_db_client.delete_vectors(
+            collection_name=project_id,
+            vector_ids=[chunk_point_id(chunk_hash) for chunk_hash in chunk_hashes]
+        ))
+        
+        await self.invalidate_answers(project_id)
+        return deleted
+    
+    
+    async def get_ingest_generation(self, project_id: str) -> int:
+        if self.db_client is None:
+            return 0
+        project_model = await ProjectModel.create_instance(db_client=self.db_client)
+        return await project_model.get_ingest_generation(project_id)
+    
+    
+    async def invalidate_answers(self, project_id: str):
+        """
+        Bump the project's ingest generation, which drops its cached answers in every process.
+        """
+        if self.db_client is not None:
+            project_model = await ProjectModel.create_instance(db_client=self.db_client)
+            await project_model.bump_ingest_generation(project_id)
+        if self.answer_cache is not None:
+            self.answer_cache.invalidate_project(project_id)
+    
+    
+    def get_source_path(self, src: dict):
+        # PDF pages carry file_path, text loaders only set source
+        return src.get('file_path', src.get('source'))
+    
+    
+    def resolve_search_mode(self, mode: str = None) -> str:
+        mode = mode or self.settings.RETRIEVAL_DEFAULT_MODE
+        if mode not in ("dense", "lexical", "hybrid"):
+            raise ValueError(f"Unknown search mode: {mode}")
+        return mode
+    
+    
+    def resolve_search_refinement(self, mmr: bool = None, mmr_lambda: float = None, min_score: float = None,
+                                  max_per_source: int = None) -> SearchRefinement:
+        """
+        Request values override the SEARCH_* settings, invalid values raise a pydantic ValidationError.
+        """
+        return SearchRefinement(
+            mmr=self.settings.SEARCH_MMR_ENABLED if mmr is None else mmr,
+            mmr_lambda=self.settings.SEARCH_MMR_LAMBDA if mmr_lambda is None else mmr_lambda,
+            min_score=self.settings.SEARCH_MIN_SCORE if min_score is None else min_score,
+            max_per_source=self.settings.SEARCH_MAX_PER_SOURCE if max_per_source is None else max_per_source
+        )
+    
+    
+    async def search_similar_vectors(self, project_id: str, query_text: str, top_k: int=5, mode: str=None,
+                                     query_embedding: List[float] = None, refinement: SearchRefinement = None):
+        """
+        Retrieve chunks with dense (vector), lexical (BM25) or hybrid (both, fused with RRF) search.
+        With an active refinement, more candidates are fetched and refine_results picks the top_k.
+        """
+        mode = self.resolve_search_mode(mode)
+        refinement = refinement or self.resolve_search_refinement()
+        num_results = refinement.num_candidates(top_k, self.settings.SEARCH_REFINE_CANDIDATES_MULTIPLIER)
+        
+        with track_query_stage("retrieve", mode):
+            if mode == "dense":
+                results = await self.dense_search(project_id, query_text, num_results, query_embedding,
+                                                  with_vectors=refinement.mmr)
+            
+            if mode == "lexical":
+                results = await self.lexical_search(project_id, query_text, num_results)
+            
+            if mode == "hybrid":
+                num_candidates = num_results * self.settings.HYBRID_CANDIDATES_MULTIPLIER
+                dense_results, lexical_results = await asyncio.gather(
+                    self.dense_search(project_id, query_text, num_candidates, query_embedding,
+                                      with_vectors=refinement.mmr),
+                    self.lexical_search(project_id, query_text, num_candidates)
+                )
+                results = reciprocal_rank_fusion(
+                    [dense_results, lexical_results],
+                    top_k=num_results,
+                    k=self.settings.HYBRID_RRF_K
+                )
+        
+        if not refinement.is_active():
+            return results
+        
+        with track_query_stage("refine", mode):
+            return refine_results(results, top_k, refinement)
+    
+    
+    async def lexical_search(self, project_id: str, query_text: str, top_k: int=5):
+        if self.db_client is None:
+            raise ValueError("Lexical search needs a database client.")
         
-        query_embedding = self.embedding_client.generate_embedding(
-            text=query_text,
-            document_type="query"
+        # projects ingested before the lexical index existed are indexed on first use
+        await self.lexical_index.ensure_index(project_id, self.db_client)
+        
+        hits = await asyncio.to_thread(self.lexical_index.search, project_id, query_text, top_k)
+        if not hits:
+            return []
+        
+        data_chunk_model = await DataChunkModel.create_instance(db_client=self.db_client)
+        chunks = await data_chunk_model.get_chunks_by_ids([chunk_id for chunk_id, _ in hits])
+        chunks_by_id = {str(chunk.id): chunk for chunk in chunks}
+        
+        return [
+            {
+                "score": score,
+                "original_text": chunks_by_id[chunk_id].chunk_text,
+                "src_file_path": self.get_source_path(chunks_by_id[chunk_id].chunk_metadata.get('src', {})),
+                "chunk_id": chunk_id
+            }
+            for chunk_id, score in hits
+            if chunk_id in chunks_by_id
+        ]
+    
+    
+    async def dense_search(self, project_id: str, query_text: str, top_k: int=5, query_embedding: List[float] = None,
+                           with_vectors: bool = False):
+
+        # the existence check, profile lookup and query embedding don't depend on each other
+        collection_exists, profile, query_embedding = await asyncio.gather(
+            maybe_await(self.vector_db_client.collection_exist(project_id)),
+            self.get_collection_profile(project_id),
+            maybe_await(query_embedding) if query_embedding is not None else self.embedding_client.generate_embedding_async(
+                text=query_text,
+                document_type="query"
+            )
         )
         
+        if not collection_exists:
+            raise ValueError(f"Collection for project_id {project_id} does not exist.")
+        
         if not query_embedding:
             raise ValueError(f"Failed to generate embedding for query_text: {query_text}")
 
-        results = self.vector_db_client.search(
+        results = await maybe_await(self.vector_db_client.search(
             collection_name=project_id,
             query_vector=query_embedding,
-            top_k=top_k
-        )
+            top_k=top_k,
+            search_params=profile.search_params(),
+            with_vectors=with_vectors
+        ))
         
+        return self.format_dense_results(results)
+    
+    
+    def format_dense_results(self, results: List[dict]) -> List[dict]:
         return [
             {
                 "score": res['score'],
                 "original_text": res['payload'].get('original_text', ''),
-                "src_file_path": res['payload']['src']['file_path']
+                "src_file_path": self.get_source_path(res['payload']['src']),
+                "chunk_id": res['payload'].get('chunk_id'),
+                # only present when requested, for refine_results
+                **({"vector": res['vector']} if res.get('vector') is not None else {})
             }
             for res in results
         ]
+    
+    
+    async def search_similar_vectors_batch(self, project_id: str, query_texts: List[str], top_ks: List[int],
+                                           mode: str = None, refinement: SearchRefinement = None) -> List[List[dict]]:
+        """
+        Batched search_similar_vectors: one embedding request and one vector DB round trip for all queries.
+        Results are returned in query order.
+        """
+        mode = self.resolve_search_mode(mode)
+        refinement = refinement or self.resolve_search_refinement()
+        nums_results = [
+            refinement.num_candidates(top_k, self.settings.SEARCH_REFINE_CANDIDATES_MULTIPLIER) for top_k in top_ks
+        ]
+        
+        with track_query_stage("retrieve_batch", mode):
+            if mode == "dense":
+                batch_results = await self.dense_search_batch(project_id, query_texts, nums_results,
+                                                              with_vectors=refinement.mmr)
+            
+            if mode == "lexical":
+                batch_results = list(await asyncio.gather(*[
+                    self.lexical_search(project_id, query_text, num_results)
+                    for query_text, num_results in zip(query_texts, nums_results)
+                ]))
+            
+            if mode == "hybrid":
+                candidates = [num_results * self.settings.HYBRID_CANDIDATES_MULTIPLIER for num_results in nums_results]
+                dense_results, *lexical_results = await asyncio.gather(
+                    self.dense_search_batch(project_id, query_texts, candidates, with_vectors=refinement.mmr),
+                    *[
+                        self.lexical_search(project_id, query_text, num_candidates)
+                        for query_text, num_candidates in zip(query_texts, candidates)
+                    ]
+                )
+                batch_results = [
+                    reciprocal_rank_fusion([dense, lexical], top_k=num_results, k=self.settings.HYBRID_RRF_K)
+                    for dense, lexical, num_results in zip(dense_results, lexical_results, nums_results)
+                ]
+        
+        if not refinement.is_active():
+            return batch_results
+        
+        with track_query_stage("refine_batch", mode):
+            return [refine_results(results, top_k, refinement) for results, top_k in zip(batch_results, top_ks)]
+    
+    
+    async def dense_search_batch(self, project_id: str, query_texts: List[str], top_ks: List[int],
+                                 with_vectors: bool = False) -> List[List[dict]]:
+        
+        collection_exists, profile, query_embeddings = await asyncio.gather(
+            maybe_await(self.vector_db_client.collection_exist(project_id)),
+            self.get_collection_profile(project_id),
+            self.embedding_client.generate_embeddings_async(
+                texts=query_texts,
+                document_type="query"
+            )
+        )
+        
+        if not collection_exists:
+            raise ValueError(f"Collection for project_id {project_id} does not exist.")
+        
+        if not query_embeddings or len(query_embeddings) != len(query_texts):
+            raise ValueError("Failed to generate embeddings for the batch of queries.")
+        
+        batch_results = await maybe_await(self.vector_db_client.search_batch(
+            collection_name=project_id,
+            query_vectors=query_embeddings,
+            top_ks=top_ks,
+            search_params=profile.search_params(),
+            with_vectors=with_vectors
+        ))
+        
+        return [self.format_dense_results(results) for results in batch_results]
+
+
+    def get_context_token_budget(self) -> int:
+        model_id = self.settings.GENERATION_MODEL_ID
+        return self.settings.GENERATION_CONTEXT_TOKEN_BUDGETS.get(model_id, self.settings.GENERATION_CONTEXT_TOKEN_BUDGET)
 
 
-    def answer_with_rag(self, query: str, project_id: str, chat_history: List[dict] = [], top_k: int = 5):
+    def build_rag_prompt(self, query: str, search_results: List[dict], chat_history: List[dict] = []):
+        """
+        Return the prompt and chat history to generate with. The retrieved context goes in a
+        system message right before the question, filled up to the model's token budget, so
+        the question is never cut off by the provider's input limit.
+        """
+        counter = get_token_counter(self.settings.GENERATION_MODEL_ID)
+        prompt = f"Question: {query}\nAnswer:"
+        context_header = "Use the following context to answer the question:\n"
+        
+        used_tokens = counter.count(prompt) + counter.count(context_header) + sum(
+            counter.count(message.get("content") or "") for message in chat_history
+        )
+        context, used_results = build_context(search_results, self.get_context_token_budget() - used_tokens, counter)
+        RAG_CONTEXT_TOKENS.observe(counter.count(context))
+        RAG_CONTEXT_CHUNKS.observe(len(used_results))
+        
+        if not context:
+            return prompt, chat_history
+        return prompt, chat_history + [{"role": "system", "content": context_header + context}]
+
+
+    async def lookup_cached_answer(self, project_id: str, query: str, top_k: int, mode: str, chat_history: List[dict],
+                                   refinement: SearchRefinement):
+        """
+        Look the query up in the answer cache. Returns the cached entry (or None) and the
+        context needed to store a fresh answer, which also carries the query embedding for reuse.
+        Lexical answers are matched on the normalized query text, so they never need the embedding model.
+        """
+        # answers that depend on a conversation are not reusable
+        if self.answer_cache is None or chat_history:
+            return None, None
+        
+        cache_key = (project_id, mode, top_k, refinement.cache_key())
+        
+        if mode == "lexical":
+            generation = await self.get_ingest_generation(project_id)
+            query_text = " ".join(query.split())
+            cached = self.answer_cache.lookup_text(cache_key, generation, query_text)
+            ANSWER_CACHE_LOOKUPS.labels(result="hit" if cached else "miss").inc()
+            return cached, (cache_key, generation, None, query_text)
         
-        search_results = self.search_similar_vectors(
+        generation, query_embedding = await asyncio.gather(
+            self.get_ingest_generation(project_id),
+            self.embedding_client.generate_embedding_async(text=query, document_type="query")
+        )
+        if not query_embedding:
+            return None, None
+        
+        cached = self.answer_cache.lookup(cache_key, generation, query_embedding)
+        ANSWER_CACHE_LOOKUPS.labels(result="hit" if cached else "miss").inc()
+        
+        return cached, (cache_key, generation, query_embedding, None)
+    
+    
+    def store_cached_answer(self, cache_context: tuple, answer: str, sources: List[dict]):
+        cache_key, generation, query_embedding, query_text = cache_context
+        if query_text is not None:
+            self.answer_cache.store_text(cache_key, generation, query_text, answer, sources)
+        else:
+            self.answer_cache.store(cache_key, generation, query_embedding, answer, sources)
+
+
+    async def answer_with_rag(self, query: str, project_id: str, chat_history: List[dict] = [], top_k: int = 5,
+                              mode: str = None, refinement: SearchRefinement = None):
+        
+        mode = self.resolve_search_mode(mode)
+        refinement = refinement or self.resolve_search_refinement()
+        cached, cache_context = await self.lookup_cached_answer(project_id, query, top_k, mode, chat_history, refinement)
+        if cached:
+            return {"answer": cached["answer"], "sources": cached["sources"], "cached": True}
+        
+        search_results = await self.search_similar_vectors(
+            project_id=project_id,
+            query_text=query,
+            top_k=top_k,
+            mode=mode,
+            query_embedding=cache_context[2] if cache_context else None,
+            refinement=refinement
+        )
+        
+        if not search_results or len(search_results) == 0:
+            raise ValueError("No relevant documents found for the query.")
+        
+        prompt, generation_history = self.build_rag_prompt(query, search_results, chat_history)
+        
+        with track_query_stage("generate", mode):
+            answer = await self.generation_llm.generate_text_async(
+                prompt=prompt,
+                chat_history=generation_history,
+                max_output_tokens=self.settings.DEFAULT_GENERATION_MAX_OUTPUT_TOKENS,
+                temperature=self.settings.DEFAULT_GENERATION_TEMPERATURE
+            )
+        
+        if answer and cache_context:
+            self.store_cached_answer(cache_context, answer, search_results)
+
+        return {"answer": answer, "sources": search_results, "cached": False}
+
+
+    async def stream_answer_with_rag(self, query: str, project_id: str, chat_history: List[dict] = [], top_k: int = 5,
+                                     mode: str = None, refinement: SearchRefinement = None):
+        """
+        Async generator of (event, data) pairs: the sources first, then the answer tokens as they are generated.
+        A cached answer is sent as a single token.
+        """
+        mode = self.resolve_search_mode(mode)
+        refinement = refinement or self.resolve_search_refinement()
+        cached, cache_context = await self.lookup_cached_answer(project_id, query, top_k, mode, chat_history, refinement)
+        if cached:
+            yield "sources", cached["sources"]
+            yield "token", cached["answer"]
+            yield "done", {"cached": True}
+            return
+        
+        search_results = await self.search_similar_vectors(
             project_id=project_id,
             query_text=query,
-            top_k=top_k
+            top_k=top_k,
+            mode=mode,
+            query_embedding=cache_context[2] if cache_context else None,
+            refinement=refinement
         )
         
         if not search_results or len(search_results) == 0:
             raise ValueError("No relevant documents found for the query.")
         
-        context = "\n".join([f"### Content: {hit.get('original_text', '')}" for hit in search_results])
+        yield "sources", search_results
         
-        prompt = f"Use the following context to answer the question:\nContext: {context}\nQuestion: {query}\nAnswer:"
+        prompt, generation_history = self.build_rag_prompt(query, search_results, chat_history)
+        tokens = []
         
-        answer = self.generation_llm.generate_text(
+        async for token in self.generation_llm.stream_text(
             prompt=prompt,
-            chat_history=chat_history,
+            chat_history=generation_history,
             max_output_tokens=self.settings.DEFAULT_GENERATION_MAX_OUTPUT_TOKENS,
             temperature=self.settings.DEFAULT_GENERATION_TEMPERATURE
-        )
-
-        return {"answer": answer, "sources": search_results}
\ No newline at end of file
+        ):
+            tokens.append(token)
+            yield "token", token
+        
+        # only complete answers are cached, an interrupted stream never gets here
+        if tokens and cache_context:
+            self.store_cached_answer(cache_context, "".join(tokens), search_results)
+        
+        yield "done", {"cached": False}
\ No newline at end of file
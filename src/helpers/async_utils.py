@@ -0,0 +1,9 @@
+import inspect
+
+async def maybe_await(value):
+    """
+    Await value if it is awaitable, so callers can use sync and async providers alike.
+    """
+    if inspect.isawaitable(value):
+        return await value
+    return value
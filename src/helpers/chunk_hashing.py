@@ -0,0 +1,33 @@
+import hashlib
+import uuid
+
+# fixed namespace, changing it would change every point id
+CHUNK_POINT_NAMESPACE = uuid.UUID("6f1c8c4e-2b0a-4b7e-9a51-3d6f0e2c8b17")
+
+
+def chunk_point_id(chunk_hash: str) -> str:
+    """
+    Deterministic vector DB point id for a chunk, so re-indexing a chunk overwrites its point.
+    """
+    return str(uuid.uuid5(CHUNK_POINT_NAMESPACE, chunk_hash))
+
+
+class ChunkHasher:
+    """
+    Stable content hashes for the chunks of one document.
+    Repeated texts are numbered by occurrence, so identical chunks still get distinct hashes
+    while edits elsewhere in the document leave them unchanged.
+    """
+
+    def __init__(self, project_id: str, document_name: str):
+        self.project_id = project_id
+        self.document_name = document_name
+        self.occurrences = {}
+
+    def hash(self, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        occurrence = self.occurrences.get(text_hash, 0)
+        self.occurrences[text_hash] = occurrence + 1
+
+        key = f"{self.project_id}\0{self.document_name}\0{occurrence}\0{text_hash}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -8,6 +8,15 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE_MB: int
     FILE_DEFAULT_CHUNK_SIZE: int
     FILE_DEFAULT_OVERLAP_SIZE: int
+    INGEST_BATCH_SIZE: int = 256
+    EMBED_TASK_BATCH_SIZE: int = 64
+    CHUNK_DEDUP_ENABLED: bool = True
+    CHUNK_DEDUP_THRESHOLD: float = 0.9
+    CHUNK_DEDUP_NUM_PERM: int = 128
+    CHUNK_DEDUP_SHINGLE_SIZE: int = 3
+    PDF_PARALLEL_MIN_PAGES: int = 200
+    PDF_PARALLEL_WORKERS: int = 0
+    PDF_PARALLEL_PAGES_PER_TASK: int = 50
     MONGO_URL: str
     MONGODB_NAME: str
     OPENAI_API_KEY: str
@@ -22,6 +31,29 @@ class Settings(BaseSettings):
     DEFAULT_INPUT_MAX_CHARACTERS: int = 1000
     DEFAULT_GENERATION_MAX_OUTPUT_TOKENS: int = 1000
     DEFAULT_GENERATION_TEMPERATURE: float = 0.1
+    GENERATION_CONTEXT_TOKEN_BUDGET: int = 3000
+    GENERATION_CONTEXT_TOKEN_BUDGETS: dict[str, int] = {}
+    EMBEDDING_BATCH_SIZE: int = 64
+    
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_TIMEOUT: float = 120.0
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0
+    
+    CACHE_REDIS_URL: Optional[str] = None
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 10000
+    EMBEDDING_CACHE_REDIS_TTL: int = 604800
+    EMBEDDING_MICROBATCH_ENABLED: bool = True
+    EMBEDDING_MICROBATCH_MAX_WAIT_MS: float = 5.0
+    EMBEDDING_MICROBATCH_MAX_ITEMS: int = 64
+    METADATA_CACHE_TTL_SECONDS: float = 60.0
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: float = 3600.0
+    ANSWER_CACHE_MAX_ENTRIES_PER_PROJECT: int = 1000
+    METRICS_ENABLED: bool = True
+    CELERY_METRICS_PORT: int = 9200
     
     CELERY_BROKER_URL: str
     CELERY_RESULT_BACKEND: str
@@ -32,6 +64,29 @@ class Settings(BaseSettings):
     CELERY_FLOWER_PASSWORD: str
     QDRANT_HOST: str
     QDRANT_PORT: int
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_PREFER_GRPC: bool = False
+    VECTOR_DB_PROVIDER: str = "QDRANT"
+    QDRANT_COLLECTION_PROFILE: str = "default"
+    QDRANT_HNSW_M: Optional[int] = None
+    QDRANT_HNSW_EF_CONSTRUCT: Optional[int] = None
+    QDRANT_SEARCH_OVERSAMPLING: Optional[float] = None
+    QDRANT_SEARCH_RESCORE: Optional[bool] = None
+    VECTOR_DB_LAYOUT: str = "per_project"
+    QDRANT_SHARED_COLLECTION_NAME: str = "minirag_shared"
+    
+    RETRIEVAL_DEFAULT_MODE: str = "dense"
+    HYBRID_CANDIDATES_MULTIPLIER: int = 4
+    HYBRID_RRF_K: int = 60
+    QUERY_BATCH_MAX_SIZE: int = 256
+    REQUEST_COALESCING_ENABLED: bool = True
+    SEARCH_MMR_ENABLED: bool = False
+    SEARCH_MMR_LAMBDA: float = 0.5
+    SEARCH_MIN_SCORE: Optional[float] = None
+    SEARCH_MAX_PER_SOURCE: Optional[int] = None
+    SEARCH_REFINE_CANDIDATES_MULTIPLIER: int = 4
+    VECTOR_DB_UPSERT_BATCH_SIZE: int = 256
+    VECTOR_DB_UPSERT_WAIT: bool = False
 
     class Config(SettingsConfigDict):
         env_file = ".env"
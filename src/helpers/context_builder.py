@@ -0,0 +1,128 @@
+from functools import lru_cache
+from typing import List, Tuple
+import logging
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# chars per token used when no tokenizer is available, on the safe side for English text
+FALLBACK_CHARS_PER_TOKEN = 3
+# shortest shared text treated as chunk overlap rather than a coincidence
+MIN_OVERLAP_CHARACTERS = 20
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken. Models without a tiktoken encoding (Ollama models) use
+    cl100k_base, which is close enough for budgeting; without tiktoken, or when its encoding
+    can't be loaded, characters are divided instead.
+    """
+
+    def __init__(self, model_id: str = None):
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                try:
+                    self.encoding = tiktoken.encoding_for_model(model_id or "")
+                except KeyError:
+                    self.encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                # the encoding files are downloaded on first use, which fails offline
+                logger.warning(f"Could not load a tiktoken encoding, estimating tokens from characters: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self.encoding is None:
+            return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+        return len(self.encoding.encode_ordinary(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is None:
+            return text[:max_tokens * FALLBACK_CHARS_PER_TOKEN]
+        tokens = self.encoding.encode_ordinary(text)
+        return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+
+
+@lru_cache(maxsize=None)
+def get_token_counter(model_id: str = None) -> TokenCounter:
+    return TokenCounter(model_id)
+
+
+def strip_overlap(text: str, previous: str, min_overlap: int = MIN_OVERLAP_CHARACTERS) -> str:
+    """
+    Remove the part of text already present in previous: its start when previous ends with it,
+    its end when previous starts with it. Returns "" when text is contained in previous.
+    """
+    if text in previous:
+        return ""
+    if len(text) < min_overlap or len(previous) < min_overlap:
+        return text
+
+    # text continues previous: the longest suffix of previous that starts text
+    start = 0
+    position = previous.find(text[:min_overlap])
+    while position != -1:
+        if text.startswith(previous[position:]):
+            start = len(previous) - position
+            break
+        position = previous.find(text[:min_overlap], position + 1)
+
+    # text precedes previous: the longest suffix of text that starts previous
+    end = len(text)
+    position = text.find(previous[:min_overlap], start)
+    while position != -1:
+        if previous.startswith(text[position:]):
+            end = position
+            break
+        position = text.find(previous[:min_overlap], position + 1)
+
+    return text[start:end]
+
+
+def build_context(search_results: List[dict], token_budget: int, counter: TokenCounter,
+                  entry_template: str = "### Content: {text}\n") -> Tuple[str, List[dict]]:
+    """
+    Fill token_budget with search results in relevance order. Text shared with an already
+    included chunk of the same source (the splitter's overlap) is dropped, results that don't
+    fit are skipped so smaller ones further down can still be used.
+    Returns the context and the results it includes.
+    """
+    entries = []
+    used = []
+    included_by_source = {}
+    remaining = token_budget
+
+    for result in search_results:
+        text = (result.get("original_text") or "").strip()
+        previous_texts = included_by_source.setdefault(result.get("src_file_path"), [])
+        for previous in previous_texts:
+            text = strip_overlap(text, previous).strip()
+            if not text:
+                break
+        if not text:
+            continue
+
+        entry = entry_template.format(text=text)
+        entry_tokens = counter.count(entry)
+        if entry_tokens > remaining:
+            if entries:
+                continue
+            # the best result alone is over budget, a truncated copy beats no context
+            entry = counter.truncate(entry, remaining)
+            entry_tokens = counter.count(entry)
+            if not entry:
+                break
+
+        entries.append(entry)
+        used.append(result)
+        previous_texts.append(text)
+        remaining -= entry_tokens
+
+    return "".join(entries), used
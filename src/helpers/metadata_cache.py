@@ -0,0 +1,68 @@
+from helpers.config import get_settings
+from typing import Optional
+import threading
+import time
+
+class MetadataCache:
+    """
+    Small in-process TTL cache for backend metadata (collection existence, project documents).
+    Writers invalidate explicitly on create/delete, the TTL bounds staleness across processes.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return default
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                return default
+
+            return value
+
+    def set(self, key: str, value, ttl: Optional[float] = None):
+        """
+        Store value for ttl seconds (the cache default when None, float('inf') to never expire).
+        """
+        ttl = self.ttl_seconds if ttl is None else ttl
+        with self.lock:
+            if len(self.entries) >= self.max_entries and key not in self.entries:
+                self.evict_expired()
+                if len(self.entries) >= self.max_entries:
+                    self.entries.pop(next(iter(self.entries)))
+            self.entries[key] = (value, time.monotonic() + ttl)
+
+    def invalidate(self, key: str):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str):
+        with self.lock:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def evict_expired(self):
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at) in self.entries.items() if expires_at < now]:
+            del self.entries[key]
+
+
+metadata_cache = None
+
+def get_metadata_cache() -> MetadataCache:
+    global metadata_cache
+    if metadata_cache is None:
+        metadata_cache = MetadataCache(ttl_seconds=get_settings().METADATA_CACHE_TTL_SECONDS)
+    return metadata_cache
@@ -0,0 +1,178 @@
+from prometheus_client import Counter, Histogram
+from typing import Optional
+import asyncio
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LLM_LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TASK_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# LLM providers
+LLM_REQUEST_DURATION = Histogram(
+    "minirag_llm_request_duration_seconds", "LLM provider request latency",
+    ["provider", "operation", "model"], buckets=LLM_LATENCY_BUCKETS
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "minirag_llm_time_to_first_token_seconds", "Delay before the first streamed token",
+    ["provider", "model"], buckets=LLM_LATENCY_BUCKETS
+)
+LLM_REQUEST_ERRORS = Counter(
+    "minirag_llm_request_errors_total", "LLM provider requests that failed",
+    ["provider", "operation", "model"]
+)
+LLM_INPUT_CHARACTERS = Counter(
+    "minirag_llm_input_characters_total", "Characters sent to LLM providers",
+    ["provider", "operation", "model"]
+)
+LLM_OUTPUT_CHARACTERS = Counter(
+    "minirag_llm_output_characters_total", "Characters generated by LLM providers",
+    ["provider", "operation", "model"]
+)
+LLM_INPUT_TOKENS = Counter(
+    "minirag_llm_input_tokens_total", "Prompt tokens reported by LLM providers",
+    ["provider", "operation", "model"]
+)
+LLM_OUTPUT_TOKENS = Counter(
+    "minirag_llm_output_tokens_total", "Completion tokens reported by LLM providers",
+    ["provider", "operation", "model"]
+)
+LLM_EMBEDDED_TEXTS = Counter(
+    "minirag_llm_embedded_texts_total", "Texts embedded by LLM providers",
+    ["provider", "model"]
+)
+EMBEDDING_MICROBATCH_SIZE = Histogram(
+    "minirag_embedding_microbatch_texts", "Texts per micro-batched embedding request",
+    buckets=SIZE_BUCKETS
+)
+EMBEDDING_MICROBATCH_REQUESTS = Histogram(
+    "minirag_embedding_microbatch_requests", "Caller requests merged into one micro-batch",
+    buckets=SIZE_BUCKETS
+)
+EMBEDDING_MICROBATCH_WAIT = Histogram(
+    "minirag_embedding_microbatch_wait_seconds", "Time a request waited for its micro-batch to be sent",
+    buckets=LATENCY_BUCKETS
+)
+
+# storage
+VECTOR_DB_DURATION = Histogram(
+    "minirag_vector_db_duration_seconds", "Vector DB call latency",
+    ["provider", "operation"], buckets=LATENCY_BUCKETS
+)
+VECTOR_DB_POINTS = Counter(
+    "minirag_vector_db_points_total", "Points written to or returned by the vector DB",
+    ["provider", "operation"]
+)
+MONGO_BULK_WRITE_DURATION = Histogram(
+    "minirag_mongo_bulk_write_duration_seconds", "Mongo bulk_write latency",
+    ["collection"], buckets=LATENCY_BUCKETS
+)
+MONGO_BULK_WRITE_SIZE = Histogram(
+    "minirag_mongo_bulk_write_operations", "Operations per Mongo bulk_write",
+    ["collection"], buckets=SIZE_BUCKETS
+)
+
+# pipeline stages
+INGEST_STAGE_DURATION = Histogram(
+    "minirag_ingest_stage_duration_seconds", "Time spent per ingestion stage",
+    ["stage"], buckets=LATENCY_BUCKETS
+)
+INGEST_DEDUP_CHUNKS = Counter(
+    "minirag_ingest_dedup_chunks_total", "Chunks kept or dropped as near-duplicates at ingestion",
+    ["result"]
+)
+QUERY_STAGE_DURATION = Histogram(
+    "minirag_query_stage_duration_seconds", "Time spent per query stage",
+    ["stage", "mode"], buckets=LLM_LATENCY_BUCKETS
+)
+RAG_CONTEXT_TOKENS = Histogram(
+    "minirag_rag_context_tokens", "Tokens of retrieved context put in a generation prompt",
+    buckets=SIZE_BUCKETS
+)
+RAG_CONTEXT_CHUNKS = Histogram(
+    "minirag_rag_context_chunks", "Retrieved chunks that fit in a generation prompt",
+    buckets=SIZE_BUCKETS
+)
+
+ANSWER_CACHE_LOOKUPS = Counter(
+    "minirag_answer_cache_lookups_total", "Semantic answer cache lookups",
+    ["result"]
+)
+SINGLE_FLIGHT_REQUESTS = Counter(
+    "minirag_single_flight_requests_total", "Query requests that ran (leader) or joined an identical in-flight one (coalesced)",
+    ["operation", "result"]
+)
+
+# celery
+CELERY_TASK_DURATION = Histogram(
+    "minirag_celery_task_duration_seconds", "Celery task run time",
+    ["task", "state"], buckets=TASK_LATENCY_BUCKETS
+)
+CELERY_QUEUE_WAIT = Histogram(
+    "minirag_celery_queue_wait_seconds", "Time between publishing a task and a worker starting it",
+    ["task", "queue"], buckets=TASK_LATENCY_BUCKETS
+)
+
+
+class LLMCallTracker:
+    """
+    Context manager timing one provider request and counting its errors and characters in.
+    Output sizes and token usage are added with record_output once the response is parsed.
+    """
+
+    def __init__(self, provider: str, operation: str, model: Optional[str], input_chars: int = 0):
+        self.labels = {"provider": provider, "operation": operation, "model": model or ""}
+        self.input_chars = input_chars
+        self.started_at = None
+        self.first_token_seen = False
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        LLM_INPUT_CHARACTERS.labels(**self.labels).inc(self.input_chars)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        LLM_REQUEST_DURATION.labels(**self.labels).observe(time.perf_counter() - self.started_at)
+        # a stream closed or cancelled by its consumer (client disconnect) is not a provider error
+        if exc_type is not None and not issubclass(exc_type, (GeneratorExit, asyncio.CancelledError)):
+            self.record_error()
+        return False
+
+    def record_error(self):
+        LLM_REQUEST_ERRORS.labels(**self.labels).inc()
+
+    def record_first_token(self):
+        if not self.first_token_seen:
+            self.first_token_seen = True
+            LLM_TIME_TO_FIRST_TOKEN.labels(provider=self.labels["provider"], model=self.labels["model"]).observe(
+                time.perf_counter() - self.started_at
+            )
+
+    def record_output(self, output_chars: int = 0, input_tokens: Optional[int] = None,
+                      output_tokens: Optional[int] = None, embedded_texts: int = 0):
+        if output_chars:
+            LLM_OUTPUT_CHARACTERS.labels(**self.labels).inc(output_chars)
+        if input_tokens:
+            LLM_INPUT_TOKENS.labels(**self.labels).inc(input_tokens)
+        if output_tokens:
+            LLM_OUTPUT_TOKENS.labels(**self.labels).inc(output_tokens)
+        if embedded_texts:
+            LLM_EMBEDDED_TEXTS.labels(provider=self.labels["provider"], model=self.labels["model"]).inc(embedded_texts)
+
+
+def track_llm_call(provider: str, operation: str, model: Optional[str], input_chars: int = 0) -> LLMCallTracker:
+    return LLMCallTracker(provider, operation, model, input_chars)
+
+
+def track_vector_db_call(provider: str, operation: str, points: int = 0):
+    if points:
+        VECTOR_DB_POINTS.labels(provider=provider, operation=operation).inc(points)
+    return VECTOR_DB_DURATION.labels(provider=provider, operation=operation).time()
+
+
+def track_ingest_stage(stage: str):
+    return INGEST_STAGE_DURATION.labels(stage=stage).time()
+
+
+def track_query_stage(stage: str, mode: str = ""):
+    return QUERY_STAGE_DURATION.labels(stage=stage, mode=mode or "").time()
@@ -0,0 +1,16 @@
+from typing import List
+
+def reciprocal_rank_fusion(result_lists: List[List[dict]], top_k: int = 5, k: int = 60) -> List[dict]:
+    """
+    Merge ranked result lists with reciprocal-rank fusion: score = sum(1 / (k + rank)).
+    Results are matched by chunk_id, falling back to their text when no id is stored.
+    """
+    fused = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = result.get("chunk_id") or result.get("original_text")
+            if key not in fused:
+                fused[key] = {**result, "score": 0.0}
+            fused[key]["score"] += 1.0 / (k + rank)
+
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:top_k]
@@ -0,0 +1,84 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import numpy as np
+
+class SearchRefinement(BaseModel):
+    """
+    Post-processing of retrieved candidates: a minimum score, maximal marginal relevance
+    re-selection and a cap on results per source file.
+    """
+    mmr: bool = False
+    mmr_lambda: float = Field(0.5, ge=0.0, le=1.0)
+    min_score: Optional[float] = None
+    max_per_source: Optional[int] = Field(None, ge=1)
+
+    def is_active(self) -> bool:
+        return self.mmr or self.min_score is not None or self.max_per_source is not None
+
+    def num_candidates(self, top_k: int, multiplier: int) -> int:
+        # refining needs more candidates than it returns, otherwise there is nothing to choose from
+        return top_k * multiplier if self.is_active() else top_k
+
+    def cache_key(self) -> tuple:
+        return (self.mmr, self.mmr_lambda if self.mmr else None, self.min_score, self.max_per_source)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def refine_results(results: List[dict], top_k: int, refinement: SearchRefinement) -> List[dict]:
+    """
+    Select up to top_k of the candidates (best first) according to refinement.
+    MMR trades the candidate's relevance (its score, min-max scaled) against its highest cosine
+    similarity to an already selected candidate; candidates without a vector (lexical hits)
+    are treated as unlike every other. Vectors are removed from the returned results.
+    """
+    if refinement.min_score is not None:
+        results = [result for result in results if result["score"] >= refinement.min_score]
+
+    if not results or top_k <= 0:
+        return []
+
+    scores = np.array([result["score"] for result in results], dtype=np.float64)
+    score_range = scores.max() - scores.min()
+    relevance = (scores - scores.min()) / score_range if score_range > 0 else np.ones_like(scores)
+
+    similarity = None
+    if refinement.mmr:
+        size = next((len(result["vector"]) for result in results if result.get("vector") is not None), 0)
+        if size:
+            vectors = normalize_rows(np.array([
+                result["vector"] if result.get("vector") is not None else np.zeros(size)
+                for result in results
+            ], dtype=np.float32))
+            similarity = vectors @ vectors.T
+
+    _, source_ids = np.unique([str(result.get("src_file_path")) for result in results], return_inverse=True)
+    source_counts = np.zeros(source_ids.max() + 1, dtype=np.int64)
+
+    available = np.ones(len(results), dtype=bool)
+    max_similarity = None
+    selected = []
+
+    while len(selected) < top_k and available.any():
+        if similarity is None or max_similarity is None:
+            objective = relevance
+        else:
+            objective = refinement.mmr_lambda * relevance - (1 - refinement.mmr_lambda) * max_similarity
+
+        best = int(np.argmax(np.where(available, objective, -np.inf)))
+        selected.append(best)
+        available[best] = False
+
+        if similarity is not None:
+            max_similarity = similarity[best] if max_similarity is None else np.maximum(max_similarity, similarity[best])
+
+        if refinement.max_per_source is not None:
+            source = source_ids[best]
+            source_counts[source] += 1
+            if source_counts[source] >= refinement.max_per_source:
+                available &= source_ids != source
+
+    return [{key: value for key, value in results[i].items() if key != "vector"} for i in selected]
@@ -0,0 +1,60 @@
+from helpers.config import get_settings
+from helpers.metrics import SINGLE_FLIGHT_REQUESTS
+from typing import Awaitable, Callable, Hashable
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent requests: while a computation for a key is running,
+    callers with the same key await it instead of starting their own, and all get its result
+    (or its exception). Nothing is kept once it finishes, this is not a cache.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.in_flight = {}
+        self.loop = None
+
+    def forget(self, key: Hashable, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        # mark the exception retrieved, the callers may all have gone away
+        if not task.cancelled():
+            task.exception()
+
+    async def run(self, operation: str, key: Hashable, compute: Callable[[], Awaitable]):
+        if not self.enabled:
+            return await compute()
+
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # tasks belong to one event loop, ones from a previous loop can't be awaited
+            self.loop = loop
+            self.in_flight = {}
+
+        # operations computing different things may share a key
+        key = (operation, key)
+        task = self.in_flight.get(key)
+        if task is not None:
+            SINGLE_FLIGHT_REQUESTS.labels(operation=operation, result="coalesced").inc()
+        else:
+            SINGLE_FLIGHT_REQUESTS.labels(operation=operation, result="leader").inc()
+            task = loop.create_task(compute())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.forget(key, done))
+
+        # a caller that disconnects must not cancel the computation the others are waiting for
+        return await asyncio.shield(task)
+
+
+def normalize_query(query_text: str) -> str:
+    return " ".join(query_text.split())
+
+
+single_flight = None
+
+def get_single_flight() -> SingleFlight:
+    global single_flight
+    if single_flight is None:
+        single_flight = SingleFlight(enabled=get_settings().REQUEST_COALESCING_ENABLED)
+    return single_flight
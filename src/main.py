@@ -1,9 +1,15 @@
 from fastapi import FastAPI
-from routes import base, data, vectore_store
+from routes import base, data, vectore_store, metrics
 from motor.motor_asyncio import AsyncIOMotorClient
 from helpers.config import get_settings
 from stores.llms.LLMFactory import LLMFactory
+from stores.llms.providers.CachedEmbeddingProvider import CachedEmbeddingProvider
+from stores.llms.providers.BatchingEmbeddingProvider import BatchingEmbeddingProvider
+from stores.cache.EmbeddingCache import EmbeddingCache
 from stores.VectorDB.VectorDBFactory import VectorDBFactory
+from helpers.async_utils import maybe_await
+from models.ProjectModel import ProjectModel
+from models.DataChunkModel import DataChunkModel
 
 app = FastAPI()
 
@@ -13,22 +19,44 @@ async def startup_db_client():
     app.mongodb_client = AsyncIOMotorClient(settings.MONGO_URL)
     app.mongodb_connection = app.mongodb_client[settings.MONGODB_NAME]
     
+    # run schema/index setup once, request handlers then reuse the cached result
+    await ProjectModel.create_instance(db_client=app.mongodb_client)
+    await DataChunkModel.create_instance(db_client=app.mongodb_client)
+    
     LLM_factory = LLMFactory(config=settings)
     app.generation_llm = LLM_factory.create(settings.LLM_PROVIDER)
     app.embedding_llm = LLM_factory.create(settings.LLM_PROVIDER)
+    # cache -> micro-batcher -> provider: only cache misses wait for a batch
+    if settings.EMBEDDING_MICROBATCH_ENABLED:
+        app.embedding_llm = BatchingEmbeddingProvider(
+            provider=app.embedding_llm,
+            max_wait_ms=settings.EMBEDDING_MICROBATCH_MAX_WAIT_MS,
+            max_items=settings.EMBEDDING_MICROBATCH_MAX_ITEMS
+        )
+    if settings.EMBEDDING_CACHE_ENABLED:
+        app.embedding_llm = CachedEmbeddingProvider(
+            provider=app.embedding_llm,
+            cache=EmbeddingCache.from_settings(settings),
+            provider_name=settings.LLM_PROVIDER
+        )
 
     app.generation_llm.set_generation_model(model_id=settings.GENERATION_MODEL_ID)
     app.embedding_llm.set_embedding_model(model_id=settings.EMBEDDING_MODEL_ID, embedding_size=settings.EMBEDDING_SIZE)
 
     vectordb_factory = VectorDBFactory(settings)
-    app.vector_db_client = vectordb_factory.create("QDRANT")
+    app.vector_db_client = vectordb_factory.create(settings.VECTOR_DB_PROVIDER)
     app.vector_db_client.init_connection()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     app.mongodb_client.close()
+    await maybe_await(app.vector_db_client.disconnect())
+    await app.generation_llm.aclose()
+    await app.embedding_llm.aclose()
 
 app.include_router(base.base_router)
 app.include_router(data.data_router)
 app.include_router(vectore_store.vector_store_router)
+if get_settings().METRICS_ENABLED:
+    app.include_router(metrics.metrics_router)
 
@@ -1,7 +1,12 @@
 from helpers.config import get_settings, Settings
+from helpers.metadata_cache import get_metadata_cache
 
 class BaseDataModel:
     
     def __init__(self, db_client: object):
         self.db_client = db_client
-        self.app_settings = get_settings()
\ No newline at end of file
+        self.app_settings = get_settings()
+        self.metadata_cache = get_metadata_cache()
+        
+    def collection_init_cache_key(self, collection_name: str) -> str:
+        return f"mongo:collection_init:{self.app_settings.MONGODB_NAME}:{collection_name}"
\ No newline at end of file
@@ -2,6 +2,7 @@ from .BaseDataModel import BaseDataModel
 from .db_schemes.DataChunk import DataChunk
 from bson.objectid import ObjectId
 from pymongo import InsertOne
+from helpers.metrics import MONGO_BULK_WRITE_DURATION, MONGO_BULK_WRITE_SIZE
 
 class DataChunkModel(BaseDataModel):
     def __init__(self, db_client: object):
@@ -17,16 +18,21 @@ class DataChunkModel(BaseDataModel):
         return instance
     
     async def init_collection(self):
-        collection_names = await self.db_client[self.app_settings.MONGODB_NAME].list_collection_names()
-        # create index only when creating the collection first time
-        if "data_chunks" not in collection_names:
-            indexes = DataChunk.get_indexes()
-            for index in indexes:
-                await self.collection.create_index(
-                    index["key"],
-                    name=index["name"],
-                    unique=index["unique"]
-                )
+        # schema and index setup runs once per process, later instances skip the round trip
+        cache_key = self.collection_init_cache_key(self.collection_name)
+        if self.metadata_cache.get(cache_key):
+            return
+        
+        # create_index is a no-op for existing indexes, so indexes added later reach old collections too
+        indexes = DataChunk.get_indexes()
+        for index in indexes:
+            await self.collection.create_index(
+                index["key"],
+                name=index["name"],
+                unique=index["unique"]
+            )
+        
+        self.metadata_cache.set(cache_key, True, ttl=float("inf"))
     
     async def get_chunk_by_id(self, chunk_id: str):
         """
@@ -37,9 +43,32 @@ class DataChunkModel(BaseDataModel):
             return DataChunk(**chunk_doc)
         return None
     
+    async def get_chunks_by_ids(self, chunk_ids: list[str], project_id: str = None):
+        """
+        Retrieve DataChunks by their IDs, in the order of chunk_ids, optionally only those of one project.
+        """
+        object_ids = [ObjectId(chunk_id) for chunk_id in chunk_ids]
+        query = {"_id": {"$in": object_ids}}
+        if project_id is not None:
+            query["chunk_metadata.project_id"] = project_id
+        chunk_docs = await self.collection.find(query).to_list(length=len(object_ids))
+        
+        chunks_by_id = {str(chunk_doc["_id"]): DataChunk(**chunk_doc) for chunk_doc in chunk_docs}
+        return [chunks_by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in chunks_by_id]
+    
+    async def iter_chunks_by_project_id(self, project_id: str):
+        cursor = self.collection.find({"chunk_metadata.project_id": project_id})
+        async for chunk_doc in cursor:
+            yield DataChunk(**chunk_doc)
+    
     # insert many chunks with bulk write
     async def insert_many_chunks(self, chunks: list[DataChunk], batch_size: int=100):
 
+        # ids are assigned client side so callers can refer back to the stored chunks
+        for chunk in chunks:
+            if chunk.id is None:
+                chunk.id = ObjectId()
+
         for i in range(0, len(chunks), batch_size):
             batch = chunks[i:i+batch_size]
 
@@ -48,10 +77,33 @@ class DataChunkModel(BaseDataModel):
                 for chunk in batch
             ]
 
-            await self.collection.bulk_write(operations)
+            MONGO_BULK_WRITE_SIZE.labels(collection=self.collection_name).observe(len(operations))
+            with MONGO_BULK_WRITE_DURATION.labels(collection=self.collection_name).time():
+                await self.collection.bulk_write(operations)
         
         return len(chunks)
 
+    async def get_document_chunk_hashes(self, project_id: str, document_name: str) -> dict:
+        """
+        Map chunk_hash -> chunk id for the stored chunks of one document.
+        """
+        cursor = self.collection.find(
+            {"chunk_metadata.project_id": project_id, "chunk_metadata.document": document_name},
+            {"_id": 1, "chunk_hash": 1}
+        )
+        return {
+            chunk_doc["chunk_hash"]: str(chunk_doc["_id"])
+            async for chunk_doc in cursor
+            if chunk_doc.get("chunk_hash")
+        }
+    
+    async def delete_chunks_by_ids(self, chunk_ids: list[str]) -> int:
+        result = await self.collection.delete_many({
+            "_id": {"$in": [ObjectId(chunk_id) for chunk_id in chunk_ids]}
+        })
+
+        return result.deleted_count
+
     async def delete_chunks_by_project_id(self, project_id: ObjectId):
         result = await self.collection.delete_many({
             "chunk_project_id": project_id
@@ -18,6 +18,11 @@ class ProjectModel(BaseDataModel):
         return instance
 
     async def init_collection(self):
+        # schema and index setup runs once per process, later instances skip the round trip
+        cache_key = self.collection_init_cache_key(self.collection_name)
+        if self.metadata_cache.get(cache_key):
+            return
+        
         all_collection_names = await self.db_client[self.app_settings.MONGODB_NAME].list_collection_names()
         logger.info(f"Existing collections: {all_collection_names}")
         
@@ -37,6 +42,8 @@ class ProjectModel(BaseDataModel):
                 logger.info(f"Successfully created index: {index['name']}")
         else:
             logger.info("Projects collection exists - skipping index creation")
+        
+        self.metadata_cache.set(cache_key, True, ttl=float("inf"))
     
     async def get_collection_indexes(self):
         """Get all indexes for the projects collection"""
@@ -52,9 +59,17 @@ class ProjectModel(BaseDataModel):
         project_data = project.model_dump(by_alias=True, exclude_none=True)
         result = await self.collection.insert_one(project_data)
         project.id = result.inserted_id
+        self.metadata_cache.set(self.project_cache_key(project.project_id), project)
         return project
     
+    def project_cache_key(self, project_id: str) -> str:
+        return f"mongo:project:{self.app_settings.MONGODB_NAME}:{project_id}"
+    
     async def find_project_or_create_one(self, project_id: str, description: str = None):
+        project = self.metadata_cache.get(self.project_cache_key(project_id))
+        if project is not None:
+            return project
+        
         project_doc = await self.collection.find_one({"project_id": project_id})
         
         if not project_doc:
@@ -65,7 +80,50 @@ class ProjectModel(BaseDataModel):
             return await self.create_project(new_project)
         
         # MongoDB returns '_id', populate_by_name allows Pydantic to accept it
-        return Project(**project_doc)
+        project = Project(**project_doc)
+        self.metadata_cache.set(self.project_cache_key(project_id), project)
+        return project
+    
+    async def get_project(self, project_id: str):
+        project = self.metadata_cache.get(self.project_cache_key(project_id))
+        if project is not None:
+            return project
+        
+        project_doc = await self.collection.find_one({"project_id": project_id})
+        if not project_doc:
+            return None
+        
+        project = Project(**project_doc)
+        self.metadata_cache.set(self.project_cache_key(project_id), project)
+        return project
+    
+    async def update_vector_profile(self, project_id: str, vector_profile: str):
+        result = await self.collection.update_one(
+            {"project_id": project_id},
+            {"$set": {"vector_profile": vector_profile}}
+        )
+        self.metadata_cache.invalidate(self.project_cache_key(project_id))
+        return result.modified_count
+    
+    async def get_ingest_generation(self, project_id: str) -> int:
+        # read through, not cached: other processes bump it while ingesting
+        project_doc = await self.collection.find_one({"project_id": project_id}, {"ingest_generation": 1})
+        return project_doc.get("ingest_generation", 0) if project_doc else 0
+    
+    async def bump_ingest_generation(self, project_id: str):
+        result = await self.collection.update_one(
+            {"project_id": project_id},
+            {"$inc": {"ingest_generation": 1}}
+        )
+        return result.modified_count
+    
+    async def delete_project(self, project_id: str):
+        result = await self.collection.delete_one({"project_id": project_id})
+        self.metadata_cache.invalidate(self.project_cache_key(project_id))
+        return result.deleted_count
+    
+    async def get_all_project_ids(self) -> list:
+        return [project_doc["project_id"] async for project_doc in self.collection.find({}, {"project_id": 1})]
     
     async def get_all_projects(self, page_number: int = 1, page_size: int = 10):
         
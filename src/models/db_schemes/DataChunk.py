@@ -6,6 +6,7 @@ class DataChunk(BaseModel):
     id: Optional[ObjectId] = Field(None, alias="_id")
     chunk_text: str = Field(..., min_length=1)
     chunk_metadata: dict
+    chunk_hash: Optional[str] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -20,5 +21,13 @@ class DataChunk(BaseModel):
                 ],
                 "name": "idx_chunk_project_id",
                 "unique": False,
+            },
+            {
+                "key": [
+                    ("chunk_metadata.project_id", 1),
+                    ("chunk_metadata.document", 1)
+                ],
+                "name": "idx_chunk_project_document",
+                "unique": False,
             }
         ]
\ No newline at end of file
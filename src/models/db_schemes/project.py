@@ -8,6 +8,8 @@ class Project(BaseModel):
     description: Optional[str] = Field(None, min_length=1, max_length=200)
     created_at: Optional[str] = Field(None)
     updated_at: Optional[str] = Field(None)
+    vector_profile: Optional[str] = Field(None)
+    ingest_generation: int = Field(0)
 
     @field_validator('project_id')
     def validate_project_id(cls, v):
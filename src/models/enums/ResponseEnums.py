@@ -11,4 +11,8 @@ class ResponseSignal(Enum):
     FILE_PROCESS_FAILED = "file_process_failed"
     CHUNK_EMBEDDING_SUCCESS = "chunk_embedding_success"
     CHUNK_EMBEDDING_FAILED = "chunk_embedding_failed"
-    FILE_PROCESSING_SUCCESS = "file_processing_success"
\ No newline at end of file
+    FILE_PROCESSING_SUCCESS = "file_processing_success"
+    COLLECTION_PROFILE_APPLIED = "collection_profile_applied"
+    COLLECTION_PROFILE_FAILED = "collection_profile_failed"
+    VECTOR_LAYOUT_MIGRATED = "vector_layout_migrated"
+    VECTOR_LAYOUT_MIGRATION_FAILED = "vector_layout_migration_failed"
\ No newline at end of file
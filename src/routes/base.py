@@ -1,5 +1,6 @@
-from fastapi import FastAPI, APIRouter, Depends
+from fastapi import FastAPI, APIRouter, Depends, Request
 from helpers.config import get_settings, Settings
+from stores.cache.AnswerCache import get_answer_cache
 
 base_router = APIRouter(
     prefix="/api/v1",
@@ -14,4 +15,21 @@ async def welcome(app_settings: Settings =Depends(get_settings)):
     return {
             "App Name": app_name,
             "Version": app_version,
-            }
\ No newline at end of file
+            }
+
+@base_router.get("/embedding-cache/stats")
+async def embedding_cache_stats(request: Request):
+    cache = getattr(request.app.embedding_llm, "cache", None)
+    
+    if cache is None:
+        return {"enabled": False}
+    
+    return {"enabled": True, **cache.get_stats()}
+
+
+@base_router.get("/answer-cache/stats")
+async def answer_cache_stats():
+    if not get_settings().ANSWER_CACHE_ENABLED:
+        return {"enabled": False}
+    
+    return {"enabled": True, **get_answer_cache().get_stats()}
@@ -67,11 +67,13 @@ async def upload_file(project_id: str, file: UploadFile, request: Request, app_s
             }
         )
 
+    # the cleaned original name identifies the document, uploading it again replaces the previous revision
     task = chunk_file.delay(
         project_id=project_id,
         filename=unique_filename,
         chunk_size=app_settings.FILE_DEFAULT_CHUNK_SIZE,
         overlap=app_settings.FILE_DEFAULT_OVERLAP_SIZE,
+        document_name=DataController().get_clean_file_name(orig_file_name=file.filename),
     )
     
     return JSONResponse(
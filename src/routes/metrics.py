@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+metrics_router = APIRouter(
+    tags=["metrics"]
+)
+
+@metrics_router.get("/metrics")
+async def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
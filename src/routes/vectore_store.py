@@ -1,9 +1,15 @@
 from fastapi import FastAPI, APIRouter, Depends, UploadFile, status, Request
 from controllers.VectorStoreController import VectorStoreController
+from stores.VectorDB.CollectionProfiles import COLLECTION_PROFILES
+from tasks.maintenance import apply_collection_profile
 from stores.llms.LLMFactory import LLMFactory
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from models import ResponseSignal
+from helpers.config import get_settings
+from helpers.single_flight import get_single_flight, normalize_query
+from pydantic import ValidationError
 import logging
+import json
 
 logger = logging.getLogger('uvicorn.error')
 
@@ -12,16 +18,81 @@ vector_store_router = APIRouter(
     tags=["api/v1", "vector database"]
 )
 
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def get_search_refinement(vector_store_controller: VectorStoreController, request: dict):
+    # optional body fields: mmr, mmr_lambda, min_score, max_per_source
+    return vector_store_controller.resolve_search_refinement(
+        mmr=request.get('mmr'),
+        mmr_lambda=request.get('mmr_lambda'),
+        min_score=request.get('min_score'),
+        max_per_source=request.get('max_per_source')
+    )
+
+def invalid_refinement_response(signal: str, error: ValidationError) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "signal": signal,
+            "error": "invalid search refinement",
+            "details": error.errors(include_url=False, include_context=False)
+        }
+    )
+
+def get_coalescing_key(vector_store_controller: VectorStoreController, project_id: str, request: dict, refinement):
+    return (
+        project_id,
+        normalize_query(request['query_text']),
+        int(request.get('top_k', 5)),
+        vector_store_controller.resolve_search_mode(request.get('mode')),
+        refinement.cache_key()
+    )
+
+async def stream_answer_events(vector_store_controller: VectorStoreController, project_id: str, request: dict,
+                               refinement):
+    try:
+        async for event, data in vector_store_controller.stream_answer_with_rag(
+                project_id=project_id,
+                query=request['query_text'],
+                top_k=request.get('top_k', 5),
+                mode=request.get('mode'),
+                refinement=refinement
+            ):
+            yield format_sse(event, data)
+    
+    except Exception as e:
+        logger.error(f"Error streaming answer: {e}")
+        yield format_sse("error", {"signal": "query answer failed", "error": str(e)})
+
 @vector_store_router.post("/answer-query/{project_id}")
 async def answer_query(fastApiRequest: Request, project_id: str, request: dict):
     try:
-        vector_store_controller = VectorStoreController(fastApiRequest.app.embedding_llm, fastApiRequest.app.generation_llm, fastApiRequest.app.vector_db_client)
+        vector_store_controller = VectorStoreController(fastApiRequest.app.embedding_llm, fastApiRequest.app.generation_llm, fastApiRequest.app.vector_db_client, fastApiRequest.app.mongodb_client)
+        try:
+            refinement = get_search_refinement(vector_store_controller, request)
+        except ValidationError as e:
+            return invalid_refinement_response("query answer failed", e)
+        
+        if request.get('stream', False):
+            return StreamingResponse(
+                stream_answer_events(vector_store_controller, project_id, request, refinement),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+            )
         
-        response = vector_store_controller.answer_with_rag(
+        # identical requests already in flight share their answer
+        response = await get_single_flight().run(
+            "answer",
+            get_coalescing_key(vector_store_controller, project_id, request, refinement),
+            lambda: vector_store_controller.answer_with_rag(
                 project_id=project_id, 
                 query=request['query_text'], 
-                top_k=request.get('top_k', 5)
+                top_k=request.get('top_k', 5),
+                mode=request.get('mode'),
+                refinement=refinement
             )
+        )
         
         return JSONResponse(
             content={
@@ -43,13 +114,24 @@ async def answer_query(fastApiRequest: Request, project_id: str, request: dict):
 @vector_store_router.post("/query-search/{project_id}")
 async def search_query(fastApiRequest: Request, project_id: str, request: dict):
     try:
-        vector_store_controller = VectorStoreController(fastApiRequest.app.embedding_llm, fastApiRequest.app.generation_llm, fastApiRequest.app.vector_db_client)
+        vector_store_controller = VectorStoreController(fastApiRequest.app.embedding_llm, fastApiRequest.app.generation_llm, fastApiRequest.app.vector_db_client, fastApiRequest.app.mongodb_client)
+
+        try:
+            refinement = get_search_refinement(vector_store_controller, request)
+        except ValidationError as e:
+            return invalid_refinement_response("query search failed", e)
 
-        search_results = vector_store_controller.search_similar_vectors(
+        search_results = await get_single_flight().run(
+            "search",
+            get_coalescing_key(vector_store_controller, project_id, request, refinement),
+            lambda: vector_store_controller.search_similar_vectors(
                 project_id=project_id, 
                 query_text=request['query_text'], 
-                top_k=request.get('top_k', 5)
+                top_k=request.get('top_k', 5),
+                mode=request.get('mode'),
+                refinement=refinement
             )
+        )
 
         return JSONResponse(
             content={
@@ -77,6 +159,93 @@ async def search_query(fastApiRequest: Request, project_id: str, request: dict):
             }
         )
 
+@vector_store_router.post("/query-search-batch/{project_id}")
+async def search_query_batch(fastApiRequest: Request, project_id: str, request: dict):
+    """
+    Body: {"queries": [{"query_text": str, "top_k": int}, ...], "top_k": int, "mode": str}.
+    A query can also be a plain string, it then uses the request level top_k.
+    The refinement fields of query-search apply to every query.
+    """
+    queries = request.get('queries')
+    default_top_k = request.get('top_k', 5)
+    max_size = get_settings().QUERY_BATCH_MAX_SIZE
+    
+    if not isinstance(queries, list) or not 0 < len(queries) <= max_size:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": "query search failed",
+                "error": f"queries must be a list of 1 to {max_size} queries"
+            }
+        )
+    
+    queries = [{"query_text": query} if isinstance(query, str) else query for query in queries]
+    if not all(isinstance(query, dict) and query.get('query_text') for query in queries):
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": "query search failed",
+                "error": "every query needs a query_text"
+            }
+        )
+    
+    try:
+        vector_store_controller = VectorStoreController(fastApiRequest.app.embedding_llm, fastApiRequest.app.generation_llm, fastApiRequest.app.vector_db_client, fastApiRequest.app.mongodb_client)
+        try:
+            refinement = get_search_refinement(vector_store_controller, request)
+        except ValidationError as e:
+            return invalid_refinement_response("query search failed", e)
+        
+        batch_results = await vector_store_controller.search_similar_vectors_batch(
+                project_id=project_id,
+                query_texts=[query['query_text'] for query in queries],
+                top_ks=[int(query.get('top_k', default_top_k)) for query in queries],
+                mode=request.get('mode'),
+                refinement=refinement
+            )
+        
+        return JSONResponse(
+            content={
+                "signal": "query search succeeded",
+                "results": [
+                    {"query_text": query['query_text'], "results": results}
+                    for query, results in zip(queries, batch_results)
+                ]
+            }
+        )
+    
+    except Exception as e:
+        logger.error(f"Error searching query batch: {e}")
+        return JSONResponse(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            content={
+                "signal": "query search failed",
+                "error": str(e)
+            }
+        )
+
+@vector_store_router.post("/vector-profile/{project_id}")
+async def set_vector_profile(project_id: str, request: dict):
+    profile_name = request.get('profile')
+    
+    if profile_name not in COLLECTION_PROFILES:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={
+                "signal": ResponseSignal.COLLECTION_PROFILE_FAILED.value,
+                "error": f"Unknown profile, expected one of {list(COLLECTION_PROFILES)}"
+            }
+        )
+    
+    task = apply_collection_profile.delay(project_id=project_id, profile_name=profile_name)
+    
+    return JSONResponse(
+        content={
+            "signal": "collection profile migration scheduled",
+            "task_id": task.id
+        }
+    )
+
 # Not used here - automated by celery after file upload
 @vector_store_router.post("/embed-vector/{project_id}")
 async def embed_chunk(fastApiRequest: Request, project_id: str, request: dict):
@@ -0,0 +1,138 @@
+from typing import List, Optional, Set, Tuple
+import numpy as np
+import zlib
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Split num_perm into bands x rows so the LSH S-curve, (1/bands)^(1/rows), lands closest
+    to threshold. Candidates are verified afterwards, so a slightly lower curve is fine.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles, with multiply-shift hashing done in NumPy.
+    Shingles are hashed with crc32, so signatures are stable across processes.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        # odd multipliers, the top 32 bits of (a * x + b) mod 2^64 are the hash
+        self.a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self.b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> np.ndarray:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        size = self.shingle_size
+        if len(tokens) <= size:
+            grams = [" ".join(tokens)]
+        else:
+            grams = [" ".join(tokens[i:i+size]) for i in range(len(tokens) - size + 1)]
+        return np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in set(grams)), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        shingles = self.shingles(text)
+        hashes = (self.a[:, None] * shingles[None, :] + self.b[:, None]) >> np.uint64(32)
+        return hashes.min(axis=1).astype(np.uint32)
+
+
+class MinHashLSHIndex:
+    """
+    Banded LSH over MinHash signatures. Candidates sharing a band are verified with the
+    estimated Jaccard similarity (the fraction of equal signature slots).
+    Removed entries stay as empty slots until the index is saved.
+    """
+
+    def __init__(self, num_perm: int = 128, threshold: float = 0.9, shingle_size: int = 3):
+        self.num_perm = num_perm
+        self.threshold = threshold
+        # signatures are only comparable when made with the same MinHasher parameters
+        self.shingle_size = shingle_size
+        self.num_bands, self.rows = choose_bands(num_perm, threshold)
+
+        self.ids = []              # position -> chunk id, None once removed
+        self.signatures = []       # position -> signature
+        self.positions = {}        # chunk id -> position
+        self.buckets = {}          # (band, band bytes) -> positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self.rows
+        return [(band, signature[band*rows:(band+1)*rows].tobytes()) for band in range(self.num_bands)]
+
+    def query(self, signature: np.ndarray, exclude_ids: Set[str] = None) -> Optional[Tuple[str, float]]:
+        """
+        Return (chunk id, similarity) of the most similar indexed entry at or above the threshold,
+        ignoring entries in exclude_ids.
+        """
+        exclude_ids = exclude_ids or set()
+        candidates = set()
+        for key in self.band_keys(signature):
+            candidates.update(self.buckets.get(key, ()))
+
+        best = None
+        for position in candidates:
+            if self.ids[position] is None or self.ids[position] in exclude_ids:
+                continue
+            similarity = float(np.mean(self.signatures[position] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (self.ids[position], similarity)
+        return best
+
+    def add(self, chunk_id: str, signature: np.ndarray):
+        if chunk_id in self.positions:
+            return
+
+        position = len(self.ids)
+        self.ids.append(chunk_id)
+        self.signatures.append(signature)
+        self.positions[chunk_id] = position
+        for key in self.band_keys(signature):
+            self.buckets.setdefault(key, []).append(position)
+
+    def remove(self, chunk_ids: List[str]) -> int:
+        num_removed = 0
+        for chunk_id in chunk_ids:
+            position = self.positions.pop(chunk_id, None)
+            if position is not None:
+                self.ids[position] = None
+                num_removed += 1
+        return num_removed
+
+    def save(self, file_path: str):
+        alive = [position for position, chunk_id in enumerate(self.ids) if chunk_id is not None]
+        signatures = (
+            np.stack([self.signatures[position] for position in alive])
+            if alive else np.zeros((0, self.num_perm), dtype=np.uint32)
+        )
+        with open(file_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array([self.ids[position] for position in alive], dtype=str),
+                signatures=signatures,
+                threshold=np.float64(self.threshold),
+                shingle_size=np.int64(self.shingle_size)
+            )
+
+    @classmethod
+    def load(cls, file_path: str, threshold: float = None):
+        with np.load(file_path) as data:
+            signatures = data["signatures"]
+            index = cls(
+                num_perm=signatures.shape[1],
+                threshold=threshold or float(data["threshold"]),
+                shingle_size=int(data["shingle_size"])
+            )
+            for chunk_id, signature in zip(data["ids"].tolist(), signatures):
+                index.add(chunk_id, signature)
+        return index
@@ -0,0 +1 @@
+from .MinHashLSH import MinHasher, MinHashLSHIndex
\ No newline at end of file
@@ -0,0 +1,133 @@
+from typing import List, Tuple, Iterable
+import gzip
+import json
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+(?:[-./]\w+)*")
+
+def tokenize(text: str) -> List[str]:
+    # keeps identifiers such as part numbers ("AB-1234") or error codes ("E.404") as single terms
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring, documents are appended incrementally.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        self.doc_ids = []          # position -> external doc id, None once removed
+        self.doc_lengths = []      # position -> number of terms
+        self.doc_positions = {}    # external doc id -> position
+        self.postings = {}         # term -> {position: term frequency}
+        self.total_length = 0
+        self.num_docs = 0
+        self.metadata = {}
+
+    def add_documents(self, documents: Iterable[Tuple[str, str]]):
+        """
+        Index (doc_id, text) pairs, documents already in the index are skipped.
+        """
+        for doc_id, text in documents:
+            if doc_id in self.doc_positions:
+                continue
+
+            terms = tokenize(text)
+            position = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+            self.doc_lengths.append(len(terms))
+            self.doc_positions[doc_id] = position
+            self.total_length += len(terms)
+            self.num_docs += 1
+
+            term_counts = {}
+            for term in terms:
+                term_counts[term] = term_counts.get(term, 0) + 1
+            for term, count in term_counts.items():
+                self.postings.setdefault(term, {})[position] = count
+
+    def remove_documents(self, doc_ids: Iterable[str]) -> int:
+        """
+        Drop documents from the index. Their positions stay as empty slots, so other positions don't move.
+        """
+        removed_positions = set()
+        for doc_id in doc_ids:
+            position = self.doc_positions.pop(doc_id, None)
+            if position is None:
+                continue
+
+            removed_positions.add(position)
+            self.doc_ids[position] = None
+            self.total_length -= self.doc_lengths[position]
+            self.doc_lengths[position] = 0
+            self.num_docs -= 1
+
+        if removed_positions:
+            for term in list(self.postings):
+                term_postings = self.postings[term]
+                for position in removed_positions.intersection(term_postings):
+                    del term_postings[position]
+                if not term_postings:
+                    del self.postings[term]
+
+        return len(removed_positions)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        if self.num_docs == 0:
+            return []
+
+        avg_length = self.total_length / self.num_docs
+        scores = {}
+
+        for term in set(tokenize(query)):
+            term_postings = self.postings.get(term)
+            if not term_postings:
+                continue
+
+            idf = math.log(1 + (self.num_docs - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for position, tf in term_postings.items():
+                length_norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[position] / avg_length)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (self.k1 + 1) / (tf + length_norm)
+
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(self.doc_ids[position], score) for position, score in best]
+
+    def save(self, file_path: str, metadata: dict = None):
+        """
+        Persist as gzip'd JSON, postings flattened to [position, tf, position, tf, ...] lists.
+        metadata is stored alongside and comes back as load(...).metadata.
+        """
+        data = {
+            "metadata": metadata or {},
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_lengths": self.doc_lengths,
+            "postings": {
+                term: [value for item in term_postings.items() for value in item]
+                for term, term_postings in self.postings.items()
+            },
+        }
+        with gzip.open(file_path, "wt", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, file_path: str):
+        with gzip.open(file_path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+
+        index = cls(k1=data["k1"], b=data["b"])
+        index.doc_ids = data["doc_ids"]
+        index.doc_lengths = data["doc_lengths"]
+        index.doc_positions = {doc_id: position for position, doc_id in enumerate(index.doc_ids) if doc_id is not None}
+        index.postings = {
+            term: dict(zip(flat[0::2], flat[1::2]))
+            for term, flat in data["postings"].items()
+        }
+        index.total_length = sum(index.doc_lengths)
+        index.num_docs = len(index.doc_positions)
+        index.metadata = data.get("metadata", {})
+        return index
@@ -0,0 +1 @@
+from .BM25Index import BM25Index
\ No newline at end of file
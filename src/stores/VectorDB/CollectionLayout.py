@@ -0,0 +1,56 @@
+from qdrant_client import models
+from .CollectionProfiles import CollectionProfile
+from typing import Optional
+
+class CollectionLayout:
+    """
+    Maps a project collection onto Qdrant. In the "per_project" layout every project is
+    its own collection, in the "shared" layout all projects live in one collection and
+    are told apart by a tenant-indexed project_id payload field.
+    """
+    TENANT_FIELD = "project_id"
+
+    def __init__(self, layout: str, shared_collection_name: str):
+        if layout not in ("per_project", "shared"):
+            raise ValueError(f"Unknown vector db layout: {layout}")
+
+        self.layout = layout
+        self.shared_collection_name = shared_collection_name
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.VECTOR_DB_LAYOUT, settings.QDRANT_SHARED_COLLECTION_NAME)
+
+    @property
+    def is_shared(self) -> bool:
+        return self.layout == "shared"
+
+    def physical_name(self, collection_name: str) -> str:
+        return self.shared_collection_name if self.is_shared else collection_name
+
+    def tenant_filter(self, collection_name: str) -> Optional[models.Filter]:
+        if not self.is_shared:
+            return None
+        return models.Filter(
+            must=[models.FieldCondition(key=self.TENANT_FIELD, match=models.MatchValue(value=collection_name))]
+        )
+
+    def tenant_payload(self, collection_name: str, payload: dict) -> dict:
+        if not self.is_shared:
+            return payload
+        return {**(payload or {}), self.TENANT_FIELD: collection_name}
+
+    def tenant_index_schema(self) -> models.KeywordIndexParams:
+        # is_tenant lets Qdrant co-locate each project's points in storage
+        return models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD, is_tenant=True)
+
+    def hnsw_config(self, profile: CollectionProfile = None) -> Optional[models.HnswConfigDiff]:
+        hnsw_config = profile.hnsw_config() if profile else None
+        if not self.is_shared:
+            return hnsw_config
+
+        # every search is filtered by tenant, so build per-tenant graphs instead of a global one
+        hnsw_config = hnsw_config or models.HnswConfigDiff()
+        hnsw_config.payload_m = hnsw_config.m or 16
+        hnsw_config.m = 0
+        return hnsw_config
@@ -0,0 +1,96 @@
+from pydantic import BaseModel
+from qdrant_client import models
+from typing import Optional, Literal
+
+class CollectionProfile(BaseModel):
+    """
+    Storage/index settings of a Qdrant collection: on-disk vectors, HNSW graph,
+    quantization and how searches rescore against the original vectors.
+    """
+    name: str
+    on_disk: bool = False
+    hnsw_m: Optional[int] = None
+    hnsw_ef_construct: Optional[int] = None
+    hnsw_on_disk: Optional[bool] = None
+    quantization: Optional[Literal["scalar", "binary", "product"]] = None
+    quantization_always_ram: bool = True
+    product_compression: str = "x16"
+    rescore: bool = True
+    oversampling: Optional[float] = None
+
+    def vectors_config(self, size: int, distance: models.Distance) -> models.VectorParams:
+        return models.VectorParams(size=size, distance=distance, on_disk=self.on_disk or None)
+
+    def hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        if self.hnsw_m is None and self.hnsw_ef_construct is None and self.hnsw_on_disk is None:
+            return None
+        return models.HnswConfigDiff(m=self.hnsw_m, ef_construct=self.hnsw_ef_construct, on_disk=self.hnsw_on_disk)
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=self.quantization_always_ram)
+            )
+        if self.quantization == "product":
+            return models.ProductQuantization(
+                product=models.ProductQuantizationConfig(
+                    compression=models.CompressionRatio(self.product_compression),
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        return None
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        if self.quantization is None:
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=self.rescore,
+                oversampling=self.oversampling
+            )
+        )
+
+
+COLLECTION_PROFILES = {
+    # plain float32 vectors in RAM, Qdrant defaults
+    "default": {},
+    # vectors and graph on disk, lowest RAM use, slowest search
+    "on_disk": {"on_disk": True, "hnsw_on_disk": True},
+    # int8 codes in RAM (4x smaller), float32 originals on disk for rescoring
+    "scalar_int8": {"on_disk": True, "quantization": "scalar", "oversampling": 2.0},
+    # 1 bit per dimension (32x smaller), needs more oversampling to keep recall
+    "binary": {"on_disk": True, "quantization": "binary", "oversampling": 3.0},
+    # product quantization, highest compression, lowest recall
+    "product": {"on_disk": True, "quantization": "product", "product_compression": "x16", "oversampling": 3.0},
+}
+
+
+def get_collection_profile(name: str, settings) -> CollectionProfile:
+    """
+    Build a named profile, with the QDRANT_* settings overriding the preset values.
+    """
+    if name not in COLLECTION_PROFILES:
+        raise ValueError(f"Unknown collection profile: {name}")
+
+    overrides = {
+        "hnsw_m": settings.QDRANT_HNSW_M,
+        "hnsw_ef_construct": settings.QDRANT_HNSW_EF_CONSTRUCT,
+        "oversampling": settings.QDRANT_SEARCH_OVERSAMPLING,
+        "rescore": settings.QDRANT_SEARCH_RESCORE,
+    }
+
+    return CollectionProfile(
+        name=name,
+        **{
+            **COLLECTION_PROFILES[name],
+            **{key: value for key, value in overrides.items() if value is not None},
+        }
+    )
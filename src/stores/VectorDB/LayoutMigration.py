@@ -0,0 +1,205 @@
+from qdrant_client import QdrantClient, models
+from .CollectionLayout import CollectionLayout
+from models.ProjectModel import ProjectModel
+from typing import List, Optional
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def copy_points(client: QdrantClient, source: str, target: str, scroll_filter: Optional[models.Filter] = None,
+                payload_update: dict = None, batch_size: int = 256) -> int:
+    """
+    Copy points (ids, vectors and payloads) from source to target, page by page.
+    """
+    num_copied = 0
+    offset = None
+
+    while True:
+        records, offset = client.scroll(
+            collection_name=source,
+            scroll_filter=scroll_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True
+        )
+        if records:
+            client.upsert(
+                collection_name=target,
+                wait=offset is None,
+                points=[
+                    models.PointStruct(id=record.id, vector=record.vector, payload={**(record.payload or {}), **(payload_update or {})})
+                    for record in records
+                ]
+            )
+            num_copied += len(records)
+        if offset is None:
+            return num_copied
+
+
+def ensure_target_collection(client: QdrantClient, source: str, target: str, layout: CollectionLayout):
+    """
+    Create target with the vectors, quantization and HNSW settings of source.
+    """
+    if client.collection_exists(collection_name=target):
+        return False
+
+    source_config = client.get_collection(collection_name=source).config
+    hnsw_config = models.HnswConfigDiff(**source_config.hnsw_config.model_dump())
+    if layout.is_shared:
+        hnsw_config.payload_m = hnsw_config.m or 16
+        hnsw_config.m = 0
+    else:
+        hnsw_config.m = hnsw_config.m or hnsw_config.payload_m or 16
+
+    client.create_collection(
+        collection_name=target,
+        vectors_config=source_config.params.vectors,
+        hnsw_config=hnsw_config,
+        quantization_config=source_config.quantization_config,
+    )
+    if layout.is_shared:
+        client.create_payload_index(
+            collection_name=target,
+            field_name=layout.TENANT_FIELD,
+            field_schema=layout.tenant_index_schema()
+        )
+    return True
+
+
+def migrate_to_shared(client: QdrantClient, layout: CollectionLayout, project_ids: List[str],
+                      delete_source: bool = False, batch_size: int = 256) -> dict:
+    """
+    Move the collections of project_ids into the shared collection, tagging points with their project_id.
+    The ids come from Mongo, other collections on the Qdrant server are not ours to move.
+    """
+    migrated = {}
+    for project_id in project_ids:
+        if not client.collection_exists(collection_name=project_id):
+            continue
+
+        ensure_target_collection(client, project_id, layout.shared_collection_name, layout)
+        migrated[project_id] = copy_points(
+            client, project_id, layout.shared_collection_name,
+            payload_update={layout.TENANT_FIELD: project_id},
+            batch_size=batch_size
+        )
+        if delete_source:
+            client.delete_collection(collection_name=project_id)
+
+        logger.info(f"Migrated {migrated[project_id]} points of project {project_id} to the shared collection")
+
+    return migrated
+
+
+def list_shared_project_ids(client: QdrantClient, layout: CollectionLayout) -> List[str]:
+    project_ids = set()
+    offset = None
+
+    while True:
+        records, offset = client.scroll(
+            collection_name=layout.shared_collection_name,
+            limit=1000,
+            offset=offset,
+            with_payload=[layout.TENANT_FIELD],
+            with_vectors=False
+        )
+        project_ids.update(record.payload.get(layout.TENANT_FIELD) for record in records)
+        if offset is None:
+            return sorted(str(project_id) for project_id in project_ids if project_id is not None)
+
+
+def migrate_to_per_project(client: QdrantClient, layout: CollectionLayout, project_ids: List[str] = None,
+                           delete_source: bool = False, batch_size: int = 256) -> dict:
+    """
+    Split the shared collection back into one collection per project.
+    """
+    if not client.collection_exists(collection_name=layout.shared_collection_name):
+        return {}
+
+    if project_ids is None:
+        project_ids = list_shared_project_ids(client, layout)
+
+    per_project_layout = CollectionLayout("per_project", layout.shared_collection_name)
+    migrated = {}
+    for project_id in project_ids:
+        ensure_target_collection(client, layout.shared_collection_name, project_id, per_project_layout)
+        migrated[project_id] = copy_points(
+            client, layout.shared_collection_name, project_id,
+            scroll_filter=layout.tenant_filter(project_id),
+            batch_size=batch_size
+        )
+        if delete_source:
+            client.delete(
+                collection_name=layout.shared_collection_name,
+                points_selector=models.FilterSelector(filter=layout.tenant_filter(project_id))
+            )
+
+        logger.info(f"Migrated {migrated[project_id]} points of project {project_id} to its own collection")
+
+    return migrated
+
+
+async def get_project_ids(db_client: object) -> List[str]:
+    """
+    The projects known to Mongo, the only per-project collections this app owns.
+    """
+    project_model = await ProjectModel.create_instance(db_client=db_client)
+    return await project_model.get_all_project_ids()
+
+
+def migrate_vector_layout(client: QdrantClient, target_layout: str, shared_collection_name: str,
+                          project_ids: List[str] = None, delete_source: bool = False, batch_size: int = 256) -> dict:
+    """
+    Copy vectors to target_layout ("shared" or "per_project"). Point ids are kept, so re-running is safe.
+    Switch VECTOR_DB_LAYOUT once it is done, and only then delete the source.
+    Moving to "shared" needs the project ids (get_project_ids), moving back reads them from the shared collection.
+    """
+    layout = CollectionLayout("shared", shared_collection_name)
+    if target_layout == "shared":
+        if project_ids is None:
+            raise ValueError("Migrating to the shared layout needs the project ids")
+        return migrate_to_shared(client, layout, project_ids, delete_source, batch_size)
+    if target_layout == "per_project":
+        return migrate_to_per_project(client, layout, project_ids, delete_source, batch_size)
+    raise ValueError(f"Unknown vector db layout: {target_layout}")
+
+
+if __name__ == "__main__":
+    from helpers.config import get_settings
+
+    parser = argparse.ArgumentParser(description="Migrate Qdrant vectors between the per_project and shared layouts.")
+    parser.add_argument("target_layout", choices=["shared", "per_project"])
+    parser.add_argument("--project-id", action="append", dest="project_ids")
+    parser.add_argument("--delete-source", action="store_true")
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+
+    project_ids = args.project_ids
+    if project_ids is None and args.target_layout == "shared":
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        mongodb_client = AsyncIOMotorClient(settings.MONGO_URL)
+        try:
+            project_ids = asyncio.run(get_project_ids(mongodb_client))
+        finally:
+            mongodb_client.close()
+
+    client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+    try:
+        print(migrate_vector_layout(
+            client,
+            args.target_layout,
+            settings.QDRANT_SHARED_COLLECTION_NAME,
+            project_ids=project_ids,
+            delete_source=args.delete_source,
+            batch_size=args.batch_size
+        ))
+    finally:
+        client.close()
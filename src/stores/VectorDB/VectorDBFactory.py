@@ -1,4 +1,6 @@
 from .providers.QdrantProvider import QdrantProvider
+from .providers.AsyncQdrantProvider import AsyncQdrantProvider
+from .providers.NumpyMmapProvider import NumpyMmapProvider
 from controllers.VectorStoreController import VectorStoreController, BaseController
 
 class VectorDBFactory():
@@ -10,5 +12,11 @@ class VectorDBFactory():
         if provider == "QDRANT":
             return QdrantProvider()
         
+        elif provider == "QDRANT_ASYNC":
+            return AsyncQdrantProvider()
+        
+        elif provider == "LOCAL":
+            return NumpyMmapProvider()
+        
         else:
             return None
\ No newline at end of file
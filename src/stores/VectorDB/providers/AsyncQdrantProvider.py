@@ -0,0 +1,241 @@
+from .QdrantProviderBase import QdrantProviderBase
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import VectorParams, FilterSelector
+from ..CollectionProfiles import CollectionProfile
+from helpers.metrics import track_vector_db_call
+from typing import List
+
+class AsyncQdrantProvider(QdrantProviderBase):
+    """
+    Qdrant provider over AsyncQdrantClient, every data method is a coroutine.
+    One client (and its connection pool) is reused for the provider lifetime.
+    """
+    metrics_backend = "qdrant_async"
+
+    def init_connection(self):
+        self.client = AsyncQdrantClient(
+            host=self.app_settings.QDRANT_HOST,
+            port=self.app_settings.QDRANT_PORT,
+            grpc_port=self.app_settings.QDRANT_GRPC_PORT,
+            prefer_grpc=self.app_settings.QDRANT_PREFER_GRPC
+        )
+
+    async def disconnect(self):
+        if self.client:
+            await self.client.close()
+        self.client = None
+
+    async def physical_collection_exist(self, collection_name: str):
+        """
+        Whether the Qdrant collection holding collection_name exists, in the shared layout the shared one.
+        """
+        if not self.client:
+            raise ConnectionError("Not connected to database")
+
+        # only positive answers are cached, a collection created by another process shows up right away
+        collection_name = self.layout.physical_name(collection_name)
+        cache_key = self.collection_cache_key(collection_name)
+        if self.metadata_cache.get(cache_key):
+            return True
+
+        exists = await self.client.collection_exists(collection_name=collection_name)
+        if exists:
+            self.metadata_cache.set(cache_key, True)
+        return exists
+
+    async def collection_exist(self, collection_name: str):
+        """
+        Whether the project has vectors to search. The shared collection exists for every project,
+        so there a project only exists once it has points.
+        """
+        if not await self.physical_collection_exist(collection_name):
+            return False
+        if not self.layout.is_shared:
+            return True
+
+        cache_key = self.tenant_cache_key(collection_name)
+        if self.metadata_cache.get(cache_key):
+            return True
+
+        with track_vector_db_call(self.metrics_backend, "count"):
+            result = await self.client.count(
+                collection_name=self.layout.shared_collection_name,
+                count_filter=self.tenant_filter(collection_name),
+                exact=False
+            )
+        exists = result.count > 0
+        if exists:
+            self.metadata_cache.set(cache_key, True)
+        return exists
+
+    async def list_all_collections(self) -> List[str]:
+        return await self.client.get_collections()
+
+    async def get_collection_info(self, collection_name: str) -> dict:
+        return await self.client.get_collection(collection_name=self.layout.physical_name(collection_name))
+
+    async def create_collection(self, collection_name: str, vectors_config: VectorParams, profile: CollectionProfile = None):
+        if await self.physical_collection_exist(collection_name=collection_name):
+            return False
+
+        collection_name = self.layout.physical_name(collection_name)
+        result = await self.client.create_collection(**self.create_collection_kwargs(collection_name, vectors_config, profile))
+        if self.layout.is_shared:
+            await self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=self.layout.TENANT_FIELD,
+                field_schema=self.layout.tenant_index_schema()
+            )
+        self.metadata_cache.set(self.collection_cache_key(collection_name), True)
+        return result
+
+    async def apply_collection_profile(self, collection_name: str, profile: CollectionProfile):
+        """
+        Migrate an existing collection to profile, Qdrant rebuilds the affected segments in the background.
+        In the shared layout this changes the collection of every project.
+        """
+        if not await self.physical_collection_exist(collection_name=collection_name):
+            return False
+
+        return await self.client.update_collection(**self.update_collection_kwargs(collection_name, profile))
+
+    async def delete_collection(self, collection_name: str):
+        if await self.physical_collection_exist(collection_name=collection_name):
+            if self.layout.is_shared:
+                # only the project's points go, the shared collection stays
+                self.metadata_cache.invalidate(self.tenant_cache_key(collection_name))
+                return await self.client.delete(
+                    collection_name=self.layout.physical_name(collection_name),
+                    points_selector=FilterSelector(filter=self.tenant_filter(collection_name))
+                )
+            self.metadata_cache.invalidate(self.collection_cache_key(collection_name))
+            return await self.client.delete_collection(collection_name=collection_name)
+
+    async def insert_vector(self, collection_name: str, vector: List, metadata: dict = None, record_id: str = None):
+        if not await self.physical_collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            points = [self.build_point(collection_name, vector, metadata, record_id)]
+
+            with track_vector_db_call(self.metrics_backend, "upsert", 1):
+                operation_info = await self.client.upsert(
+                    collection_name=self.layout.physical_name(collection_name),
+                    wait=True,
+                    points=points
+                )
+
+            return operation_info
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    async def insert_many_vectors(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict],
+                                  batch_size: int = 256, wait: bool = True, record_ids: List[str] = None):
+        """
+        Upsert points in batches, see QdrantProvider.insert_many_vectors.
+        """
+        try:
+            operation_info = None
+            record_ids = record_ids or [None] * len(vectors)
+
+            for i in range(0, len(vectors), batch_size):
+                points = self.build_points(
+                    collection_name,
+                    vectors[i:i+batch_size], texts[i:i+batch_size], metadatas[i:i+batch_size], record_ids[i:i+batch_size]
+                )
+                is_last_batch = i + batch_size >= len(vectors)
+
+                with track_vector_db_call(self.metrics_backend, "upsert", len(points)):
+                    operation_info = await self.client.upsert(
+                        collection_name=self.layout.physical_name(collection_name),
+                        wait=wait and is_last_batch,
+                        points=points
+                    )
+
+            return operation_info
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    async def search(self, collection_name: str, query_vector: List, top_k: int = 5, search_params=None,
+                     with_vectors: bool = False) -> List[dict]:
+        if not await self.collection_exist(collection_name=collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+
+        try:
+            with track_vector_db_call(self.metrics_backend, "search"):
+                results = await self.client.search(
+                    **self.search_kwargs(collection_name, query_vector, top_k, search_params, with_vectors)
+                )
+
+            return self.format_results(results)
+
+        except Exception as e:
+            self.logger.error(f"Search error: {e}")
+            return []
+
+    async def search_batch(self, collection_name: str, query_vectors: List, top_ks: List[int], search_params=None,
+                           with_vectors: bool = False) -> List[List[dict]]:
+        """
+        Run several searches against one collection in a single request, results are in query order.
+        """
+        if not await self.collection_exist(collection_name=collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+
+        requests = self.search_requests(collection_name, query_vectors, top_ks, search_params, with_vectors)
+
+        try:
+            with track_vector_db_call(self.metrics_backend, "search_batch"):
+                batch_results = await self.client.search_batch(
+                    collection_name=self.layout.physical_name(collection_name),
+                    requests=requests
+                )
+
+            return [self.format_results(results) for results in batch_results]
+
+        except Exception as e:
+            self.logger.error(f"Search error: {e}")
+            return [[] for _ in query_vectors]
+
+    async def delete_vector(self, collection_name: str, vector_id):
+        if not await self.physical_collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            await self.client.delete(
+                collection_name=self.layout.physical_name(collection_name),
+                points_selector=[vector_id]
+            )
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    async def delete_vectors(self, collection_name: str, vector_ids: List, wait: bool = True):
+        if not await self.physical_collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            with track_vector_db_call(self.metrics_backend, "delete", len(vector_ids)):
+                await self.client.delete(
+                    collection_name=self.layout.physical_name(collection_name),
+                    points_selector=FilterSelector(filter=self.ids_filter(collection_name, vector_ids)),
+                    wait=wait
+                )
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    async def clear_db(self):
+        if not self.client:
+            raise ConnectionError("Not connected to database")
+
+        for collection in (await self.client.get_collections()).collections:
+            await self.client.delete_collection(collection.name)
+        self.metadata_cache.invalidate_prefix("qdrant:collection:")
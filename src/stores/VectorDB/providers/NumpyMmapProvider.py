@@ -0,0 +1,387 @@
+from .VectorDBProvider import VectorDBProviderInterface
+from qdrant_client.models import Distance, VectorParams
+from helpers.config import get_settings, Settings
+from helpers.metrics import track_vector_db_call
+from typing import List, Dict
+import numpy as np
+import threading
+import shutil
+import fcntl
+import json
+import uuid
+import logging
+import os
+
+class MmapCollection:
+    """
+    One collection on disk: an append-only float32 matrix (vectors.f32), an append-only
+    payload log (payloads.jsonl) and a tombstone log (deleted.jsonl).
+    Rows become visible to readers only once their payload line is complete,
+    so readers never need a lock while the single writer appends.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.vectors_path = os.path.join(path, "vectors.f32")
+        self.payloads_path = os.path.join(path, "payloads.jsonl")
+        self.deleted_path = os.path.join(path, "deleted.jsonl")
+        self.lock_path = os.path.join(path, ".lock")
+
+        with open(os.path.join(path, "config.json")) as f:
+            config = json.load(f)
+        self.size = config["size"]
+        self.distance = config["distance"]
+
+        self.ids = []
+        self.payloads = []
+        self.payloads_offset = 0
+        self.id_codes = {}         # point id -> code, an index into deleted_before
+        self.row_codes = np.zeros(0, dtype=np.int64)        # row -> code of its point id
+        self.deleted_before = np.zeros(0, dtype=np.float64)  # code -> rows below this index are deleted
+        self.deleted_offset = 0
+        self.alive = np.ones(0, dtype=bool)
+        self.matrix = None
+        self.refresh_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path: str, size: int, distance: str):
+        os.makedirs(path, exist_ok=True)
+        for file_name in ["vectors.f32", "payloads.jsonl", "deleted.jsonl"]:
+            open(os.path.join(path, file_name), "ab").close()
+
+        # config is written last, its presence marks the collection as complete
+        tmp_path = os.path.join(path, "config.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"size": size, "distance": distance}, f)
+        os.replace(tmp_path, os.path.join(path, "config.json"))
+        return cls(path)
+
+    def read_new_lines(self, file_path: str, offset: int):
+        """
+        Read complete lines appended after offset, returning them with the new offset.
+        """
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+
+        end = data.rfind(b"\n") + 1
+        lines = [json.loads(line) for line in data[:end].splitlines() if line.strip()]
+        return lines, offset + end
+
+    def get_id_code(self, point_id: str) -> int:
+        return self.id_codes.setdefault(point_id, len(self.id_codes))
+
+    def refresh(self):
+        with self.refresh_lock:
+            records, self.payloads_offset = self.read_new_lines(self.payloads_path, self.payloads_offset)
+            new_codes = []
+            for record in records:
+                self.ids.append(record["id"])
+                self.payloads.append(record["payload"])
+                new_codes.append(self.get_id_code(record["id"]))
+
+            deleted, self.deleted_offset = self.read_new_lines(self.deleted_path, self.deleted_offset)
+            tombstones = []
+            for tombstone in deleted:
+                # older tombstones are bare ids and hide every row with that id
+                point_id, before = (tombstone, float("inf")) if isinstance(tombstone, str) else tombstone
+                tombstones.append((self.get_id_code(point_id), before))
+
+            if new_codes:
+                self.row_codes = np.concatenate([self.row_codes, np.array(new_codes, dtype=np.int64)])
+            if len(self.id_codes) > self.deleted_before.shape[0]:
+                self.deleted_before = np.concatenate([
+                    self.deleted_before,
+                    np.zeros(len(self.id_codes) - self.deleted_before.shape[0], dtype=np.float64)
+                ])
+            for code, before in tombstones:
+                self.deleted_before[code] = max(before, self.deleted_before[code])
+
+            num_rows = len(self.ids)
+            if self.alive.shape[0] != num_rows or tombstones:
+                self.alive = np.arange(num_rows) >= self.deleted_before[self.row_codes]
+
+            if num_rows == 0:
+                self.matrix = None
+            elif self.matrix is None or self.matrix.shape[0] != num_rows:
+                self.matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(num_rows, self.size))
+
+    def prepare_vectors(self, vectors: List) -> np.ndarray:
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(-1, self.size)
+        if self.distance == Distance.COSINE.value:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.where(norms == 0, 1, norms)
+        return matrix
+
+    def append(self, vectors: List, payloads: List[dict], point_ids: List[str] = None) -> List[str]:
+        matrix = self.prepare_vectors(vectors)
+        point_ids = [point_id or str(uuid.uuid4()) for point_id in (point_ids or [None] * len(payloads))]
+
+        # upsert: rows already stored under one of these ids are tombstoned first
+        self.refresh()
+        existing_ids = {point_id for point_id in point_ids if point_id in self.id_codes}
+        if existing_ids:
+            self.delete(list(existing_ids))
+
+        with open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # a crashed writer may have left vector rows without payload lines, drop them first
+                num_rows = self.count_payload_rows()
+                with open(self.vectors_path, "r+b") as f:
+                    f.truncate(num_rows * self.size * 4)
+                    f.seek(0, os.SEEK_END)
+                    f.write(matrix.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                with open(self.payloads_path, "a", encoding="utf-8") as f:
+                    f.write("".join(
+                        json.dumps({"id": point_id, "payload": payload}) + "\n"
+                        for point_id, payload in zip(point_ids, payloads)
+                    ))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        return point_ids
+
+    def count_payload_rows(self) -> int:
+        # callers hold the write lock, so the complete payload lines read by refresh are all the rows
+        self.refresh()
+        return len(self.ids)
+
+    def delete(self, point_ids: List[str]):
+        with open(self.lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # a tombstone only hides rows written before it, so a deleted id can be inserted again
+                num_rows = self.count_payload_rows()
+                with open(self.deleted_path, "a", encoding="utf-8") as f:
+                    f.write("".join(json.dumps([point_id, num_rows]) + "\n" for point_id in point_ids))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def search(self, query_vector: List, top_k: int = 5, with_vectors: bool = False) -> List[dict]:
+        return self.search_batch([query_vector], [top_k], with_vectors=with_vectors)[0]
+
+    def search_batch(self, query_vectors: List, top_ks: List[int], with_vectors: bool = False) -> List[List[dict]]:
+        """
+        Score every query against the matrix in one matrix product, then take each query's top-k.
+        """
+        self.refresh()
+        if self.matrix is None or not query_vectors:
+            return [[] for _ in query_vectors]
+
+        queries = self.prepare_vectors(query_vectors)
+        matrix = self.matrix
+
+        # higher is better for ranking, euclidean distances are negated
+        is_euclid = self.distance == Distance.EUCLID.value
+        if is_euclid:
+            squared = (
+                np.einsum("ij,ij->i", matrix, matrix)[None, :]
+                - 2 * (queries @ matrix.T)
+                + np.einsum("ij,ij->i", queries, queries)[:, None]
+            )
+            scores = -np.sqrt(np.maximum(squared, 0))
+        else:
+            scores = queries @ matrix.T
+        scores = np.where(self.alive[None, :], scores, -np.inf)
+        num_alive = int(self.alive.sum())
+
+        batch_results = []
+        for query_scores, top_k in zip(scores, top_ks):
+            top_k = min(top_k, num_alive)
+            if top_k <= 0:
+                batch_results.append([])
+                continue
+
+            candidates = np.argpartition(-query_scores, top_k - 1)[:top_k]
+            best = candidates[np.argsort(-query_scores[candidates])]
+            batch_results.append([
+                {
+                    "id": self.ids[row],
+                    "score": float(-query_scores[row]) if is_euclid else float(query_scores[row]),
+                    "payload": self.payloads[row],
+                    "vector": matrix[row].tolist() if with_vectors else None
+                }
+                for row in best
+            ])
+
+        return batch_results
+
+    def count(self) -> int:
+        self.refresh()
+        return int(self.alive.sum())
+
+
+class NumpyMmapProvider(VectorDBProviderInterface):
+    """
+    Zero-service vector store: each collection is a memory-mapped float32 matrix
+    searched with vectorized NumPy top-k. Safe for many readers and one writer per collection.
+    """
+
+    def __init__(self):
+        self.db_path = None
+        self.collections = {}
+        self.app_settings = get_settings()
+        self.logger = logging.getLogger(__name__)
+
+    def init_connection(self, db_path: str = None):
+        db_path = db_path or self.app_settings.VECTOR_DB_PATH
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), "assets", db_path)
+
+        self.db_path = db_path
+        os.makedirs(self.db_path, exist_ok=True)
+
+    def disconnect(self):
+        self.collections = {}
+        self.db_path = None
+
+    def get_collection_path(self, collection_name: str) -> str:
+        return os.path.join(self.db_path, collection_name)
+
+    def get_collection(self, collection_name: str) -> MmapCollection:
+        collection = self.collections.get(collection_name)
+        if collection is None:
+            collection = MmapCollection(self.get_collection_path(collection_name))
+            self.collections[collection_name] = collection
+        return collection
+
+    def collection_exist(self, collection_name: str):
+        if not self.db_path:
+            raise ConnectionError("Not connected to database")
+        return os.path.exists(os.path.join(self.get_collection_path(collection_name), "config.json"))
+
+    def list_all_collections(self) -> List[str]:
+        return [
+            collection_name for collection_name in sorted(os.listdir(self.db_path))
+            if self.collection_exist(collection_name)
+        ]
+
+    def get_collection_info(self, collection_name: str) -> dict:
+        collection = self.get_collection(collection_name)
+        return {
+            "size": collection.size,
+            "distance": collection.distance,
+            "points_count": collection.count(),
+        }
+
+    def create_collection(self, collection_name: str, vectors_config: VectorParams, profile=None):
+        if self.collection_exist(collection_name=collection_name):
+            return False
+
+        distance = getattr(vectors_config.distance, "value", vectors_config.distance)
+        self.collections[collection_name] = MmapCollection.create(
+            self.get_collection_path(collection_name),
+            size=vectors_config.size,
+            distance=distance
+        )
+        return True
+
+    def apply_collection_profile(self, collection_name: str, profile):
+        # vectors are always stored as a memory-mapped float32 matrix, profiles don't apply
+        return False
+
+    def delete_collection(self, collection_name: str):
+        if self.collection_exist(collection_name=collection_name):
+            self.collections.pop(collection_name, None)
+            shutil.rmtree(self.get_collection_path(collection_name))
+            return True
+
+    def insert_vector(self, collection_name: str, vector: List, metadata: dict = None, record_id: str = None):
+        if not self.collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            return self.get_collection(collection_name).append([vector], [metadata or {}], [record_id])
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    def insert_many_vectors(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict],
+                            batch_size: int = 256, wait: bool = True, record_ids: List[str] = None):
+        """
+        Append points in batches, with the same payload schema as QdrantProvider.
+        Writes are synchronous, so wait has nothing to wait for.
+        """
+        try:
+            collection = self.get_collection(collection_name)
+            record_ids = record_ids or [None] * len(vectors)
+            point_ids = []
+
+            for i in range(0, len(vectors), batch_size):
+                with track_vector_db_call("local", "upsert", len(vectors[i:i+batch_size])):
+                    point_ids += collection.append(
+                        vectors[i:i+batch_size],
+                        [
+                            {**(metadata or {}), "original_text": text}
+                            for text, metadata in zip(texts[i:i+batch_size], metadatas[i:i+batch_size])
+                        ],
+                        record_ids[i:i+batch_size]
+                    )
+
+            return point_ids
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    def search(self, collection_name: str, query_vector: List, top_k: int = 5, search_params=None,
+               with_vectors: bool = False) -> List[dict]:
+        if not self.collection_exist(collection_name=collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+
+        try:
+            with track_vector_db_call("local", "search"):
+                return self.get_collection(collection_name).search(query_vector, top_k=top_k, with_vectors=with_vectors)
+
+        except Exception as e:
+            self.logger.error(f"Search error: {e}")
+            return []
+
+    def search_batch(self, collection_name: str, query_vectors: List, top_ks: List[int], search_params=None,
+                     with_vectors: bool = False) -> List[List[dict]]:
+        if not self.collection_exist(collection_name=collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+
+        try:
+            with track_vector_db_call("local", "search_batch"):
+                return self.get_collection(collection_name).search_batch(query_vectors, top_ks, with_vectors=with_vectors)
+
+        except Exception as e:
+            self.logger.error(f"Search error: {e}")
+            return [[] for _ in query_vectors]
+
+    def delete_vector(self, collection_name: str, vector_id):
+        if not self.collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            self.get_collection(collection_name).delete([vector_id])
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    def delete_vectors(self, collection_name: str, vector_ids: List, wait: bool = True):
+        if not self.collection_exist(collection_name=collection_name):
+            return False
+
+        try:
+            with track_vector_db_call("local", "delete", len(vector_ids)):
+                self.get_collection(collection_name).delete(vector_ids)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+
+    def clear_db(self):
+        if not self.db_path:
+            raise ConnectionError("Not connected to database")
+
+        for collection_name in self.list_all_collections():
+            self.delete_collection(collection_name)
@@ -1,63 +1,121 @@
 from .VectorDBProvider import VectorDBProviderInterface
+from .QdrantProviderBase import QdrantProviderBase
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, Distance, VectorParams
-from helpers.config import get_settings, Settings
-from typing import List, Dict
-import uuid
-import logging
+from qdrant_client.models import VectorParams, FilterSelector
+from ..CollectionProfiles import CollectionProfile
+from helpers.metrics import track_vector_db_call
+from typing import List
 
-class QdrantProvider(VectorDBProviderInterface):
-    def __init__(self):
-        self.client = None
-        self.app_settings = get_settings()
-        self.logger = logging.getLogger(__name__)
-        
+class QdrantProvider(QdrantProviderBase):
     def init_connection(self):
         # remember the problem of local mode (celery and fastAPI can't access db concurrently)
         self.client = QdrantClient(host=self.app_settings.QDRANT_HOST, port=self.app_settings.QDRANT_PORT)
         
     def disconnect(self):
+        if self.client:
+            self.client.close()
         self.client = None
     
-    def collection_exist(self, collection_name: str):
+    def physical_collection_exist(self, collection_name: str):
+        """
+        Whether the Qdrant collection holding collection_name exists, in the shared layout the shared one.
+        """
         if not self.client:
             raise ConnectionError("Not connected to database")
-        return self.client.collection_exists(collection_name=collection_name)
+        
+        # only positive answers are cached, a collection created by another process shows up right away
+        collection_name = self.layout.physical_name(collection_name)
+        cache_key = self.collection_cache_key(collection_name)
+        if self.metadata_cache.get(cache_key):
+            return True
+        
+        exists = self.client.collection_exists(collection_name=collection_name)
+        if exists:
+            self.metadata_cache.set(cache_key, True)
+        return exists
+    
+    def collection_exist(self, collection_name: str):
+        """
+        Whether the project has vectors to search. The shared collection exists for every project,
+        so there a project only exists once it has points.
+        """
+        if not self.physical_collection_exist(collection_name):
+            return False
+        if not self.layout.is_shared:
+            return True
+        
+        cache_key = self.tenant_cache_key(collection_name)
+        if self.metadata_cache.get(cache_key):
+            return True
+        
+        with track_vector_db_call(self.metrics_backend, "count"):
+            result = self.client.count(
+                collection_name=self.layout.shared_collection_name,
+                count_filter=self.tenant_filter(collection_name),
+                exact=False
+            )
+        exists = result.count > 0
+        if exists:
+            self.metadata_cache.set(cache_key, True)
+        return exists
     
     def list_all_collections(self) -> List[str]:
         return self.client.get_collections()
     
     def get_collection_info(self, collection_name: str) -> dict:
-        return self.client.get_collection(collection_name=collection_name)
+        return self.client.get_collection(collection_name=self.layout.physical_name(collection_name))
     
-    def create_collection(self, collection_name: str, vectors_config: VectorParams):
-        if self.collection_exist(collection_name=collection_name):
+    def create_collection(self, collection_name: str, vectors_config: VectorParams, profile: CollectionProfile = None):
+        if self.physical_collection_exist(collection_name=collection_name):
             return False
         
-        return self.client.create_collection(
-                    collection_name=collection_name,
-                    vectors_config=vectors_config,
-                )
+        collection_name = self.layout.physical_name(collection_name)
+        result = self.client.create_collection(**self.create_collection_kwargs(collection_name, vectors_config, profile))
+        if self.layout.is_shared:
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=self.layout.TENANT_FIELD,
+                field_schema=self.layout.tenant_index_schema()
+            )
+        self.metadata_cache.set(self.collection_cache_key(collection_name), True)
+        return result
+        
+    def apply_collection_profile(self, collection_name: str, profile: CollectionProfile):
+        """
+        Migrate an existing collection to profile, Qdrant rebuilds the affected segments in the background.
+        In the shared layout this changes the collection of every project.
+        """
+        if not self.physical_collection_exist(collection_name=collection_name):
+            return False
+        
+        return self.client.update_collection(**self.update_collection_kwargs(collection_name, profile))
         
     def delete_collection(self, collection_name: str):
-        if self.collection_exist(collection_name=collection_name):
+        if self.physical_collection_exist(collection_name=collection_name):
+            if self.layout.is_shared:
+                # only the project's points go, the shared collection stays
+                self.metadata_cache.invalidate(self.tenant_cache_key(collection_name))
+                return self.client.delete(
+                    collection_name=self.layout.physical_name(collection_name),
+                    points_selector=FilterSelector(filter=self.tenant_filter(collection_name))
+                )
+            self.metadata_cache.invalidate(self.collection_cache_key(collection_name))
             return self.client.delete_collection(collection_name=collection_name)
     
         
-    def insert_vector(self, collection_name: str, vector: List, metadata: dict = None):
-        if not self.collection_exist(collection_name=collection_name):
+    def insert_vector(self, collection_name: str, vector: List, metadata: dict = None, record_id: str = None):
+        if not self.physical_collection_exist(collection_name=collection_name):
             return False
         
         try:
-            points = [
-                PointStruct(id=str(uuid.uuid4()), vector=vector, payload=metadata),
-            ]
+            points = [self.build_point(collection_name, vector, metadata, record_id)]
             
-            operation_info = self.client.upsert(
-                collection_name=collection_name,
-                wait=True,
-                points=points
-            )
+            with track_vector_db_call(self.metrics_backend, "upsert", 1):
+                operation_info = self.client.upsert(
+                    collection_name=self.layout.physical_name(collection_name),
+                    wait=True,
+                    points=points
+                )
             
             return operation_info
         
@@ -66,19 +124,31 @@ class QdrantProvider(VectorDBProviderInterface):
             return None
         
         
-    def insert_many_vectors(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict]):
-        
+    def insert_many_vectors(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict],
+                            batch_size: int = 256, wait: bool = True, record_ids: List[str] = None):
+        """
+        Upsert points in batches, keeping the same payload schema as insert_vector.
+        With wait=True only the last batch waits: updates are applied in order,
+        so it acts as a barrier for the batches sent before it.
+        record_ids makes the upsert idempotent, points without one get a random id.
+        """
         try:
-            points = [
-                PointStruct(id=str(uuid.uuid4()), vector=vector, payload={"text": text, "metadata": metadata})
-                for vector, text, metadata in zip(vectors, texts, metadatas)
-            ]
+            operation_info = None
+            record_ids = record_ids or [None] * len(vectors)
             
-            operation_info = self.client.upsert(
-                collection_name=collection_name,
-                wait=True,
-                points=points
-            )
+            for i in range(0, len(vectors), batch_size):
+                points = self.build_points(
+                    collection_name,
+                    vectors[i:i+batch_size], texts[i:i+batch_size], metadatas[i:i+batch_size], record_ids[i:i+batch_size]
+                )
+                is_last_batch = i + batch_size >= len(vectors)
+                
+                with track_vector_db_call(self.metrics_backend, "upsert", len(points)):
+                    operation_info = self.client.upsert(
+                        collection_name=self.layout.physical_name(collection_name),
+                        wait=wait and is_last_batch,
+                        points=points
+                    )
             
             return operation_info
         
@@ -87,40 +157,54 @@ class QdrantProvider(VectorDBProviderInterface):
             return None
         
     
-    def search(self, collection_name: str, query_vector: List, top_k: int = 5) -> List[dict]:
+    def search(self, collection_name: str, query_vector: List, top_k: int = 5, search_params=None,
+               with_vectors: bool = False) -> List[dict]:
         if not self.collection_exist(collection_name=collection_name):
             raise ValueError(f"Collection '{collection_name}' does not exist")
 
         try:
 
-            results = self.client.search(
-                collection_name=collection_name,
-                query_vector=query_vector,
-                limit=top_k,
-                with_payload=True,
-                with_vectors=False
-            )
+            with track_vector_db_call(self.metrics_backend, "search"):
+                results = self.client.search(
+                    **self.search_kwargs(collection_name, query_vector, top_k, search_params, with_vectors)
+                )
             
-            return [
-                {
-                    "id": hit.id,
-                    "score": hit.score,
-                    "payload": hit.payload
-                }
-                for hit in results
-            ]
+            return self.format_results(results)
     
         except Exception as e:
             self.logger.error(f"Search error: {e}")
             return []
         
-    def delete_vector(self, collection_name: str, vector_id):
+    def search_batch(self, collection_name: str, query_vectors: List, top_ks: List[int], search_params=None,
+                     with_vectors: bool = False) -> List[List[dict]]:
+        """
+        Run several searches against one collection in a single request, results are in query order.
+        """
         if not self.collection_exist(collection_name=collection_name):
+            raise ValueError(f"Collection '{collection_name}' does not exist")
+        
+        requests = self.search_requests(collection_name, query_vectors, top_ks, search_params, with_vectors)
+        
+        try:
+            with track_vector_db_call(self.metrics_backend, "search_batch"):
+                batch_results = self.client.search_batch(
+                    collection_name=self.layout.physical_name(collection_name),
+                    requests=requests
+                )
+        
+            return [self.format_results(results) for results in batch_results]
+        
+        except Exception as e:
+            self.logger.error(f"Search error: {e}")
+            return [[] for _ in query_vectors]
+        
+    def delete_vector(self, collection_name: str, vector_id):
+        if not self.physical_collection_exist(collection_name=collection_name):
             return False
 
         try:
             self.client.delete_vector(
-                collection_name=collection_name,
+                collection_name=self.layout.physical_name(collection_name),
                 vector_id=vector_id
             )
             return True
@@ -129,9 +213,27 @@ class QdrantProvider(VectorDBProviderInterface):
             self.logger.error(f"Error: {e}")
             return None
         
+    def delete_vectors(self, collection_name: str, vector_ids: List, wait: bool = True):
+        if not self.physical_collection_exist(collection_name=collection_name):
+            return False
+        
+        try:
+            with track_vector_db_call(self.metrics_backend, "delete", len(vector_ids)):
+                self.client.delete(
+                    collection_name=self.layout.physical_name(collection_name),
+                    points_selector=FilterSelector(filter=self.ids_filter(collection_name, vector_ids)),
+                    wait=wait
+                )
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Error: {e}")
+            return None
+        
     def clear_db(self):
         if not self.client:
             raise ConnectionError("Not connected to database")
         
         for collection in self.client.get_collections().collections:
-            self.client.delete_collection(collection.name)
\ No newline at end of file
+            self.client.delete_collection(collection.name)
+        self.metadata_cache.invalidate_prefix("qdrant:collection:")
\ No newline at end of file
@@ -0,0 +1,107 @@
+from .VectorDBProvider import VectorDBProviderInterface
+from qdrant_client.models import PointStruct, VectorParams, VectorParamsDiff, Disabled, SearchRequest, Filter, HasIdCondition
+from ..CollectionProfiles import CollectionProfile
+from ..CollectionLayout import CollectionLayout
+from helpers.config import get_settings
+from helpers.metadata_cache import get_metadata_cache
+from typing import List, Optional
+import uuid
+import logging
+
+class QdrantProviderBase(VectorDBProviderInterface):
+    """
+    What QdrantProvider and AsyncQdrantProvider share: the layout mapping, cache keys, and building
+    the points, filters and requests they send and formatting the results. Subclasses make the client calls.
+    """
+    # label of the vector_db metrics
+    metrics_backend = "qdrant"
+
+    def __init__(self):
+        self.client = None
+        self.app_settings = get_settings()
+        self.metadata_cache = get_metadata_cache()
+        self.layout = CollectionLayout.from_settings(self.app_settings)
+        self.logger = logging.getLogger(self.__class__.__module__)
+
+    def collection_cache_key(self, collection_name: str) -> str:
+        return f"qdrant:collection:{collection_name}"
+
+    def tenant_cache_key(self, collection_name: str) -> str:
+        return f"qdrant:collection:{self.layout.shared_collection_name}:tenant:{collection_name}"
+
+    def create_collection_kwargs(self, collection_name: str, vectors_config: VectorParams,
+                                 profile: CollectionProfile = None) -> dict:
+        return {
+            "collection_name": self.layout.physical_name(collection_name),
+            "vectors_config": vectors_config,
+            "hnsw_config": self.layout.hnsw_config(profile),
+            "quantization_config": profile.quantization_config() if profile else None,
+        }
+
+    def update_collection_kwargs(self, collection_name: str, profile: CollectionProfile) -> dict:
+        return {
+            "collection_name": self.layout.physical_name(collection_name),
+            "vectors_config": {"": VectorParamsDiff(on_disk=profile.on_disk)},
+            "hnsw_config": self.layout.hnsw_config(profile),
+            "quantization_config": profile.quantization_config() or Disabled.DISABLED,
+        }
+
+    def build_point(self, collection_name: str, vector: List, payload: dict = None, record_id: str = None) -> PointStruct:
+        return PointStruct(
+            id=record_id or str(uuid.uuid4()),
+            vector=vector,
+            payload=self.layout.tenant_payload(collection_name, payload)
+        )
+
+    def build_points(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict],
+                     record_ids: List[str]) -> List[PointStruct]:
+        return [
+            self.build_point(collection_name, vector, {**(metadata or {}), "original_text": text}, record_id)
+            for vector, text, metadata, record_id in zip(vectors, texts, metadatas, record_ids)
+        ]
+
+    def tenant_filter(self, collection_name: str) -> Optional[Filter]:
+        return self.layout.tenant_filter(collection_name)
+
+    def ids_filter(self, collection_name: str, vector_ids: List) -> Filter:
+        # the tenant condition keeps a shared collection delete inside the project
+        tenant_filter = self.tenant_filter(collection_name)
+        return Filter(must=[HasIdCondition(has_id=vector_ids)] + (tenant_filter.must if tenant_filter else []))
+
+    def search_kwargs(self, collection_name: str, query_vector: List, top_k: int, search_params=None,
+                      with_vectors: bool = False) -> dict:
+        return {
+            "collection_name": self.layout.physical_name(collection_name),
+            "query_vector": query_vector,
+            "query_filter": self.tenant_filter(collection_name),
+            "limit": top_k,
+            "search_params": search_params,
+            "with_payload": True,
+            "with_vectors": with_vectors,
+        }
+
+    def search_requests(self, collection_name: str, query_vectors: List, top_ks: List[int], search_params=None,
+                        with_vectors: bool = False) -> List[SearchRequest]:
+        query_filter = self.tenant_filter(collection_name)
+        return [
+            SearchRequest(
+                vector=query_vector,
+                filter=query_filter,
+                limit=top_k,
+                params=search_params,
+                with_payload=True,
+                with_vector=with_vectors
+            )
+            for query_vector, top_k in zip(query_vectors, top_ks)
+        ]
+
+    def format_results(self, hits: List) -> List[dict]:
+        return [
+            {
+                "id": hit.id,
+                "score": hit.score,
+                "payload": hit.payload,
+                "vector": hit.vector
+            }
+            for hit in hits
+        ]
@@ -25,7 +25,11 @@ class VectorDBProviderInterface(ABC):
         pass
     
     @abstractmethod
-    def create_collection(self, collection_name: str, vectors_config: VectorParams):
+    def create_collection(self, collection_name: str, vectors_config: VectorParams, profile=None):
+        pass
+    
+    @abstractmethod
+    def apply_collection_profile(self, collection_name: str, profile):
         pass
     
     @abstractmethod
@@ -33,11 +37,12 @@ class VectorDBProviderInterface(ABC):
         pass
     
     @abstractmethod
-    def insert_vector(self, collection_name: str, vector: List, metadata: dict = None):
+    def insert_vector(self, collection_name: str, vector: List, metadata: dict = None, record_id: str = None):
         pass
     
     @abstractmethod
-    def insert_many_vectors(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict]):
+    def insert_many_vectors(self, collection_name: str, vectors: List, texts: List[str], metadatas: List[dict],
+                            batch_size: int = 256, wait: bool = True, record_ids: List[str] = None):
         pass
     
     @abstractmethod
@@ -45,7 +50,17 @@ class VectorDBProviderInterface(ABC):
         pass
     
     @abstractmethod
-    def search(self, collection_name: str, query_vector: List, top_k: int = 5):
+    def delete_vectors(self, collection_name: str, vector_ids: List, wait: bool = True):
+        pass
+    
+    @abstractmethod
+    def search(self, collection_name: str, query_vector: List, top_k: int = 5, search_params=None,
+               with_vectors: bool = False):
+        pass
+    
+    @abstractmethod
+    def search_batch(self, collection_name: str, query_vectors: List, top_ks: List[int], search_params=None,
+                     with_vectors: bool = False):
         pass
     
     @abstractmethod
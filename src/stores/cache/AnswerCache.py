@@ -0,0 +1,165 @@
+from helpers.config import get_settings
+from typing import List, Optional
+import numpy as np
+import threading
+import time
+
+class AnswerCache:
+    """
+    In-process cache of generated RAG answers, looked up by cosine similarity of the query embedding.
+    Lexical answers have no query embedding, they are looked up by their normalized query text.
+    Entries are grouped per (project_id, retrieval params), expire after a TTL and are dropped
+    as soon as the project's ingest generation changes, i.e. new chunks were indexed.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.95, ttl_seconds: float = 3600.0,
+                 max_entries_per_project: int = 1000):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_project = max_entries_per_project
+
+        # (project_id, mode, top_k, refinement) -> {"generation", "vectors", "entries", "matrix", "texts"}
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            max_entries_per_project=settings.ANSWER_CACHE_MAX_ENTRIES_PER_PROJECT
+        )
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": sum(len(bucket["entries"]) + len(bucket["texts"]) for bucket in self.buckets.values()),
+            "similarity_threshold": self.similarity_threshold,
+        }
+
+    def normalize(self, vector: List[float]) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def get_bucket(self, key: tuple, generation: int) -> dict:
+        bucket = self.buckets.get(key)
+        if bucket is not None and bucket["generation"] != generation:
+            self.invalidations += 1
+            bucket = None
+
+        if bucket is None:
+            bucket = {"generation": generation, "vectors": [], "entries": [], "matrix": None, "texts": {}}
+            self.buckets[key] = bucket
+        return bucket
+
+    def drop_expired(self, bucket: dict, now: float):
+        # entries are appended in time order, so the expired ones are a prefix
+        num_expired = 0
+        while num_expired < len(bucket["entries"]) and bucket["entries"][num_expired]["expires_at"] <= now:
+            num_expired += 1
+
+        if num_expired:
+            del bucket["entries"][:num_expired]
+            del bucket["vectors"][:num_expired]
+            bucket["matrix"] = None
+
+    def make_entry(self, answer: str, sources: List[dict]) -> dict:
+        return {
+            "answer": answer,
+            "sources": sources,
+            "source_ids": [source.get("chunk_id") for source in sources],
+            "expires_at": time.monotonic() + self.ttl_seconds,
+        }
+
+    def lookup_text(self, key: tuple, generation: int, query_text: str) -> Optional[dict]:
+        """
+        Return the entry cached for exactly this (normalized) query text.
+        """
+        with self.lock:
+            bucket = self.get_bucket(key, generation)
+            entry = bucket["texts"].get(query_text)
+            if entry is not None and entry["expires_at"] <= time.monotonic():
+                del bucket["texts"][query_text]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return entry
+
+    def store_text(self, key: tuple, generation: int, query_text: str, answer: str, sources: List[dict]):
+        with self.lock:
+            bucket = self.get_bucket(key, generation)
+            bucket["texts"].pop(query_text, None)
+            bucket["texts"][query_text] = self.make_entry(answer, sources)
+
+            # dicts keep insertion order, the first entry is the oldest
+            if len(bucket["texts"]) > self.max_entries_per_project:
+                del bucket["texts"][next(iter(bucket["texts"]))]
+
+    def lookup(self, key: tuple, generation: int, query_vector: List[float]) -> Optional[dict]:
+        """
+        Return the cached entry whose query is most similar to query_vector, if above the threshold.
+        """
+        query = self.normalize(query_vector)
+
+        with self.lock:
+            bucket = self.get_bucket(key, generation)
+            self.drop_expired(bucket, time.monotonic())
+
+            if query is None or not bucket["entries"]:
+                self.misses += 1
+                return None
+
+            if bucket["matrix"] is None:
+                bucket["matrix"] = np.stack(bucket["vectors"])
+            scores = bucket["matrix"] @ query
+            best = int(np.argmax(scores))
+
+            if scores[best] < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return {**bucket["entries"][best], "similarity": float(scores[best])}
+
+    def store(self, key: tuple, generation: int, query_vector: List[float], answer: str, sources: List[dict]):
+        query = self.normalize(query_vector)
+        if query is None:
+            return
+
+        with self.lock:
+            bucket = self.get_bucket(key, generation)
+            bucket["vectors"].append(query)
+            bucket["entries"].append(self.make_entry(answer, sources))
+
+            if len(bucket["entries"]) > self.max_entries_per_project:
+                del bucket["entries"][0]
+                del bucket["vectors"][0]
+            bucket["matrix"] = None
+
+    def invalidate_project(self, project_id: str):
+        with self.lock:
+            for key in [key for key in self.buckets if key[0] == project_id]:
+                del self.buckets[key]
+                self.invalidations += 1
+
+
+answer_cache = None
+
+def get_answer_cache() -> AnswerCache:
+    global answer_cache
+    if answer_cache is None:
+        answer_cache = AnswerCache.from_settings(get_settings())
+    return answer_cache
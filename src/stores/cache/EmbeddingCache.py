@@ -0,0 +1,184 @@
+from collections import OrderedDict
+from array import array
+from typing import List, Optional
+import hashlib
+import threading
+import logging
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: an in-process LRU tier in front of an optional Redis tier.
+    Keys are built from (provider, embedding model id, hash of the normalized text).
+    """
+
+    def __init__(self, max_entries: int = 10000, redis_url: Optional[str] = None,
+                 redis_ttl: int = 7 * 24 * 3600, namespace: str = "emb"):
+        self.max_entries = max_entries
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self.namespace = namespace
+
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.redis_client = None
+        self.async_redis_client = None
+
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            redis_url=settings.CACHE_REDIS_URL,
+            redis_ttl=settings.EMBEDDING_CACHE_REDIS_TTL
+        )
+
+    def make_key(self, provider: str, model_id: str, text: str) -> str:
+        normalized_text = " ".join(text.split())
+        text_hash = hashlib.sha256(normalized_text.encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{provider}:{model_id}:{text_hash}"
+
+    def get_stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+        }
+
+    # ---------- LRU tier ----------
+
+    def lru_get(self, key: str):
+        with self.lock:
+            vector = self.entries.get(key)
+            if vector is not None:
+                self.entries.move_to_end(key)
+            return vector
+
+    def lru_set(self, key: str, vector: List[float]):
+        with self.lock:
+            self.entries[key] = vector
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    # ---------- Redis tier ----------
+
+    def encode_vector(self, vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    def decode_vector(self, data: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(data)
+        return vector.tolist()
+
+    def get_redis_client(self):
+        if self.redis_url and self.redis_client is None:
+            import redis
+            self.redis_client = redis.Redis.from_url(self.redis_url)
+        return self.redis_client
+
+    def get_async_redis_client(self):
+        if self.redis_url and self.async_redis_client is None:
+            import redis.asyncio
+            self.async_redis_client = redis.asyncio.Redis.from_url(self.redis_url)
+        return self.async_redis_client
+
+    # ---------- lookups ----------
+
+    def split_lru_hits(self, keys: List[str]):
+        """
+        Resolve keys from the LRU tier, returning found vectors and the keys left over.
+        """
+        vectors = {}
+        missing_keys = []
+        for key in dict.fromkeys(keys):
+            vector = self.lru_get(key)
+            if vector is not None:
+                vectors[key] = vector
+                self.hits += 1
+            else:
+                missing_keys.append(key)
+        return vectors, missing_keys
+
+    def merge_redis_hits(self, vectors: dict, missing_keys: List[str], redis_values: List):
+        for key, data in zip(missing_keys, redis_values):
+            if data is None:
+                self.misses += 1
+                continue
+            vector = self.decode_vector(data)
+            vectors[key] = vector
+            self.redis_hits += 1
+            self.lru_set(key, vector)
+        return vectors
+
+    def get_many(self, keys: List[str]) -> dict:
+        vectors, missing_keys = self.split_lru_hits(keys)
+        redis_values = [None] * len(missing_keys)
+
+        redis_client = self.get_redis_client()
+        if redis_client and missing_keys:
+            try:
+                redis_values = redis_client.mget(missing_keys)
+            except Exception as e:
+                self.logger.error(f"Embedding cache redis error: {e}")
+
+        return self.merge_redis_hits(vectors, missing_keys, redis_values)
+
+    async def get_many_async(self, keys: List[str]) -> dict:
+        vectors, missing_keys = self.split_lru_hits(keys)
+        redis_values = [None] * len(missing_keys)
+
+        redis_client = self.get_async_redis_client()
+        if redis_client and missing_keys:
+            try:
+                redis_values = await redis_client.mget(missing_keys)
+            except Exception as e:
+                self.logger.error(f"Embedding cache redis error: {e}")
+
+        return self.merge_redis_hits(vectors, missing_keys, redis_values)
+
+    def set_many(self, vectors: dict):
+        for key, vector in vectors.items():
+            self.lru_set(key, vector)
+
+        redis_client = self.get_redis_client()
+        if redis_client and vectors:
+            try:
+                pipeline = redis_client.pipeline(transaction=False)
+                for key, vector in vectors.items():
+                    pipeline.set(key, self.encode_vector(vector), ex=self.redis_ttl)
+                pipeline.execute()
+            except Exception as e:
+                self.logger.error(f"Embedding cache redis error: {e}")
+
+    async def set_many_async(self, vectors: dict):
+        for key, vector in vectors.items():
+            self.lru_set(key, vector)
+
+        redis_client = self.get_async_redis_client()
+        if redis_client and vectors:
+            try:
+                pipeline = redis_client.pipeline(transaction=False)
+                for key, vector in vectors.items():
+                    pipeline.set(key, self.encode_vector(vector), ex=self.redis_ttl)
+                await pipeline.execute()
+            except Exception as e:
+                self.logger.error(f"Embedding cache redis error: {e}")
+
+    async def aclose(self):
+        if self.async_redis_client is not None:
+            await self.async_redis_client.aclose()
+            self.async_redis_client = None
+        if self.redis_client is not None:
+            self.redis_client.close()
+            self.redis_client = None
@@ -0,0 +1 @@
+from .EmbeddingCache import EmbeddingCache
\ No newline at end of file
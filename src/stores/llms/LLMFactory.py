@@ -14,6 +14,11 @@ class LLMFactory():
                 default_input_max_characters=self.config.DEFAULT_INPUT_MAX_CHARACTERS,
                 default_generation_max_output_tokens=self.config.DEFAULT_GENERATION_MAX_OUTPUT_TOKENS,
                 default_generation_temperature=self.config.DEFAULT_GENERATION_TEMPERATURE,
+                default_embedding_batch_size=self.config.EMBEDDING_BATCH_SIZE,
+                http_max_connections=self.config.LLM_HTTP_MAX_CONNECTIONS,
+                http_max_keepalive_connections=self.config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                http_timeout=self.config.LLM_HTTP_TIMEOUT,
+                http_connect_timeout=self.config.LLM_HTTP_CONNECT_TIMEOUT,
             )
         
         elif provider == "OLLAMA":
@@ -21,7 +26,12 @@ class LLMFactory():
                 base_url=self.config.OLLAMA_BASE_URL, 
                 default_input_max_characters=self.config.DEFAULT_INPUT_MAX_CHARACTERS, 
                 default_generation_max_output_tokens=self.config.DEFAULT_GENERATION_MAX_OUTPUT_TOKENS, 
-                default_generation_temperature=self.config.DEFAULT_GENERATION_TEMPERATURE
+                default_generation_temperature=self.config.DEFAULT_GENERATION_TEMPERATURE,
+                default_embedding_batch_size=self.config.EMBEDDING_BATCH_SIZE,
+                http_max_connections=self.config.LLM_HTTP_MAX_CONNECTIONS,
+                http_max_keepalive_connections=self.config.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                http_timeout=self.config.LLM_HTTP_TIMEOUT,
+                http_connect_timeout=self.config.LLM_HTTP_CONNECT_TIMEOUT
             )
         
         else:
@@ -0,0 +1,130 @@
+from .LLMProviderInterface import LLMInterface
+from helpers.metrics import EMBEDDING_MICROBATCH_SIZE, EMBEDDING_MICROBATCH_REQUESTS, EMBEDDING_MICROBATCH_WAIT
+import asyncio
+import logging
+import time
+
+class BatchingEmbeddingProvider(LLMInterface):
+    """
+    Wraps an LLM provider and merges concurrent async embedding calls into one provider request.
+    Calls are collected for up to max_wait_ms or until max_items texts are waiting, whichever comes first.
+    Generation and sync calls are passed through untouched.
+    """
+
+    def __init__(self, provider: LLMInterface, max_wait_ms: float = 5.0, max_items: int = 64):
+        self.provider = provider
+        self.max_wait = max_wait_ms / 1000
+        self.max_items = max_items
+        self.logger = logging.getLogger(__name__)
+
+        # document_type -> list of (texts, future, enqueued_at) waiting for the next flush
+        self.pending = {}
+        self.pending_sizes = {}
+        self.flush_handles = {}
+        self.running_batches = set()
+        self.loop = None
+
+    def __getattr__(self, name):
+        # anything not overridden here (model ids, sizes, ...) comes from the wrapped provider
+        if name == "provider":
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.provider.set_embedding_model(model_id, embedding_size)
+
+    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                      temperature: float = None):
+        return self.provider.generate_text(prompt, chat_history, max_output_tokens, temperature)
+
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                  temperature: float = None):
+        return await self.provider.generate_text_async(prompt, chat_history, max_output_tokens, temperature)
+
+    async def stream_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                          temperature: float = None):
+        async for token in self.provider.stream_text(prompt, chat_history, max_output_tokens, temperature):
+            yield token
+
+    def generate_embedding(self, text: str, document_type: str = None):
+        return self.provider.generate_embedding(text, document_type=document_type)
+
+    def generate_embeddings(self, texts: list, document_type: str = None, batch_size: int = None):
+        return self.provider.generate_embeddings(texts, document_type=document_type, batch_size=batch_size)
+
+    async def generate_embedding_async(self, text: str, document_type: str = None):
+        embeddings = await self.generate_embeddings_async([text], document_type=document_type)
+        return embeddings[0] if embeddings else None
+
+    async def generate_embeddings_async(self, texts: list, document_type: str = None, batch_size: int = None):
+        # calls that already fill a batch gain nothing from waiting
+        if not texts or len(texts) >= self.max_items:
+            return await self.provider.generate_embeddings_async(texts, document_type=document_type, batch_size=batch_size)
+
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # futures belong to one event loop, state from a previous loop is unusable
+            self.loop = loop
+            self.pending, self.pending_sizes, self.flush_handles, self.running_batches = {}, {}, {}, set()
+
+        future = loop.create_future()
+        self.pending.setdefault(document_type, []).append((texts, future, time.perf_counter()))
+        self.pending_sizes[document_type] = self.pending_sizes.get(document_type, 0) + len(texts)
+
+        if self.pending_sizes[document_type] >= self.max_items:
+            self.flush(document_type)
+        elif document_type not in self.flush_handles:
+            self.flush_handles[document_type] = loop.call_later(self.max_wait, self.flush, document_type)
+
+        return await future
+
+    def flush(self, document_type: str):
+        handle = self.flush_handles.pop(document_type, None)
+        if handle is not None:
+            handle.cancel()
+
+        requests = self.pending.pop(document_type, [])
+        self.pending_sizes.pop(document_type, None)
+        if requests:
+            # the loop only keeps weak references to tasks
+            task = self.loop.create_task(self.run_batch(requests, document_type))
+            self.running_batches.add(task)
+            task.add_done_callback(self.running_batches.discard)
+
+    async def run_batch(self, requests: list, document_type: str):
+        flushed_at = time.perf_counter()
+        texts = [text for request_texts, _, _ in requests for text in request_texts]
+
+        EMBEDDING_MICROBATCH_SIZE.observe(len(texts))
+        EMBEDDING_MICROBATCH_REQUESTS.observe(len(requests))
+        for _, _, enqueued_at in requests:
+            EMBEDDING_MICROBATCH_WAIT.observe(flushed_at - enqueued_at)
+
+        try:
+            embeddings = await self.provider.generate_embeddings_async(texts, document_type=document_type)
+        except Exception as e:
+            self.logger.error(f"Error embedding micro-batch: {e}")
+            for _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # providers return None on failure, every caller then gets None as if it had called directly
+        if not embeddings or len(embeddings) != len(texts):
+            embeddings = None
+
+        offset = 0
+        for request_texts, future, _ in requests:
+            if not future.done():
+                future.set_result(embeddings[offset:offset+len(request_texts)] if embeddings else None)
+            offset += len(request_texts)
+
+    async def aclose(self):
+        for document_type in list(self.pending):
+            self.flush(document_type)
+        if self.running_batches:
+            await asyncio.gather(*self.running_batches, return_exceptions=True)
+        await self.provider.aclose()
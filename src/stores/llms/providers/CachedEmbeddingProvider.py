@@ -0,0 +1,97 @@
+from .LLMProviderInterface import LLMInterface
+from stores.cache.EmbeddingCache import EmbeddingCache
+import logging
+
+class CachedEmbeddingProvider(LLMInterface):
+    """
+    Wraps an LLM provider and serves embeddings through an EmbeddingCache.
+    Generation calls are passed through untouched.
+    """
+
+    def __init__(self, provider: LLMInterface, cache: EmbeddingCache, provider_name: str):
+        self.provider = provider
+        self.cache = cache
+        self.provider_name = provider_name
+        self.embedding_model_id = None
+        self.logger = logging.getLogger(__name__)
+
+    def __getattr__(self, name):
+        # anything not overridden here (model ids, sizes, ...) comes from the wrapped provider
+        if name == "provider":
+            raise AttributeError(name)
+        return getattr(self.provider, name)
+
+    def set_generation_model(self, model_id: str):
+        self.provider.set_generation_model(model_id)
+
+    def set_embedding_model(self, model_id: str, embedding_size: int):
+        self.embedding_model_id = model_id
+        self.provider.set_embedding_model(model_id, embedding_size)
+
+    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                      temperature: float = None):
+        return self.provider.generate_text(prompt, chat_history, max_output_tokens, temperature)
+
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                  temperature: float = None):
+        return await self.provider.generate_text_async(prompt, chat_history, max_output_tokens, temperature)
+
+    async def stream_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                          temperature: float = None):
+        async for token in self.provider.stream_text(prompt, chat_history, max_output_tokens, temperature):
+            yield token
+
+    def make_keys(self, texts: list):
+        return [self.cache.make_key(self.provider_name, self.embedding_model_id, text) for text in texts]
+
+    def missing_texts(self, texts: list, keys: list, vectors: dict):
+        """
+        Unique texts whose keys were not found in the cache, in first-seen order.
+        """
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+        return list(missing.keys()), list(missing.values())
+
+    def generate_embedding(self, text: str, document_type: str = None):
+        embeddings = self.generate_embeddings([text], document_type=document_type)
+        return embeddings[0] if embeddings else None
+
+    async def generate_embedding_async(self, text: str, document_type: str = None):
+        embeddings = await self.generate_embeddings_async([text], document_type=document_type)
+        return embeddings[0] if embeddings else None
+
+    def generate_embeddings(self, texts: list, document_type: str = None, batch_size: int = None):
+        keys = self.make_keys(texts)
+        vectors = self.cache.get_many(keys)
+        missing_keys, missing_texts = self.missing_texts(texts, keys, vectors)
+
+        if missing_texts:
+            new_vectors = self.provider.generate_embeddings(missing_texts, document_type=document_type, batch_size=batch_size)
+            if not new_vectors:
+                return None
+            new_vectors = dict(zip(missing_keys, new_vectors))
+            self.cache.set_many(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    async def generate_embeddings_async(self, texts: list, document_type: str = None, batch_size: int = None):
+        keys = self.make_keys(texts)
+        vectors = await self.cache.get_many_async(keys)
+        missing_keys, missing_texts = self.missing_texts(texts, keys, vectors)
+
+        if missing_texts:
+            new_vectors = await self.provider.generate_embeddings_async(missing_texts, document_type=document_type, batch_size=batch_size)
+            if not new_vectors:
+                return None
+            new_vectors = dict(zip(missing_keys, new_vectors))
+            await self.cache.set_many_async(new_vectors)
+            vectors.update(new_vectors)
+
+        return [vectors[key] for key in keys]
+
+    async def aclose(self):
+        await self.provider.aclose()
+        await self.cache.aclose()
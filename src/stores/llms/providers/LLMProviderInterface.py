@@ -15,7 +15,36 @@ class LLMInterface(ABC):
                             temperature: float = None) -> str:
         pass
 
+    @abstractmethod
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                  temperature: float = None) -> str:
+        pass
+
+    @abstractmethod
+    def stream_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                    temperature: float = None):
+        """
+        Async generator yielding the generated text piece by piece.
+        """
+        pass
+
     @abstractmethod
     def generate_embedding(self, text: str, document_type: str = None):
         pass
-    
\ No newline at end of file
+    
+    @abstractmethod
+    def generate_embeddings(self, texts: list, document_type: str = None, batch_size: int = None):
+        pass
+
+
+    @abstractmethod
+    async def generate_embedding_async(self, text: str, document_type: str = None):
+        pass
+
+    @abstractmethod
+    async def generate_embeddings_async(self, texts: list, document_type: str = None, batch_size: int = None):
+        pass
+
+    @abstractmethod
+    async def aclose(self):
+        pass
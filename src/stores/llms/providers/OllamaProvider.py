@@ -1,5 +1,8 @@
 from .LLMProviderInterface import LLMInterface
+from helpers.metrics import track_llm_call
+from requests.adapters import HTTPAdapter
 import requests
+import httpx
 import logging
 import json
 
@@ -8,12 +11,18 @@ class OllamaProvider(LLMInterface):
     def __init__(self, base_url: str = "http://172.18.32.1:11434",
                  default_input_max_characters: int = 1000,
                  default_generation_max_output_tokens: int = 1000,
-                 default_generation_temperature: float = 0.1):
+                 default_generation_temperature: float = 0.1,
+                 default_embedding_batch_size: int = 64,
+                 http_max_connections: int = 100,
+                 http_max_keepalive_connections: int = 20,
+                 http_timeout: float = 120.0,
+                 http_connect_timeout: float = 10.0):
         
         self.base_url = base_url
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size
         
         self.generation_model_name = None
         self.embedding_model_name = None
@@ -30,7 +39,35 @@ class OllamaProvider(LLMInterface):
                 "If you can't get the answer from the documents, you can apologize to the user.",
             ])
         
+        # one keep-alive connection pool per provider, for sync and async callers
+        self.http_timeout = httpx.Timeout(http_timeout, connect=http_connect_timeout)
+        self.http_limits = httpx.Limits(
+            max_connections=http_max_connections,
+            max_keepalive_connections=http_max_keepalive_connections
+        )
+        self.async_client = None
+
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=http_max_keepalive_connections))
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=http_max_keepalive_connections))
+
         self.logger = logging.getLogger(__name__)
+
+    def get_async_client(self) -> httpx.AsyncClient:
+        # created lazily so it binds to the event loop of its first caller
+        if self.async_client is None:
+            self.async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self.http_limits,
+                timeout=self.http_timeout
+            )
+        return self.async_client
+
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
+        self.session.close()
         
     def set_generation_model(self, model_id: str):
         self.generation_model_name = model_id
@@ -41,8 +78,8 @@ class OllamaProvider(LLMInterface):
         self.embedding_size = embedding_size
         self.logger.info(f"Embedding model set to: {model_id}")
 
-    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
-                      temperature: float = None):
+    def build_chat_payload(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                           temperature: float = None, stream: bool = False):
         
         if not self.generation_model_name:
             raise ValueError("Generation model is not set.")
@@ -53,31 +90,97 @@ class OllamaProvider(LLMInterface):
 
         messages = chat_history + [{"role": "user", "content": valid_prompt}]
         
-        response = requests.post(
-            f"{self.base_url}/api/chat",
-            json={
-                "model": self.generation_model_name,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": temperature or self.default_generation_temperature,
-                    "num_predict": max_output_tokens or self.default_generation_max_output_tokens
-                }
+        return {
+            "model": self.generation_model_name,
+            "messages": messages,
+            "stream": stream,
+            "options": {
+                "temperature": temperature or self.default_generation_temperature,
+                "num_predict": max_output_tokens or self.default_generation_max_output_tokens
             }
-        )
+        }
+
+    def count_payload_chars(self, payload: dict) -> int:
+        return sum(len(message["content"] or "") for message in payload["messages"])
+
+    def parse_chat_response(self, response_text: str, call=None):
+        try:
+            # Parse only the first JSON object if multiple are present
+            first_json = json.loads(response_text.splitlines()[0])
+            content = first_json["message"]["content"]
+            if call is not None:
+                call.record_output(len(content), first_json.get("prompt_eval_count"), first_json.get("eval_count"))
+            return content
+        except Exception as e:
+            self.logger.error(f"Error parsing Ollama response: {e}")
+            return None
+
+    def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                      temperature: float = None):
+
+        payload = self.build_chat_payload(prompt, chat_history, max_output_tokens, temperature)
+
+        with track_llm_call("ollama", "generate", self.generation_model_name, self.count_payload_chars(payload)) as call:
+            response = self.session.post(
+                f"{self.base_url}/api/chat",
+                json=payload,
+                timeout=(self.http_timeout.connect, self.http_timeout.read)
+            )
         
         if response.status_code != 200:
+            call.record_error()
             self.logger.error(f"Error from Ollama: {response.text}")
             return None
             
-        try:
-            # Parse only the first JSON object if multiple are present
-            first_json = json.loads(response.text.splitlines()[0])
-            print("Response: ", first_json["message"]["content"])
-            return first_json["message"]["content"]
-        except Exception as e:
-            self.logger.error(f"Error parsing Ollama response: {e}")
+        return self.parse_chat_response(response.text, call)
+
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                  temperature: float = None):
+
+        payload = self.build_chat_payload(prompt, chat_history, max_output_tokens, temperature)
+
+        with track_llm_call("ollama", "generate", self.generation_model_name, self.count_payload_chars(payload)) as call:
+            response = await self.get_async_client().post("/api/chat", json=payload)
+
+        if response.status_code != 200:
+            call.record_error()
+            self.logger.error(f"Error from Ollama: {response.text}")
             return None
+
+        return self.parse_chat_response(response.text, call)
+
+    async def stream_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                          temperature: float = None):
+        """
+        Stream tokens from /api/chat, which answers with one JSON object per line (NDJSON).
+        """
+        payload = self.build_chat_payload(prompt, chat_history, max_output_tokens, temperature, stream=True)
+
+        with track_llm_call("ollama", "stream", self.generation_model_name, self.count_payload_chars(payload)) as call:
+            async with self.get_async_client().stream("POST", "/api/chat", json=payload) as response:
+                if response.status_code != 200:
+                    error_text = await response.aread()
+                    self.logger.error(f"Error from Ollama: {error_text}")
+                    raise ValueError("Ollama streaming request failed")
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+
+                    message = json.loads(line)
+                    if message.get("error"):
+                        raise ValueError(f"Ollama streaming error: {message['error']}")
+
+                    content = message.get("message", {}).get("content")
+                    if content:
+                        call.record_first_token()
+                        call.record_output(len(content))
+                        yield content
+
+                    if message.get("done"):
+                        # the final message carries the token counts of the whole exchange
+                        call.record_output(input_tokens=message.get("prompt_eval_count"), output_tokens=message.get("eval_count"))
+                        break
     
     def generate_embedding(self, text: str, document_type: str = None):
         if not self.embedding_model_name:
@@ -85,15 +188,132 @@ class OllamaProvider(LLMInterface):
         
         input = text[:self.default_input_max_characters] if len(text)>self.default_input_max_characters else text
         
-        response = requests.post(
-            f"{self.base_url}/api/embeddings",
-            json={
-                "model": self.embedding_model_name,
-                "prompt": input
-            }
-        )
+        with track_llm_call("ollama", "embed", self.embedding_model_name, len(input)) as call:
+            # /api/embed like the batch methods: it normalizes the vectors, the legacy /api/embeddings doesn't
+            response = self.session.post(
+                f"{self.base_url}/api/embed",
+                json={
+                    "model": self.embedding_model_name,
+                    "input": [input]
+                },
+                timeout=(self.http_timeout.connect, self.http_timeout.read)
+            )
+        if response.status_code != 200:
+            call.record_error()
+            self.logger.error(f"Error generating embedding: {response.text}")
+            return None
+
+        response_json = response.json()
+        embeddings = response_json.get("embeddings", [])
+        call.record_output(input_tokens=response_json.get("prompt_eval_count"), embedded_texts=len(embeddings))
+        if len(embeddings) != 1:
+            self.logger.error(f"Expected 1 embedding from Ollama, got {len(embeddings)}")
+            return None
+
+        return embeddings[0]
+
+    async def generate_embedding_async(self, text: str, document_type: str = None):
+        if not self.embedding_model_name:
+            raise ValueError("Embedding model is not set.")
+
+        input = text[:self.default_input_max_characters] if len(text)>self.default_input_max_characters else text
+
+        with track_llm_call("ollama", "embed", self.embedding_model_name, len(input)) as call:
+            response = await self.get_async_client().post(
+                "/api/embed",
+                json={
+                    "model": self.embedding_model_name,
+                    "input": [input]
+                }
+            )
         if response.status_code != 200:
+            call.record_error()
             self.logger.error(f"Error generating embedding: {response.text}")
             return None
             
-        return response.json()["embedding"]
\ No newline at end of file
+        response_json = response.json()
+        embeddings = response_json.get("embeddings", [])
+        call.record_output(input_tokens=response_json.get("prompt_eval_count"), embedded_texts=len(embeddings))
+        if len(embeddings) != 1:
+            self.logger.error(f"Expected 1 embedding from Ollama, got {len(embeddings)}")
+            return None
+
+        return embeddings[0]
+    
+    def generate_embeddings(self, texts: list, document_type: str = None, batch_size: int = None):
+        """
+        Embed many texts with one /api/embed call per batch.
+        Returns the vectors in the same order as the input texts.
+        """
+        if not self.embedding_model_name:
+            raise ValueError("Embedding model is not set.")
+        
+        batch_size = batch_size or self.default_embedding_batch_size
+        inputs = [text[:self.default_input_max_characters] for text in texts]
+        embeddings = []
+        
+        for i in range(0, len(inputs), batch_size):
+            batch = inputs[i:i+batch_size]
+            
+            with track_llm_call("ollama", "embed_batch", self.embedding_model_name, sum(map(len, batch))) as call:
+                response = self.session.post(
+                    f"{self.base_url}/api/embed",
+                    json={
+                        "model": self.embedding_model_name,
+                        "input": batch
+                    },
+                    timeout=(self.http_timeout.connect, self.http_timeout.read)
+                )
+            if response.status_code != 200:
+                call.record_error()
+                self.logger.error(f"Error generating embeddings: {response.text}")
+                return None
+
+            response_json = response.json()
+            batch_embeddings = response_json.get("embeddings", [])
+            call.record_output(input_tokens=response_json.get("prompt_eval_count"), embedded_texts=len(batch_embeddings))
+            if len(batch_embeddings) != len(batch):
+                self.logger.error(f"Expected {len(batch)} embeddings from Ollama, got {len(batch_embeddings)}")
+                return None
+
+            embeddings.extend(batch_embeddings)
+
+        return embeddings
+
+    async def generate_embeddings_async(self, texts: list, document_type: str = None, batch_size: int = None):
+        """
+        Async variant of generate_embeddings over the shared connection pool.
+        """
+        if not self.embedding_model_name:
+            raise ValueError("Embedding model is not set.")
+
+        batch_size = batch_size or self.default_embedding_batch_size
+        inputs = [text[:self.default_input_max_characters] for text in texts]
+        embeddings = []
+
+        for i in range(0, len(inputs), batch_size):
+            batch = inputs[i:i+batch_size]
+
+            with track_llm_call("ollama", "embed_batch", self.embedding_model_name, sum(map(len, batch))) as call:
+                response = await self.get_async_client().post(
+                    "/api/embed",
+                    json={
+                        "model": self.embedding_model_name,
+                        "input": batch
+                    }
+                )
+            if response.status_code != 200:
+                call.record_error()
+                self.logger.error(f"Error generating embeddings: {response.text}")
+                return None
+            
+            response_json = response.json()
+            batch_embeddings = response_json.get("embeddings", [])
+            call.record_output(input_tokens=response_json.get("prompt_eval_count"), embedded_texts=len(batch_embeddings))
+            if len(batch_embeddings) != len(batch):
+                self.logger.error(f"Expected {len(batch)} embeddings from Ollama, got {len(batch_embeddings)}")
+                return None
+            
+            embeddings.extend(batch_embeddings)
+        
+        return embeddings
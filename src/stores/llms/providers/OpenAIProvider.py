@@ -1,5 +1,7 @@
 from .LLMProviderInterface import LLMInterface
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+from helpers.metrics import track_llm_call
+import httpx
 import logging
 
 class OpenAIProvider(LLMInterface):
@@ -7,7 +9,12 @@ class OpenAIProvider(LLMInterface):
     def __init__(self, api_key: str, api_url: str=None,
                        default_input_max_characters: int=1000,
                        default_generation_max_output_tokens: int=1000,
-                       default_generation_temperature: float=0.1):
+                       default_generation_temperature: float=0.1,
+                       default_embedding_batch_size: int=64,
+                       http_max_connections: int=100,
+                       http_max_keepalive_connections: int=20,
+                       http_timeout: float=120.0,
+                       http_connect_timeout: float=10.0):
         
         self.api_key = api_key
         self.api_url = api_url
@@ -15,19 +22,45 @@ class OpenAIProvider(LLMInterface):
         self.default_input_max_characters = default_input_max_characters
         self.default_generation_max_output_tokens = default_generation_max_output_tokens
         self.default_generation_temperature = default_generation_temperature
+        self.default_embedding_batch_size = default_embedding_batch_size
 
         self.generation_model_id = None
 
         self.embedding_model_id = None
         self.embedding_size = None
 
+        # one keep-alive connection pool per client, shared by every call
+        self.http_timeout = httpx.Timeout(http_timeout, connect=http_connect_timeout)
+        self.http_limits = httpx.Limits(
+            max_connections=http_max_connections,
+            max_keepalive_connections=http_max_keepalive_connections
+        )
+
         self.client = OpenAI(
             api_key = self.api_key,
-            api_url = self.api_url
+            base_url = self.api_url,
+            http_client = httpx.Client(limits=self.http_limits, timeout=self.http_timeout)
         )
+        self.async_client = None
 
         self.logger = logging.getLogger(__name__)
         
+    def get_async_client(self) -> AsyncOpenAI:
+        # created lazily so it binds to the event loop of its first caller
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(
+                api_key = self.api_key,
+                base_url = self.api_url,
+                http_client = httpx.AsyncClient(limits=self.http_limits, timeout=self.http_timeout)
+            )
+        return self.async_client
+    
+    async def aclose(self):
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+        self.client.close()
+        
     def set_generation_model(self, model_id: str):
         """
         Set the model to be used for text generation.
@@ -43,6 +76,21 @@ class OpenAIProvider(LLMInterface):
         self.embedding_size = embedding_size
         self.logger.info(f"Embedding model set to: {model_id} with size: {embedding_size}")
         
+    def build_messages(self, prompt: str, chat_history: list=[]):
+        return chat_history + [{"role": "user", "content": prompt[:self.default_input_max_characters]}]
+    
+    def count_messages_chars(self, messages: list) -> int:
+        return sum(len(message["content"] or "") for message in messages)
+    
+    def record_response(self, call, response, output_chars: int = 0, embedded_texts: int = 0):
+        usage = getattr(response, "usage", None)
+        call.record_output(
+            output_chars=output_chars,
+            input_tokens=getattr(usage, "prompt_tokens", None),
+            output_tokens=getattr(usage, "completion_tokens", None),
+            embedded_texts=embedded_texts
+        )
+    
     def generate_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
                       temperature: float = None):
         """
@@ -51,18 +99,82 @@ class OpenAIProvider(LLMInterface):
         if not self.generation_model_id:
             raise ValueError("Generation model is not set.")
         
-        response = self.client.chat.completions.create(
-            model=self.generation_model_id,
-            messages=chat_history + [{"role": "user", "content": prompt[:self.default_input_max_characters]}],
-            max_tokens=max_output_tokens or self.default_generation_max_output_tokens,
-            temperature=temperature or self.default_generation_temperature
-        )
+        messages = self.build_messages(prompt, chat_history)
+        
+        with track_llm_call("openai", "generate", self.generation_model_id, self.count_messages_chars(messages)) as call:
+            response = self.client.chat.completions.create(
+                model=self.generation_model_id,
+                messages=messages,
+                max_tokens=max_output_tokens or self.default_generation_max_output_tokens,
+                temperature=temperature or self.default_generation_temperature
+            )
+        
+        if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            call.record_error()
+            self.logger.error("Error while generating text with OpenAI")
+            return None
+        
+        content = response.choices[0].message.content
+        self.record_response(call, response, output_chars=len(content or ""))
+        return content
+    
+    async def generate_text_async(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                                  temperature: float = None):
+        """
+        Async variant of generate_text over the shared connection pool.
+        """
+        if not self.generation_model_id:
+            raise ValueError("Generation model is not set.")
+        
+        messages = self.build_messages(prompt, chat_history)
+        
+        with track_llm_call("openai", "generate", self.generation_model_id, self.count_messages_chars(messages)) as call:
+            response = await self.get_async_client().chat.completions.create(
+                model=self.generation_model_id,
+                messages=messages,
+                max_tokens=max_output_tokens or self.default_generation_max_output_tokens,
+                temperature=temperature or self.default_generation_temperature
+            )
         
         if not response or not response.choices or len(response.choices) == 0 or not response.choices[0].message:
+            call.record_error()
             self.logger.error("Error while generating text with OpenAI")
             return None
         
-        return response.choices[0].message['content']
+        content = response.choices[0].message.content
+        self.record_response(call, response, output_chars=len(content or ""))
+        return content
+    
+    async def stream_text(self, prompt: str, chat_history: list=[], max_output_tokens: int=None,
+                          temperature: float = None):
+        """
+        Stream tokens from a chat completion, delivered by the API as server-sent events.
+        """
+        if not self.generation_model_id:
+            raise ValueError("Generation model is not set.")
+        
+        messages = self.build_messages(prompt, chat_history)
+        
+        with track_llm_call("openai", "stream", self.generation_model_id, self.count_messages_chars(messages)) as call:
+            stream = await self.get_async_client().chat.completions.create(
+                model=self.generation_model_id,
+                messages=messages,
+                max_tokens=max_output_tokens or self.default_generation_max_output_tokens,
+                temperature=temperature or self.default_generation_temperature,
+                stream=True
+            )
+            
+            # closing the stream returns its connection to the pool, also when the consumer stops early
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        call.record_first_token()
+                        call.record_output(len(content))
+                        yield content
     
     def generate_embedding(self, text: str, document_type: str = None):
         """
@@ -71,13 +183,109 @@ class OpenAIProvider(LLMInterface):
         if not self.embedding_model_id or not self.embedding_size:
             raise ValueError("Embedding model is not set.")
         
-        response = self.client.embeddings.create(
-            model=self.embedding_model_id,
-            input=text[:self.default_input_max_characters]
-        )
+        input = text[:self.default_input_max_characters]
+        
+        with track_llm_call("openai", "embed", self.embedding_model_id, len(input)) as call:
+            response = self.client.embeddings.create(
+                model=self.embedding_model_id,
+                input=input
+            )
         
         if not response or not response.data or len(response.data) == 0:
+            call.record_error()
             self.logger.error("Error while generating embedding with OpenAI")
             return None
         
-        return response.data[0].embedding
\ No newline at end of file
+        self.record_response(call, response, embedded_texts=1)
+        return response.data[0].embedding
+    
+    async def generate_embedding_async(self, text: str, document_type: str = None):
+        """
+        Async variant of generate_embedding over the shared connection pool.
+        """
+        if not self.embedding_model_id or not self.embedding_size:
+            raise ValueError("Embedding model is not set.")
+        
+        input = text[:self.default_input_max_characters]
+        
+        with track_llm_call("openai", "embed", self.embedding_model_id, len(input)) as call:
+            response = await self.get_async_client().embeddings.create(
+                model=self.embedding_model_id,
+                input=input
+            )
+        
+        if not response or not response.data or len(response.data) == 0:
+            call.record_error()
+            self.logger.error("Error while generating embedding with OpenAI")
+            return None
+        
+        self.record_response(call, response, embedded_texts=1)
+        return response.data[0].embedding
+    
+    def generate_embeddings(self, texts: list, document_type: str = None, batch_size: int = None):
+        """
+        Generate embeddings for many texts, one request per batch.
+        Returns the vectors in the same order as the input texts.
+        """
+        if not self.embedding_model_id or not self.embedding_size:
+            raise ValueError("Embedding model is not set.")
+        
+        batch_size = batch_size or self.default_embedding_batch_size
+        inputs = [text[:self.default_input_max_characters] for text in texts]
+        embeddings = []
+        
+        for i in range(0, len(inputs), batch_size):
+            batch = inputs[i:i+batch_size]
+            
+            with track_llm_call("openai", "embed_batch", self.embedding_model_id, sum(map(len, batch))) as call:
+                response = self.client.embeddings.create(
+                    model=self.embedding_model_id,
+                    input=batch
+                )
+            
+            if not response or not response.data or len(response.data) != len(batch):
+                call.record_error()
+                self.logger.error("Error while generating embeddings with OpenAI")
+                return None
+            
+            self.record_response(call, response, embedded_texts=len(batch))
+            
+            # the API tags every vector with the index of its input
+            embeddings.extend(
+                rec.embedding for rec in sorted(response.data, key=lambda rec: rec.index)
+            )
+        
+        return embeddings
+    
+    async def generate_embeddings_async(self, texts: list, document_type: str = None, batch_size: int = None):
+        """
+        Async variant of generate_embeddings over the shared connection pool.
+        """
+        if not self.embedding_model_id or not self.embedding_size:
+            raise ValueError("Embedding model is not set.")
+        
+        batch_size = batch_size or self.default_embedding_batch_size
+        inputs = [text[:self.default_input_max_characters] for text in texts]
+        embeddings = []
+        
+        for i in range(0, len(inputs), batch_size):
+            batch = inputs[i:i+batch_size]
+            
+            with track_llm_call("openai", "embed_batch", self.embedding_model_id, sum(map(len, batch))) as call:
+                response = await self.get_async_client().embeddings.create(
+                    model=self.embedding_model_id,
+                    input=batch
+                )
+            
+            if not response or not response.data or len(response.data) != len(batch):
+                call.record_error()
+                self.logger.error("Error while generating embeddings with OpenAI")
+                return None
+            
+            self.record_response(call, response, embedded_texts=len(batch))
+            
+            embeddings.extend(
+                rec.embedding for rec in sorted(response.data, key=lambda rec: rec.index)
+            )
+        
+        return embeddings
\ No newline at end of file
@@ -1,14 +1,16 @@
-from celery_app import celery_app, get_setup
+from celery_app import celery_app, run_in_worker_loop, get_worker_resources
 from models.ProjectModel import ProjectModel
-import asyncio
 import logging
 from fastapi import FastAPI, APIRouter, Depends, UploadFile, status, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 from helpers.config import get_settings, Settings
+from helpers.metrics import track_ingest_stage
 from controllers.DataController import DataController
 from controllers.ProcessFileController import ProcessFileController
 from controllers.VectorStoreController import VectorStoreController
+from controllers.LexicalIndexController import LexicalIndexController
+from controllers.DedupController import DedupController
 from models import ResponseSignal
 import aiofiles
 import logging
@@ -16,25 +18,117 @@ from models.ProjectModel import ProjectModel
 from models.DataChunkModel import DataChunkModel
 from models.db_schemes.project import Project
 from models.db_schemes.DataChunk import DataChunk
-from typing import List
+from helpers.chunk_hashing import ChunkHasher
+from typing import Awaitable, Callable, Iterable, List
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 @celery_app.task(bind=True, 
                  name='tasks.file_processing.chunk_file')
 def chunk_file(self, project_id, filename: str,
                chunk_size: int = 100,
-               overlap: int = 20):
+               overlap: int = 20,
+               document_name: str = None):
     
-    return asyncio.run(
+    return run_in_worker_loop(
         _chunk_file(self, project_id, filename, chunk_size,
-                     overlap)
+                     overlap, document_name)
     )
+
+
+def select_new_chunks(chunks_batch: list, hasher: ChunkHasher, document_name: str,
+                      existing_hashes: dict, seen_hashes: set) -> List[DataChunk]:
+    """
+    Hash a batch of split chunks and keep the ones the previous revision of the document doesn't have.
+    """
+    new_chunks = []
+    for chunk in chunks_batch:
+        chunk_hash = hasher.hash(chunk.page_content)
+        seen_hashes.add(chunk_hash)
+        if chunk_hash in existing_hashes:
+            continue
+        
+        new_chunks.append(DataChunk(
+            chunk_text=chunk.page_content,
+            chunk_metadata={**chunk.metadata, "document": document_name},
+            chunk_hash=chunk_hash,
+        ))
+    return new_chunks
+
+
+async def remove_stale_chunks(project_id: str, stale_chunks: dict, data_chunk_model: DataChunkModel,
+                              lexical_index: LexicalIndexController, vector_store_controller: VectorStoreController) -> int:
+    """
+    Delete chunks (chunk_hash -> chunk id) that are gone from the new revision, from Mongo, BM25 and the vector DB.
+    """
+    if not stale_chunks:
+        return 0
+    
+    with track_ingest_stage("remove_chunks"):
+        chunk_ids = list(stale_chunks.values())
+        await vector_store_controller.delete_chunk_vectors(project_id, list(stale_chunks.keys()))
+        lexical_index.remove_chunks(project_id, chunk_ids)
+        DedupController().remove_chunks(project_id, chunk_ids)
+        return await data_chunk_model.delete_chunks_by_ids(chunk_ids)
+
+
+async def ingest_chunk_batches(project_id: str, document_name: str, chunk_batches: Iterable[list],
+                               data_chunk_model: DataChunkModel, lexical_index: LexicalIndexController,
+                               dispatch_embedding: Callable[[List[str]], Awaitable]) -> dict:
+    """
+    Store the chunks of a document revision batch by batch: new chunks (by hash) that aren't
+    near-duplicates go to Mongo and BM25, and their ids to dispatch_embedding in slices of
+    EMBED_TASK_BATCH_SIZE. Returns the chunk counts and the stale chunks (chunk_hash -> chunk id)
+    of the previous revision, which the caller removes once the whole revision is stored.
+    """
+    dedup = DedupController()
+    num_inserted = 0
+    num_duplicates = 0
+    
+    # re-uploads of a document only store and embed the chunks whose hash is new
+    hasher = ChunkHasher(project_id, document_name)
+    existing_hashes = await data_chunk_model.get_document_chunk_hashes(project_id, document_name)
+    seen_hashes = set()
+    
+    with dedup.open_index(project_id) as dedup_index:
+        for chunks_batch in chunk_batches:
+            
+            file_chunks = select_new_chunks(chunks_batch, hasher, document_name, existing_hashes, seen_hashes)
+            
+            with track_ingest_stage("dedup"):
+                # an edited chunk must not be dropped as a near-duplicate of the version it replaces
+                replaceable_ids = {chunk_id for chunk_hash, chunk_id in existing_hashes.items() if chunk_hash not in seen_hashes}
+                num_candidates = len(file_chunks)
+                file_chunks = dedup.filter_chunks(dedup_index, file_chunks, replaceable_ids)
+                num_duplicates += num_candidates - len(file_chunks)
+            if not file_chunks:
+                continue
+            
+            with track_ingest_stage("store_chunks"):
+                num_inserted += await data_chunk_model.insert_many_chunks(file_chunks)
+            
+            with track_ingest_stage("lexical_index"):
+                lexical_index.add_chunks(project_id, [(str(chunk.id), chunk.chunk_text) for chunk in file_chunks])
+            
+            chunk_ids = [str(chunk.id) for chunk in file_chunks]
+            for i in range(0, len(chunk_ids), settings.EMBED_TASK_BATCH_SIZE):
+                await dispatch_embedding(chunk_ids[i:i+settings.EMBED_TASK_BATCH_SIZE])
+    
+    return {
+        "inserted_chunks": num_inserted,
+        "duplicate_chunks": num_duplicates,
+        "unchanged_chunks": len(seen_hashes) - num_inserted - num_duplicates,
+        "seen_chunks": len(seen_hashes),
+        "stale_chunks": {chunk_hash: chunk_id for chunk_hash, chunk_id in existing_hashes.items() if chunk_hash not in seen_hashes}
+    }
+
     
 async def _chunk_file(task_instance, project_id,
                         filename: str,
                         chunk_size: int = 100,
-                        overlap: int = 20
+                        overlap: int = 20,
+                        document_name: str = None
                     ):
     
     (
@@ -43,15 +137,12 @@ async def _chunk_file(task_instance, project_id,
         generation_llm,
         embedding_llm,
         vector_db_client
-    ) = await get_setup()
+    ) = await get_worker_resources()
     
     try:
         db_client = mongodb_client
 
         file_processor = ProcessFileController(project_id=project_id)
-        print("Before get file content")
-        file_content = file_processor.get_file_content(filename)
-        print("After get file content")
         chunk_size = chunk_size if chunk_size else 100
         overlap = overlap if overlap else 20
         
@@ -66,30 +157,45 @@ async def _chunk_file(task_instance, project_id,
                 "signal": ResponseSignal.FILE_PROCESS_FAILED.value,
                 "error": "Project ID is None"
             }
-        print("file content: ", file_content)
-        file_chunks = file_processor.process_file_into_chunks(project_id, file_content, chunk_size, overlap)
-        print("file chunks: ", file_chunks)
-        if not file_chunks or len(file_chunks) == 0:
+        
+        data_chunk_model = await DataChunkModel.create_instance(db_client=db_client)
+        lexical_index = LexicalIndexController()
+        # chunks stored before the index existed are backfilled before new ones are added
+        await lexical_index.ensure_index(project_id, db_client)
+        
+        # claim check: messages carry chunk ids only, the embedder reads the text from Mongo
+        async def dispatch_embedding(chunk_ids: List[str]):
+            embed_chunks.delay(project_id, chunk_ids)
+        
+        # pages -> chunks -> batches: each batch is stored and handed to the embedder
+        # while the rest of the document is still being parsed
+        document_name = document_name or filename
+        ingested = await ingest_chunk_batches(
+            project_id, document_name,
+            file_processor.iter_chunk_batches(
+                project_id, filename, chunk_size, overlap,
+                batch_size=settings.INGEST_BATCH_SIZE
+            ),
+            data_chunk_model, lexical_index, dispatch_embedding
+        )
+        
+        if not ingested["seen_chunks"]:
             return {
                 "signal": ResponseSignal.FILE_PROCESS_FAILED.value
             }
-            
-        file_chunks = [
-            DataChunk(
-                chunk_text=chunk.page_content,
-                chunk_metadata=chunk.metadata,
-            )
-            for i, chunk in enumerate(file_chunks)
-        ]
-        
-        data_chunk_model = await DataChunkModel.create_instance(db_client=db_client)
-        num_inserted = await data_chunk_model.insert_many_chunks(file_chunks)
         
-        embed_chunks.delay([chunk.model_dump(by_alias=True, exclude_unset=True) for chunk in file_chunks])
+        # stale chunks go only once the whole new revision is stored, a failed parse keeps the old one
+        vector_store_controller = VectorStoreController(embedding_llm, generation_llm, vector_db_client, mongodb_client)
+        num_removed = await remove_stale_chunks(
+            project_id, ingested["stale_chunks"], data_chunk_model, lexical_index, vector_store_controller
+        )
             
         return {
             "signal": ResponseSignal.FILE_PROCESS_SUCCESS.value,
-            "inserted_chunks": num_inserted
+            "inserted_chunks": ingested["inserted_chunks"],
+            "duplicate_chunks": ingested["duplicate_chunks"],
+            "unchanged_chunks": ingested["unchanged_chunks"],
+            "removed_chunks": num_removed
         }
     
     except Exception as e:
@@ -102,13 +208,13 @@ async def _chunk_file(task_instance, project_id,
 
 @celery_app.task(bind=True,
                  name='tasks.file_processing.embed_chunks')
-def embed_chunks(self, chunks: List[DataChunk]):
+def embed_chunks(self, project_id: str, chunk_ids: List[str]):
     
-    return asyncio.run(
-        _embed_chunks(self, chunks)
+    return run_in_worker_loop(
+        _embed_chunks(self, project_id, chunk_ids)
     )
     
-async def _embed_chunks(task_instance, chunks:List):
+async def _embed_chunks(task_instance, project_id: str, chunk_ids: List[str]):
     try:
         (
             mongodb_client,
@@ -116,21 +222,30 @@ async def _embed_chunks(task_instance, chunks:List):
             generation_llm,
             embedding_llm,
             vector_db_client
-        ) = await get_setup()
+        ) = await get_worker_resources()
 
-        vector_store_controller = VectorStoreController(embedding_llm, generation_llm, vector_db_client)
+        data_chunk_model = await DataChunkModel.create_instance(db_client=mongodb_client)
+        with track_ingest_stage("load_chunks"):
+            stored_chunks = await data_chunk_model.get_chunks_by_ids(chunk_ids, project_id=project_id)
+        
+        # chunks deleted since the message was queued are skipped
+        chunks = [
+            {
+                "chunk_id": str(chunk.id),
+                "chunk_text": chunk.chunk_text,
+                "chunk_metadata": chunk.chunk_metadata,
+                "chunk_hash": chunk.chunk_hash,
+            }
+            for chunk in stored_chunks
+        ]
 
-        for chunk in chunks:
-            embeddings = vector_store_controller.embed_chunk(
-                    text=chunk['chunk_text'],
-                    metadata=chunk['chunk_metadata']
-                )
+        vector_store_controller = VectorStoreController(embedding_llm, generation_llm, vector_db_client, mongodb_client)
 
-            if not embeddings or len(embeddings) == 0:
-                continue
+        num_embedded = await vector_store_controller.embed_and_index_chunks(chunks=chunks)
             
         return {
             "signal": ResponseSignal.FILE_PROCESS_SUCCESS.value,
+            "embedded_chunks": num_embedded
         }
             
     except Exception as e:
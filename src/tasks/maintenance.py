@@ -0,0 +1,88 @@
+from celery_app import celery_app, run_in_worker_loop, get_worker_resources
+from controllers.VectorStoreController import VectorStoreController
+from stores.VectorDB import LayoutMigration
+from helpers.config import get_settings
+from qdrant_client import QdrantClient
+from models import ResponseSignal
+import logging
+
+logger = logging.getLogger(__name__)
+
+@celery_app.task(bind=True,
+                 name='tasks.maintenance.apply_collection_profile')
+def apply_collection_profile(self, project_id: str, profile_name: str):
+    
+    return run_in_worker_loop(
+        _apply_collection_profile(self, project_id, profile_name)
+    )
+    
+async def _apply_collection_profile(task_instance, project_id: str, profile_name: str):
+    try:
+        (
+            mongodb_client,
+            mongodb_connection,
+            generation_llm,
+            embedding_llm,
+            vector_db_client
+        ) = await get_worker_resources()
+        
+        vector_store_controller = VectorStoreController(embedding_llm, generation_llm, vector_db_client, mongodb_client)
+        
+        # new collections pick the profile up from the project, existing ones are updated in place
+        result = await vector_store_controller.apply_collection_profile(project_id, profile_name)
+        
+        return {
+            "signal": ResponseSignal.COLLECTION_PROFILE_APPLIED.value,
+            "collection_updated": bool(result)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error applying collection profile: {e}")
+        return {
+            "signal": ResponseSignal.COLLECTION_PROFILE_FAILED.value,
+            "error": str(e)
+        }
+
+
+@celery_app.task(bind=True,
+                 name='tasks.maintenance.migrate_vector_layout')
+def migrate_vector_layout(self, target_layout: str, project_ids: list = None, delete_source: bool = False):
+    
+    return run_in_worker_loop(
+        _migrate_vector_layout(self, target_layout, project_ids, delete_source)
+    )
+    
+async def _migrate_vector_layout(task_instance, target_layout: str, project_ids: list = None, delete_source: bool = False):
+    
+    settings = get_settings()
+    client = QdrantClient(host=settings.QDRANT_HOST, port=settings.QDRANT_PORT)
+    
+    try:
+        if project_ids is None and target_layout == "shared":
+            # only the projects in Mongo, the Qdrant server may hold collections of other apps
+            mongodb_client = (await get_worker_resources())[0]
+            project_ids = await LayoutMigration.get_project_ids(mongodb_client)
+        
+        migrated = LayoutMigration.migrate_vector_layout(
+            client,
+            target_layout,
+            settings.QDRANT_SHARED_COLLECTION_NAME,
+            project_ids=project_ids,
+            delete_source=delete_source,
+            batch_size=settings.VECTOR_DB_UPSERT_BATCH_SIZE
+        )
+        
+        return {
+            "signal": ResponseSignal.VECTOR_LAYOUT_MIGRATED.value,
+            "migrated_points": migrated
+        }
+    
+    except Exception as e:
+        logger.error(f"Error migrating vector layout: {e}")
+        return {
+            "signal": ResponseSignal.VECTOR_LAYOUT_MIGRATION_FAILED.value,
+            "error": str(e)
+        }
+    
+    finally:
+        client.close()